@@ -1,9 +1,9 @@
 import asyncio, os
 from google.adk.agents import Agent
 from dotenv import load_dotenv
-from .subagents.ad_video_analyser_agent import ad_video_analyser_agent
-from .subagents.instapost_analyser_agent import insta_analyser_agent
-from .subagents.website_analyser_agent import website_analyser_agent
+from .subagents.ad_video_analyser_agent import ad_video_analyser_agent, ad_video_structured_agent, ad_video_chunked_agent
+from .subagents.instapost_analyser_agent import insta_analyser_agent, insta_structured_agent
+from .subagents.website_analyser_agent import website_analyser_agent, website_structured_agent, website_chunked_agent, website_incremental_agent
 
 # --- Constants ---
 GEMINI_MODEL = "gemini-2.0-flash"
@@ -33,6 +33,23 @@ async def create_agent():
 
 root_agent = create_agent()
 
+# Analysis pipelines keyed by content type, for callers that already know which
+# sub-agent should handle a request and can skip the manager's routing step.
+# The *_structured pipelines produce the same AgentOutput from a single Gemini call.
+# The *_chunked pipelines split long videos and pages into parts analysed concurrently.
+# website_incremental re-reviews only the sections of a page that changed since its last analysis.
+PIPELINES = {
+    "video": ad_video_analyser_agent,
+    "image": insta_analyser_agent,
+    "website": website_analyser_agent,
+    "video_structured": ad_video_structured_agent,
+    "image_structured": insta_structured_agent,
+    "website_structured": website_structured_agent,
+    "video_chunked": ad_video_chunked_agent,
+    "website_chunked": website_chunked_agent,
+    "website_incremental": website_incremental_agent,
+}
+
 # For google adk compatibility, we need to define the agent directly
 
 # root_agent = Agent(
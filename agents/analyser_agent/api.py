@@ -4,22 +4,52 @@ This module defines the API endpoints for the Analyser Agent.
 """
 
 import os
-import ast
+import asyncio
 import logging
-import shutil
 import uuid
 from typing import Dict, Any, Optional, List
-from fastapi import APIRouter, Body, HTTPException, Form, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Body, HTTPException, Form, UploadFile, File, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 import json
 
-from .database import AnalysisDatabase
+from .database import get_database, LIST_COLUMNS, HEAVY_COLUMNS, build_filters
+from .export import EXPORT_MEDIA_TYPES, csv_chunks, ndjson_chunks
+from .jobs import JobManager, JobQueueFullError
+from .results import parse_analysis_result
+from .executor import executor_stats, run_blocking
+from .cache import ResultCache, CACHE_ENABLED, build_cache_key, hash_website, website_hash, normalize_url
+from .crawler import Crawler, CRAWL_MAX_PAGES, CRAWL_MAX_DEPTH
+from .hashing import hash_file
+from .uploads import StreamingUploadRoute, save_upload
+from .gemini_files import processing_stats, file_registry
+from .gemini_client import model_cache_stats
+from .event_capture import EVENT_CAPTURE
+from .progress import SSE_HEADERS, report_progress, stream_progress
+from .web_fetch import web_fetcher, provide_page_text
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Run the matching analysis pipeline directly instead of routing through the manager agent
+DIRECT_DISPATCH = os.getenv("ANALYSER_DIRECT_DISPATCH", "true").lower() in ("1", "true", "yes")
+
+# Default for the single-call structured pipelines (requires direct dispatch)
+STRUCTURED_ANALYSIS = os.getenv("ANALYSER_STRUCTURED_ANALYSIS", "false").lower() in ("1", "true", "yes")
+
+# Default for the map-reduce pipelines that analyse long videos and websites in parts (requires direct dispatch)
+CHUNKED_ANALYSIS = os.getenv("ANALYSER_CHUNKED_ANALYSIS", "false").lower() in ("1", "true", "yes")
+
+# Default for incremental website re-analysis (requires direct dispatch)
+INCREMENTAL_WEBSITES = os.getenv("ANALYSER_INCREMENTAL_WEBSITES", "false").lower() in ("1", "true", "yes")
+
+# Rows read from the database per chunk of a streaming export
+EXPORT_BATCH_SIZE = int(os.getenv("ANALYSER_EXPORT_BATCH_SIZE", 500))
+
+# Pages of a crawled site analysed at once
+CRAWL_ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSER_CRAWL_ANALYSIS_CONCURRENCY", 4))
+
 # Define response model
 class AnalysisResponse(BaseModel):
     """Standard response model for analysis results."""
@@ -38,10 +68,221 @@ def create_api_router(task_manager):
     Returns:
         An APIRouter instance with the defined endpoints
     """
-    router = APIRouter(prefix="/api/v1", tags=["analysis"])
+    router = APIRouter(prefix="/api/v1", tags=["analysis"], route_class=StreamingUploadRoute)
     
     # Initialize the database
-    db = AnalysisDatabase()
+    db = get_database()
+    
+    # Initialize the result cache
+    cache = ResultCache() if CACHE_ENABLED else None
+    
+    async def get_cache_key(payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Build the result cache key for a prepared analysis request.
+        
+        Args:
+            payload: The prepared request
+            
+        Returns:
+            The cache key, or None if the content could not be hashed
+        """
+        try:
+            if payload.get("content_hash"):
+                content_hash = payload["content_hash"]
+            elif payload.get("file_path"):
+                content_hash = await run_blocking(hash_file, payload["file_path"])
+            else:
+                content_hash = await hash_website(payload["url"])
+        except Exception as e:
+            logger.warning(f"Could not hash content for the result cache: {str(e)}")
+            return None
+        return build_cache_key(content_hash, payload.get("content_type"), payload.get("pipeline"), payload["context"].get("guidelines"))
+    
+    async def run_analysis(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a prepared analysis request through the task manager and store the result.
+        
+        Args:
+            payload: The prepared request (message, context, session_id, document_name,
+                document_type, file_path and url)
+            
+        Returns:
+            The analysis response as a dict
+        """
+        if payload.get("crawl"):
+            return await run_crawl_analysis(payload)
+        
+        message = payload["message"]
+        context = payload["context"]
+        session_id = payload.get("session_id")
+        file_path = payload.get("file_path")
+        url = payload.get("url")
+        
+        # Look up the result cache before running the pipeline
+        cache_key = await get_cache_key(payload) if cache and payload.get("use_cache", True) else None
+        result = await run_blocking(cache.get, cache_key) if cache_key else None
+        
+        if result:
+            logger.info(f"Result cache hit for key: {cache_key}")
+            report_progress("cache", status="hit")
+            result["data"]["cache"] = "hit"
+        else:
+            # Process the task
+            logger.info(f"Sending task to task manager: {message}")
+            logger.debug(f"Context: {context}")
+            result = await task_manager.process_task(message, context, session_id, pipeline=payload.get("pipeline"))
+            result["data"]["cache"] = "miss" if cache_key else "bypass"
+
+            logger.info("Task processing completed")
+        
+        if result.get("status") == "error":
+            raise RuntimeError(result.get("message", "Analysis failed"))
+        
+        # Use the structured output, falling back to parsing the final message
+        data, parse_error = parse_analysis_result(result, payload.get("pipeline"))
+        
+        # Cache successfully parsed results, without the raw event trace
+        if data is not None and cache_key and result["data"]["cache"] == "miss":
+            cached_result = {
+                "message": result.get("message"),
+                "status": result.get("status"),
+                "data": {key: value for key, value in result["data"].items() if key not in ("raw_events", "cache", "compaction")},
+            }
+            await run_blocking(cache.put, cache_key, cached_result)
+        
+        # Store the result in the database
+        try:
+
+            logger.info("Storing analysis result in database")
+            
+            # Generate a unique document ID if not provided
+            document_id = context.get("document_id", str(uuid.uuid4()))
+            
+            if data is None:
+                # Keep the analysis text for manual review rather than discarding it
+                logger.warning(f"Could not parse analysis result for document {document_id}: {parse_error}")
+                data = {"summary": result.get("message", ""), "score": 0.0}
+                status = "Needs Review"
+                result["data"]["parse_error"] = parse_error
+            elif float(data.get("score", 0.0)) > 70:
+                status = "Approved"
+                print(f"Document {document_id} approved with score: {data.get('score', 0.0)}")
+            else:
+                status = "Reject"
+                print(f"Document {document_id} rejected with score: {data.get('score', 0.0)}")
+            
+            logger.info(f"Extracted data: {data}")
+            
+            # Extract other fields from the result data
+            # These fields might need to be adjusted based on the actual structure of your result data
+            score = float(data.get("score", 0.0))
+            suggestions = data.get("suggestions", [])
+            conflicts = data.get("conflicts", [])
+            summary = data.get("summary", "")
+            guidelines_used = data.get("guidelines", [])
+            
+            # Store in database
+            await db.store_analysis_result_async(
+                document_id=document_id,
+                document_name=payload.get("document_name"),
+                status=status,
+                score=score,
+                document_type=payload.get("document_type") or "",
+                file_url=file_path or url or "",
+                suggestions=suggestions,
+                conflicts=conflicts,
+                guidelines=guidelines_used or "",
+                summary=summary
+            )
+            
+            logger.info(f"Analysis result stored in database with ID: {document_id}")
+            
+            # Keep the website's section fingerprints pointing at its latest parsed result,
+            # and never replay findings that could not be parsed
+            if payload.get("pipeline") == "website_incremental":
+                if parse_error is None:
+                    await db.link_website_fingerprint_async(normalize_url(url), document_id)
+                else:
+                    await db.delete_website_fingerprint_async(normalize_url(url))
+            
+            # Add document_id to the response data
+            result["data"]["document_id"] = document_id
+        except Exception as e:
+            logger.error(f"Error storing analysis result in database: {str(e)}")
+        
+        return AnalysisResponse(
+            message=result.get("message", "Analysis completed"),
+            status="success",
+            data=result.get("data", {}),
+            session_id=session_id
+        ).model_dump()
+    
+    async def run_crawl_analysis(payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Crawl a website and run each distinct page through the website pipeline.
+        
+        Pages are analysed as soon as the crawler yields them, from the text the crawler
+        extracted, and each page is cached and stored as its own analysis result. Each page
+        runs in a new session, since concurrent runs must not share one.
+        
+        Args:
+            payload: The prepared request, with the crawl limits under "crawl"
+            
+        Returns:
+            The crawl response as a dict, with one entry per analysed page
+        """
+        seed_url = payload["url"]
+        options = payload["crawl"]
+        crawler = Crawler(max_pages=options["max_pages"], max_depth=options["max_depth"])
+        semaphore = asyncio.Semaphore(CRAWL_ANALYSIS_CONCURRENCY)
+        
+        async def analyse_page(page) -> Dict[str, Any]:
+            context = {key: value for key, value in payload["context"].items() if key != "document_id"}
+            context["url"] = page.url
+            page_payload = {
+                **payload,
+                "crawl": None,
+                "url": page.url,
+                "message": payload["message"].replace(f"at URL: {seed_url}", f"at URL: {page.url}", 1),
+                "context": context,
+                "session_id": None,
+                "document_name": f"{payload.get('document_name') or seed_url} ({page.url})",
+                "content_hash": website_hash(page.url, page.content_hash),
+            }
+            entry = {"url": page.url, "depth": page.depth}
+            # Each page runs in its own task, so the text is only visible to this page's analysis
+            provide_page_text(page.url, page.text)
+            async with semaphore:
+                try:
+                    response = await run_analysis(page_payload)
+                except Exception as e:
+                    logger.error(f"Error analyzing crawled page {page.url}: {str(e)}")
+                    report_progress("page_analysed", url=page.url, depth=page.depth, status="error")
+                    return {**entry, "status": "error", "message": str(e)}
+            data = {key: value for key, value in response["data"].items() if key != "raw_events"}
+            report_progress("page_analysed", url=page.url, depth=page.depth, status=response["status"])
+            return {**entry, "status": response["status"], "message": response["message"], "data": data}
+        
+        tasks = []
+        async for page in crawler.crawl(seed_url):
+            logger.info(f"Crawled {page.url} (depth {page.depth}), queueing analysis")
+            tasks.append(asyncio.create_task(analyse_page(page)))
+        pages = await asyncio.gather(*tasks)
+        
+        if not pages:
+            raise RuntimeError(f"No pages could be crawled from {seed_url}")
+        
+        analysed = sum(1 for page in pages if page["status"] == "success")
+        return AnalysisResponse(
+            message=f"Analyzed {analysed} of {len(pages)} pages crawled from {seed_url}",
+            status="success",
+            data={"seed_url": seed_url, "pages_crawled": len(pages), "pages": pages},
+            session_id=payload.get("session_id")
+        ).model_dump()
+    
+    # Background workers for analyses submitted in job mode
+    job_manager = JobManager(handler=run_analysis)
+    router.add_event_handler("shutdown", job_manager.stop)
     
     @router.post("/analyze", response_model=AnalysisResponse)
     async def analyze_content(
@@ -51,6 +292,15 @@ def create_api_router(task_manager):
         url: Optional[str] = Form(None),
         document_type: Optional[str] = Form(None),
         guidelines: Optional[str] = Form(None),
+        async_mode: bool = Form(False),
+        stream: bool = Form(False),
+        structured: Optional[bool] = Form(None),
+        incremental: Optional[bool] = Form(None),
+        chunked: Optional[bool] = Form(None),
+        use_cache: bool = Form(True),
+        crawl: bool = Form(False),
+        max_pages: int = Form(CRAWL_MAX_PAGES, ge=1, le=500),
+        max_depth: int = Form(CRAWL_MAX_DEPTH, ge=0, le=10),
         file: Optional[UploadFile] = File(None)
     ):
         """
@@ -58,9 +308,18 @@ def create_api_router(task_manager):
         
         Args:
             request: The analysis request containing URL, file_path, guidelines, session_id, and context
+            async_mode: Queue the analysis as a background job and return its job ID immediately
+            stream: Stream the analysis's progress as server-sent events, ending with the result
+            structured: Use the single-call structured pipeline (defaults to ANALYSER_STRUCTURED_ANALYSIS)
+            incremental: Re-review only the changed sections of a website (defaults to ANALYSER_INCREMENTAL_WEBSITES)
+            chunked: Analyse long videos and websites in concurrent parts (defaults to ANALYSER_CHUNKED_ANALYSIS)
+            use_cache: Reuse a cached result for identical content, guidelines and prompt version
+            crawl: Crawl the website from the URL and analyse each distinct page
+            max_pages: Maximum pages fetched in crawl mode
+            max_depth: Maximum link depth from the URL in crawl mode
             
         Returns:
-            Analysis results
+            Analysis results, the queued job when async_mode is set, or an event stream when stream is set
         """
         logger.info("Starting content analysis request")
         try:
@@ -70,20 +329,18 @@ def create_api_router(task_manager):
             # Initialize file_path to None
             file_path = None
             
+            # Initialize the stored upload to None
+            upload = None
+            
             # Handle file upload if provided
             if file:
                 logger.info(f"File upload detected: {file.filename}")
-                # Create static directory if it doesn't exist
-                static_dir = os.path.join(os.getcwd(), "static")
-                os.makedirs(static_dir, exist_ok=True)
-                
-                # Save the file to the static directory
-                file_location = os.path.join(static_dir, file.filename)
-                with open(file_location, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
+                # Stream the file to the static directory, validating its type and size
+                upload = await save_upload(file)
                 
                 # Update file_path to point to the saved file
-                file_path = file_location
+                file_path = upload.path
+                file_registry.remember_hash(file_path, upload.sha256)
                 logger.info(f"File saved to: {file_path}")
             
             # Determine the type of content to analyze
@@ -98,6 +355,14 @@ def create_api_router(task_manager):
                 logger.warning("No inputs provided, raising exception")
                 raise HTTPException(status_code=400, detail="Must provide one input: URL or file path.")
             
+            if async_mode and stream:
+                logger.warning("Both async and stream mode requested, raising exception")
+                raise HTTPException(status_code=400, detail="Choose one of async_mode or stream.")
+            
+            if crawl and not url:
+                logger.warning("Crawl mode requested without a URL, raising exception")
+                raise HTTPException(status_code=400, detail="Crawl mode requires a website URL.")
+            
             # Process inputs
             if file_path:
                 logger.info(f"Processing file from path: {file_path}")
@@ -106,33 +371,28 @@ def create_api_router(task_manager):
                     logger.warning(f"File not found at path: {file_path}")
                     raise HTTPException(status_code=400, detail=f"File not found at path: {file_path}")
                 
-                # Determine if it's a video or image based on file extension
-                file_ext = os.path.splitext(file_path)[1].lower()
-                video_extensions = ['.mp4', '.mov', '.avi', '.wmv', '.flv', '.mkv']
-                image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']
-                
                 # Add file path to context
                 context["file_path"] = file_path
                 
-                if file_ext in video_extensions:
+                # Determine if it's a video or image from the detected content type
+                if upload.kind == "video":
                     # It's a video
                     message = "Analyze this video ad" + f" in file path: {file_path}"
-                    logger.info(f"Detected video file with extension: {file_ext}")
-                elif file_ext in image_extensions:
+                    pipeline = "video"
+                    logger.info(f"Detected video file with type: {upload.mime_type}")
+                else:
                     # It's an image
                     # Assume it's an Instagram post
                     message = "Analyze this Instagram post" + f" in file path: {file_path}"
-                    logger.info(f"Detected image file with extension: {file_ext}")
-                else:
-                    # Unsupported file type
-                    logger.error(f"Unsupported file type: {file_ext}")
-                    raise HTTPException(status_code=400, detail=f"Unsupported file type: {file_ext}")
+                    pipeline = "image"
+                    logger.info(f"Detected image file with type: {upload.mime_type}")
 
             else:
                 # It's a website
                 logger.info(f"Processing website URL: {url}")
                 context["url"] = url
                 message = "Analyze this website" + f" at URL: {url}"
+                pipeline = "website"
 
             
             # Add guidelines to context if provided
@@ -140,70 +400,72 @@ def create_api_router(task_manager):
                 context["guidelines"] = guidelines
                 message += f" with guidelines: {guidelines}"
             
-            # Process the task
-            logger.info(f"Sending task to task manager: {message}")
-            logger.debug(f"Context: {context}")
-            result = await task_manager.process_task(message, context, session_id)
-
-            ast_result = ast.literal_eval(result.get("message", "{}"))
-
-            logger.info("Task processing completed")
+            content_type = pipeline
             
-            # Store the result in the database
-            try:
-
-                logger.info("Storing analysis result in database")
-                # Extract data from the result
-                data = ast_result
-                
-                logger.info(f"Extracted data: {data}")
-
-                # Generate a unique document ID if not provided
-                document_id = context.get("document_id", str(uuid.uuid4()))
-                
-                if float(data.get("score", 0.0)) > 70:
-                    status = "Approved"
-                    print(f"Document {document_id} approved with score: {data.get('score', 0.0)}")
-                else:
-                    status = "Reject"
-                    print(f"Document {document_id} rejected with score: {data.get('score', 0.0)}")
-                
-                # Extract other fields from the result data
-                # These fields might need to be adjusted based on the actual structure of your result data
-                score = float(data.get("score", 0.0))
-                suggestions = data.get("suggestions", [])
-                conflicts = data.get("conflicts", [])
-                summary = data.get("summary", "")
-                guidelines_used = data.get("guidelines", [])
+            # Use the single-call structured variant of the pipeline if requested
+            if structured is None:
+                structured = STRUCTURED_ANALYSIS
+            if incremental is None:
+                incremental = INCREMENTAL_WEBSITES
+            if chunked is None:
+                chunked = CHUNKED_ANALYSIS
+            if incremental and pipeline == "website":
+                pipeline = "website_incremental"
+            elif chunked and pipeline in ("video", "website"):
+                pipeline = f"{pipeline}_chunked"
+            elif structured:
+                pipeline = f"{pipeline}_structured"
+            
+            payload = {
+                "message": message,
+                "context": context,
+                "session_id": session_id,
+                "document_name": document_name,
+                "document_type": document_type,
+                "file_path": file_path,
+                "url": url,
+                "pipeline": pipeline if DIRECT_DISPATCH else None,
+                "content_type": content_type,
+                "content_hash": upload.sha256 if upload else None,
+                "use_cache": use_cache,
+                "crawl": {"max_pages": max_pages, "max_depth": max_depth} if crawl else None,
+            }
+            
+            if async_mode:
+                # Queue the analysis and return the job ID straight away
+                try:
+                    job = await job_manager.submit(payload)
+                except JobQueueFullError as e:
+                    logger.warning(str(e))
+                    raise HTTPException(status_code=503, detail=str(e))
                 
-                # Store in database
-                db.store_analysis_result(
-                    document_id=document_id,
-                    document_name=document_name,
-                    status=status,
-                    score=score,
-                    document_type=document_type or "",
-                    file_url=file_path or url or "",
-                    suggestions=suggestions,
-                    conflicts=conflicts,
-                    guidelines=guidelines_used or "",
-                    summary=summary
+                logger.info(f"Returning queued job response: {job['job_id']}")
+                return AnalysisResponse(
+                    message="Analysis job queued",
+                    status=job["status"],
+                    data={"job_id": job["job_id"], "status_url": f"{router.prefix}/jobs/{job['job_id']}"},
+                    session_id=session_id
                 )
-                
-                logger.info(f"Analysis result stored in database with ID: {document_id}")
-                
-                # Add document_id to the response data
-                result["data"]["document_id"] = document_id
-            except Exception as e:
-                logger.error(f"Error storing analysis result in database: {str(e)}")
+            
+            if stream:
+                # Send stage events as they happen; a client that disconnects cancels the analysis
+                logger.info("Returning streamed analysis response")
+                started = {"pipeline": pipeline, "content_type": content_type, "session_id": session_id}
+                if upload:
+                    started["upload"] = {"bytes": upload.size, "mime_type": upload.mime_type}
+                return StreamingResponse(
+                    stream_progress(lambda: run_analysis(payload), started=started),
+                    media_type="text/event-stream",
+                    headers=SSE_HEADERS,
+                )
+            
+            response = await run_analysis(payload)
             
             logger.info("Returning analysis response")
-            return AnalysisResponse(
-                message=result.get("message", "Analysis completed"),
-                status="success",
-                data=result.get("data", {}),
-                session_id=session_id
-            )
+            return AnalysisResponse(**response)
+        except HTTPException:
+            # Rejected requests (bad input, unsupported or oversized files, full queue) keep their status code
+            raise
         except Exception as e:
             logger.error(f"Error analyzing content: {str(e)}", exc_info=True)
             
@@ -215,6 +477,36 @@ def create_api_router(task_manager):
                 session_id=session_id
             )
     
+    @router.get("/jobs/{job_id}", response_model=Dict[str, Any])
+    async def get_job(job_id: str, wait: float = Query(0, ge=0, le=60)):
+        """
+        Get the status and result of an analysis job.
+        
+        Args:
+            job_id: The job ID returned by /analyze in async mode
+            wait: Seconds to wait for the job to finish before responding (long polling)
+            
+        Returns:
+            The job record, including the analysis response once completed
+        """
+        logger.info(f"Retrieving analysis job: {job_id}")
+        job = await job_manager.wait_for_job(job_id, wait)
+        
+        if job:
+            return job
+        else:
+            raise HTTPException(status_code=404, detail=f"Analysis job not found: {job_id}")
+    
+    @router.get("/jobs", response_model=Dict[str, Any])
+    async def get_job_stats():
+        """
+        Get job queue statistics.
+        
+        Returns:
+            Worker count, queue depth and job counts by state
+        """
+        return await job_manager.stats()
+    
     @router.get("/health", response_model=Dict[str, str])
     async def health_check():
         """
@@ -226,6 +518,89 @@ def create_api_router(task_manager):
         logger.info("Health check requested")
         return {"status": "healthy"}
     
+    @router.get("/stats", response_model=Dict[str, Any])
+    async def get_stats():
+        """
+        Get runtime statistics for tuning.
+        
+        Returns:
+            Job queue, thread pool, Gemini file processing, website fetch and session store statistics
+        """
+        return {
+            "jobs": await job_manager.stats(),
+            "executor": executor_stats(),
+            "gemini_file_processing": processing_stats.snapshot(),
+            "gemini_file_handles": file_registry.stats(),
+            "gemini_models": model_cache_stats(),
+            "web_fetch": web_fetcher.stats(),
+            "sessions": task_manager.session_service.stats(),
+            "session_compaction": task_manager.compaction_stats.snapshot(),
+            "event_capture": {
+                "mode": EVENT_CAPTURE,
+                "sink": task_manager.event_sink.stats() if task_manager.event_sink else None,
+            },
+            "result_cache": await run_blocking(cache.stats) if cache else None,
+        }
+    
+    @router.get("/analysis/export")
+    async def export_analyses(
+        format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+        status: Optional[str] = Query(None),
+        document_type: Optional[str] = Query(None),
+        min_score: Optional[float] = Query(None),
+        max_score: Optional[float] = Query(None),
+        uploaded_after: Optional[str] = Query(None),
+        uploaded_before: Optional[str] = Query(None),
+        include_summary: bool = Query(True)
+    ):
+        """
+        Stream every matching analysis result as NDJSON or CSV.
+        
+        Rows are read and serialized in batches while the response is sent, so memory
+        use does not grow with the size of the table.
+        
+        Args:
+            format: Export format, ndjson or csv
+            status: Only results with this status
+            document_type: Only results of this document type
+            min_score: Only results scoring at least this
+            max_score: Only results scoring at most this
+            uploaded_after: Only results uploaded at or after this ISO 8601 date/time
+            uploaded_before: Only results uploaded before this ISO 8601 date/time
+            include_summary: Set to false to leave out the summary column
+            
+        Returns:
+            A streaming NDJSON or CSV download
+        """
+        filters = {
+            "status": status,
+            "document_type": document_type,
+            "min_score": min_score,
+            "max_score": max_score,
+            "uploaded_after": uploaded_after,
+            "uploaded_before": uploaded_before,
+        }
+        logger.info(f"Exporting analysis results as {format}")
+        
+        # Validate the filters before the response starts
+        try:
+            build_filters(**filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        batches = db.iter_analysis_results(batch_size=EXPORT_BATCH_SIZE, include_summary=include_summary, **filters)
+        if format == "csv":
+            columns = [column for column in LIST_COLUMNS if include_summary or column not in HEAVY_COLUMNS]
+            chunks = csv_chunks(batches, columns)
+        else:
+            chunks = ndjson_chunks(batches)
+        
+        return StreamingResponse(
+            chunks,
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="analysis_results.{format}"'},
+        )
+    
     @router.get("/analysis/{document_id}", response_model=Dict[str, Any])
     async def get_analysis(document_id: str):
         """
@@ -238,7 +613,7 @@ def create_api_router(task_manager):
             Analysis result
         """
         logger.info(f"Retrieving analysis result for document ID: {document_id}")
-        result = db.get_analysis_result(document_id)
+        result = await db.get_analysis_result_async(document_id)
         
         if result:
             return result
@@ -246,17 +621,123 @@ def create_api_router(task_manager):
             raise HTTPException(status_code=404, detail=f"Analysis result not found for document ID: {document_id}")
     
     @router.get("/analysis", response_model=List[Dict[str, Any]])
-    async def get_all_analyses():
+    async def get_all_analyses(
+        response: Response,
+        limit: int = Query(100, ge=1, le=1000),
+        cursor: Optional[str] = Query(None),
+        status: Optional[str] = Query(None),
+        document_type: Optional[str] = Query(None),
+        min_score: Optional[float] = Query(None),
+        max_score: Optional[float] = Query(None),
+        uploaded_after: Optional[str] = Query(None),
+        uploaded_before: Optional[str] = Query(None),
+        include_summary: bool = Query(True)
+    ):
         """
-        Get all analysis results.
+        Get analysis results, newest first, one page at a time.
         
+        Args:
+            limit: Maximum number of results per page
+            cursor: The X-Next-Cursor header of the previous page
+            status: Only results with this status
+            document_type: Only results of this document type
+            min_score: Only results scoring at least this
+            max_score: Only results scoring at most this
+            uploaded_after: Only results uploaded at or after this ISO 8601 date/time
+            uploaded_before: Only results uploaded before this ISO 8601 date/time
+            include_summary: Set to false to leave out the summary column
+            
         Returns:
-            List of all analysis results
+            List of analysis results; the X-Next-Cursor header is set when more pages exist
         """
-        logger.info("Retrieving all analysis results")
-        results = db.get_all_analysis_results()
+        logger.info(f"Retrieving analysis results (limit={limit}, cursor={cursor})")
+        try:
+            results, next_cursor = await db.list_analysis_results_async(
+                limit=limit,
+                cursor=cursor,
+                include_summary=include_summary,
+                status=status,
+                document_type=document_type,
+                min_score=min_score,
+                max_score=max_score,
+                uploaded_after=uploaded_after,
+                uploaded_before=uploaded_before,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return results
     
+    @router.get("/search", response_model=List[Dict[str, Any]])
+    async def search_analyses(
+        q: str = Query(..., min_length=1),
+        limit: int = Query(20, ge=1, le=200),
+        raw_query: bool = Query(False),
+        status: Optional[str] = Query(None),
+        document_type: Optional[str] = Query(None),
+        min_score: Optional[float] = Query(None),
+        max_score: Optional[float] = Query(None),
+        uploaded_after: Optional[str] = Query(None),
+        uploaded_before: Optional[str] = Query(None)
+    ):
+        """
+        Full-text search over document names, summaries, conflicts and suggestions.
+        
+        Args:
+            q: Search text; every word must match and "quoted text" matches as a phrase
+            limit: Maximum number of results
+            raw_query: Treat q as an FTS5 query expression (OR, NOT, NEAR, prefix*)
+            status: Only results with this status
+            document_type: Only results of this document type
+            min_score: Only results scoring at least this
+            max_score: Only results scoring at most this
+            uploaded_after: Only results uploaded at or after this ISO 8601 date/time
+            uploaded_before: Only results uploaded before this ISO 8601 date/time
+            
+        Returns:
+            Matching results, best first, with their rank and a highlighted snippet
+        """
+        logger.info(f"Searching analysis results for: {q}")
+        try:
+            return await db.search_analysis_results_async(
+                q,
+                limit=limit,
+                raw_query=raw_query,
+                status=status,
+                document_type=document_type,
+                min_score=min_score,
+                max_score=max_score,
+                uploaded_after=uploaded_after,
+                uploaded_before=uploaded_before,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    @router.get("/analytics", response_model=Dict[str, Any])
+    async def get_analytics(
+        start_day: Optional[str] = Query(None),
+        end_day: Optional[str] = Query(None),
+        document_type: Optional[str] = Query(None)
+    ):
+        """
+        Get approval rates and score statistics from the precomputed daily rollups.
+        
+        Args:
+            start_day: First day to include (YYYY-MM-DD)
+            end_day: Last day to include (YYYY-MM-DD)
+            document_type: Only this document type
+            
+        Returns:
+            Overall, per document type and daily counts, approval rate, mean and percentile scores
+        """
+        logger.info(f"Retrieving analytics ({start_day} to {end_day}, document_type={document_type})")
+        try:
+            return await db.get_analytics_async(start_day=start_day, end_day=end_day, document_type=document_type)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     @router.delete("/analysis/{document_id}", response_model=Dict[str, Any])
     async def delete_analysis(document_id: str):
         """
@@ -269,7 +750,7 @@ def create_api_router(task_manager):
             Status of the operation
         """
         logger.info(f"Deleting analysis result for document ID: {document_id}")
-        success = db.delete_analysis_result(document_id)
+        success = await db.delete_analysis_result_async(document_id)
         
         if success:
             return {"status": "success", "message": f"Analysis result deleted for document ID: {document_id}"}
@@ -285,7 +766,7 @@ def create_api_router(task_manager):
             Status of the operation
         """
         logger.info("Resetting database")
-        success = db.reset_database()
+        success = await db.reset_database_async()
         
         if success:
             return {"status": "success", "message": "Database reset successfully"}
@@ -0,0 +1,289 @@
+"""
+Result cache for the Analyser Agent.
+This module caches analysis results keyed by the analysed content, the effective
+guidelines and the prompt/model version, so resubmitted creatives skip Gemini entirely.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from .database import DB_FILE, connect_database
+from .gemini_client import GEMINI_MODEL
+from .hashing import hash_file
+from .subagents.ad_video_analyser_agent.video_act_agent.prompt import VIDEO_GUIDELINES
+from .subagents.instapost_analyser_agent.insta_act_agent.prompt import INSTA_GUIDELINES
+from .subagents.website_analyser_agent.website_act_agent.prompt import WEBSITE_GUIDELINES
+from .subagents.website_analyser_agent.website_act_agent.tools import fetch_website_text
+from .web_fetch import provide_page_text
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cache database file, stored next to the analysis results database
+CACHE_DB_FILE = os.path.join(os.path.dirname(DB_FILE), "analysis_cache.db")
+
+# Cache configuration
+CACHE_ENABLED = os.getenv("ANALYSER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_TTL_SECONDS = int(os.getenv("ANALYSER_CACHE_TTL", 7 * 24 * 3600))
+CACHE_MAX_ENTRIES = int(os.getenv("ANALYSER_CACHE_MAX_ENTRIES", 10000))
+
+# Bump when prompts or output schemas change so stale results are not reused
+PROMPT_VERSION = os.getenv("ANALYSER_PROMPT_VERSION", "1")
+MODEL_VERSION = GEMINI_MODEL.split("/")[-1]
+
+# Built-in guidelines applied by each pipeline, keyed by content type
+PIPELINE_GUIDELINES = {
+    "video": VIDEO_GUIDELINES,
+    "image": INSTA_GUIDELINES,
+    "website": WEBSITE_GUIDELINES,
+}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL so equivalent spellings share a cache entry.
+
+    Lowercases the scheme and host, defaults to http://, drops the fragment,
+    sorts query parameters and strips a trailing slash from the path.
+
+    Args:
+        url: The URL to normalize
+
+    Returns:
+        The normalized URL
+    """
+    url = url.strip()
+    if not url.startswith(("http://", "https://")):
+        url = "http://" + url
+    parts = urlsplit(url)
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+async def hash_website(url: str) -> str:
+    """
+    Hash a website by its normalized URL and the current text of the page.
+
+    The page is fetched through the shared HTTP cache, so an unchanged page only
+    costs a conditional request. Its text is then provided to the current task,
+    so the analysis pipeline run on a cache miss does not fetch the page again.
+
+    Args:
+        url: The website URL
+
+    Returns:
+        The hex digest
+    """
+    # Hash the full text, as the crawler does; the pipeline cuts it to its own token budget
+    text = await fetch_website_text(url, max_tokens=0)
+    provide_page_text(url, text)
+    page_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return website_hash(url, page_hash)
+
+
+def website_hash(url: str, page_hash: str) -> str:
+    """
+    Combine a website's normalized URL with the hash of its page text.
+
+    Args:
+        url: The website URL
+        page_hash: SHA-256 hex digest of the page text
+
+    Returns:
+        The hex digest
+    """
+    return hashlib.sha256(f"{normalize_url(url)}\n{page_hash}".encode("utf-8")).hexdigest()
+
+
+def build_cache_key(content_hash: str, content_type: str, pipeline: Optional[str], guidelines: Optional[str] = None) -> str:
+    """
+    Build the cache key for an analysis.
+
+    Args:
+        content_hash: Hash of the analysed content (file bytes or normalized URL and page text)
+        content_type: The detected content type (video, image or website)
+        pipeline: The pipeline that runs the analysis (e.g. video or website_structured)
+        guidelines: Per-request guidelines, if any
+
+    Returns:
+        The hex cache key
+    """
+    key_material = {
+        "content": content_hash,
+        "pipeline": pipeline or "routed",
+        "guidelines": [PIPELINE_GUIDELINES.get(content_type, ""), guidelines or ""],
+        "prompt_version": PROMPT_VERSION,
+        "model": MODEL_VERSION,
+    }
+    return hashlib.sha256(json.dumps(key_material, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    SQLite-backed analysis result cache with TTL and LRU size bounds.
+
+    Like the analysis database, it keeps one long-lived connection per thread, so the
+    pool threads that serve lookups do not reconnect on every call.
+    """
+
+    def __init__(self,
+                 db_path: str = CACHE_DB_FILE,
+                 ttl: int = CACHE_TTL_SECONDS,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: Path to the cache database file
+            ttl: Seconds an entry stays valid
+            max_entries: Maximum number of entries before the least recently used are evicted
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.metrics = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0}
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._ensure_db_exists()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening and tuning it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect_database(self.db_path)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close all connections."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+    def _ensure_db_exists(self):
+        """Create the cache table if it doesn't exist."""
+        conn = None
+        try:
+            conn = self._connection()
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS result_cache (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT,       -- JSON task manager result
+                created_at REAL,
+                last_access REAL,
+                hits INTEGER DEFAULT 0
+            )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_result_cache_last_access ON result_cache (last_access)')
+            conn.commit()
+            logger.info(f"Result cache initialized at {self.db_path}")
+        except sqlite3.Error as e:
+            logger.error(f"Result cache initialization error: {str(e)}")
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Args:
+            cache_key: The cache key
+
+        Returns:
+            The cached result or None on a miss
+        """
+        conn = None
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT result, created_at FROM result_cache WHERE cache_key = ?', (cache_key,)).fetchone()
+
+            now = time.time()
+            if row and now - row[1] > self.ttl:
+                conn.execute('DELETE FROM result_cache WHERE cache_key = ?', (cache_key,))
+                conn.commit()
+                self.metrics["expirations"] += 1
+                row = None
+
+            if not row:
+                self.metrics["misses"] += 1
+                return None
+
+            conn.execute('UPDATE result_cache SET last_access = ?, hits = hits + 1 WHERE cache_key = ?', (now, cache_key))
+            conn.commit()
+            self.metrics["hits"] += 1
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            logger.error(f"Error reading result cache: {str(e)}")
+            if conn:
+                conn.rollback()
+            self.metrics["misses"] += 1
+            return None
+
+    def put(self, cache_key: str, result: Dict[str, Any]) -> bool:
+        """
+        Store a result, evicting expired and least recently used entries as needed.
+
+        Args:
+            cache_key: The cache key
+            result: The result to cache (must be JSON serializable)
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = None
+        try:
+            conn = self._connection()
+            now = time.time()
+            conn.execute('''
+            INSERT OR REPLACE INTO result_cache (cache_key, result, created_at, last_access, hits)
+            VALUES (?, ?, ?, ?, 0)
+            ''', (cache_key, json.dumps(result), now, now))
+
+            expired = conn.execute('DELETE FROM result_cache WHERE created_at < ?', (now - self.ttl,)).rowcount
+            self.metrics["expirations"] += expired
+
+            excess = conn.execute('SELECT COUNT(*) FROM result_cache').fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute('''
+                DELETE FROM result_cache WHERE cache_key IN (
+                    SELECT cache_key FROM result_cache ORDER BY last_access ASC LIMIT ?
+                )
+                ''', (excess,))
+                self.metrics["evictions"] += excess
+
+            conn.commit()
+            self.metrics["stores"] += 1
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error writing result cache: {str(e)}")
+            if conn:
+                conn.rollback()
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss metrics and the number of cached entries."""
+        entries = None
+        try:
+            entries = self._connection().execute('SELECT COUNT(*) FROM result_cache').fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error reading result cache stats: {str(e)}")
+
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": round(self.metrics["hits"] / lookups, 3) if lookups else None,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+        }
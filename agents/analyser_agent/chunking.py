@@ -0,0 +1,248 @@
+"""
+Map-reduce analysis for the Analyser Agent.
+This module splits long page text or long videos into segments, analyses the segments
+concurrently with bounded parallelism, and merges the segment results into one
+AgentOutput, so latency follows the slowest segment rather than the total size.
+"""
+
+import os
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .html_extract import CHARS_PER_TOKEN, HEADING
+from .progress import report_progress
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Chunking configuration
+CHUNK_TOKENS = int(os.getenv("ANALYSER_CHUNK_TOKENS", 4000))
+CHUNK_CONCURRENCY = int(os.getenv("ANALYSER_CHUNK_CONCURRENCY", 4))
+CHUNK_MAX_SEGMENTS = int(os.getenv("ANALYSER_CHUNK_MAX_SEGMENTS", 16))
+VIDEO_SEGMENT_SECONDS = float(os.getenv("ANALYSER_VIDEO_SEGMENT_SECONDS", 60))
+
+
+@dataclass
+class Segment:
+    """One part of the content, analysed on its own."""
+    index: int
+    label: str
+    content: Any
+    weight: float
+
+
+def _pack(blocks: List[str], max_chars: int) -> List[str]:
+    """Greedily pack blocks into chunks of at most max_chars, keeping block order."""
+    chunks, current, size = [], [], 0
+    for block in blocks:
+        if current and size + len(block) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(block)
+        size += len(block) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def split_text(text: str, max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """
+    Split page text into chunks within a token budget, breaking at headings where possible.
+
+    Sections longer than the budget are split between lines, and lines longer than the
+    budget are split between characters.
+
+    Args:
+        text: Page text, with headings as Markdown
+        max_tokens: Approximate token budget per chunk
+
+    Returns:
+        The chunks in page order
+    """
+    max_chars = max(1, max_tokens) * CHARS_PER_TOKEN
+
+    sections, current = [], []
+    for line in text.splitlines():
+        if HEADING.match(line) and current:
+            sections.append(current)
+            current = []
+        if line.strip():
+            current.append(line)
+    if current:
+        sections.append(current)
+
+    blocks = []
+    for lines in sections:
+        section = "\n".join(lines)
+        if len(section) <= max_chars:
+            blocks.append(section)
+            continue
+        pieces = [line[start:start + max_chars] for line in lines for start in range(0, len(line), max_chars)]
+        blocks.extend(_pack(pieces, max_chars))
+    return _pack(blocks, max_chars)
+
+
+def text_segments(text: str, max_tokens: int = CHUNK_TOKENS, max_segments: int = CHUNK_MAX_SEGMENTS) -> List[Segment]:
+    """
+    Split page text into segments weighted by their length.
+
+    If the text needs more than max_segments chunks, the chunk size grows so that it fits.
+
+    Args:
+        text: Page text, with headings as Markdown
+        max_tokens: Approximate token budget per segment
+        max_segments: Maximum number of segments
+
+    Returns:
+        The segments in page order
+    """
+    chunks = split_text(text, max_tokens) or [text]
+    while len(chunks) > max_segments:
+        max_tokens = int(max_tokens * len(chunks) / max_segments) + 1
+        chunks = split_text(text, max_tokens)
+    return [
+        Segment(index=i, label=f"part {i + 1} of {len(chunks)}", content=chunk, weight=len(chunk))
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def _timestamp(seconds: float) -> str:
+    """Format seconds as M:SS."""
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def time_segments(duration: float, segment_seconds: float = VIDEO_SEGMENT_SECONDS, max_segments: int = CHUNK_MAX_SEGMENTS) -> List[Segment]:
+    """
+    Split a video's duration into time ranges weighted by their length.
+
+    If the video needs more than max_segments ranges, the ranges grow so that it fits.
+
+    Args:
+        duration: Video duration in seconds
+        segment_seconds: Length of each range
+        max_segments: Maximum number of ranges
+
+    Returns:
+        Segments whose content is a (start, end) tuple in seconds
+    """
+    segment_seconds = max(segment_seconds, duration / max(1, max_segments), 1)
+    segments, start = [], 0.0
+    while start < duration:
+        end = min(duration, start + segment_seconds)
+        if duration - end < segment_seconds / 4:
+            # Fold a short remainder into the last range
+            end = duration
+        segments.append(Segment(index=len(segments), label=f"{_timestamp(start)}-{_timestamp(end)}", content=(start, end), weight=end - start))
+        start = end
+    return segments
+
+
+async def map_segments(segments: List[Segment],
+                       analyse: Callable[[Segment], Awaitable[Dict[str, Any]]],
+                       concurrency: int = CHUNK_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    Analyse segments concurrently with bounded parallelism.
+
+    Args:
+        segments: The segments to analyse
+        analyse: Coroutine function returning an AgentOutput dict for one segment
+        concurrency: Maximum segments analysed at once
+
+    Returns:
+        The segment outputs, in segment order
+
+    Raises:
+        Exception: The first segment failure, after the other segments are cancelled
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(segment: Segment) -> Dict[str, Any]:
+        async with semaphore:
+            logger.info(f"Analysing segment {segment.label}")
+            report_progress("segment_started", segment=segment.label, total=len(segments))
+            output = await analyse(segment)
+            report_progress("segment_finished", segment=segment.label, total=len(segments))
+            return output
+
+    tasks = [asyncio.create_task(run(segment)) for segment in segments]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def unique_findings(items: List[str]) -> List[str]:
+    """Drop repeated findings, keeping the first occurrence."""
+    return list(dict.fromkeys(items))
+
+
+def reduce_outputs(segments: List[Segment],
+                   outputs: List[Dict[str, Any]],
+                   summary_field: str = "summary",
+                   label_findings: bool = False) -> Dict[str, Any]:
+    """
+    Merge segment outputs into one AgentOutput dict.
+
+    Conflicts, suggestions and guidelines are concatenated without duplicates, the
+    summaries are joined in segment order, and the score is the mean of the segment
+    scores weighted by segment size.
+
+    Args:
+        segments: The analysed segments
+        outputs: The AgentOutput dict of each segment, in the same order
+        summary_field: Name of the summary field in the output schema (e.g. video_summary)
+        label_findings: Prefix each conflict and suggestion with its segment label
+
+    Returns:
+        The merged AgentOutput dict
+    """
+    if len(outputs) == 1:
+        return outputs[0]
+
+    def findings(field: str) -> List[str]:
+        return unique_findings([
+            f"[{segment.label}] {item}" if label_findings else item
+            for segment, output in zip(segments, outputs)
+            for item in output.get(field) or []
+        ])
+
+    total_weight = sum(segment.weight for segment in segments) or len(segments)
+    score = sum(float(output.get("score") or 0) * (segment.weight or 1) for segment, output in zip(segments, outputs)) / total_weight
+
+    return {
+        "conflicts": findings("conflicts"),
+        "suggestions": findings("suggestions"),
+        summary_field: "\n".join(f"[{segment.label}] {output.get(summary_field, '')}" for segment, output in zip(segments, outputs)),
+        "score": round(score),
+        "guidelines": unique_findings([item for output in outputs for item in output.get("guidelines") or []]),
+    }
+
+
+def segment_prompt(prompt: str, segment: Segment, total: int, description: Optional[str] = None) -> str:
+    """
+    Add segment instructions to an analysis prompt.
+
+    Args:
+        prompt: The single-call analysis prompt
+        segment: The segment being analysed
+        total: Number of segments
+        description: What the segment covers, if not just its label
+
+    Returns:
+        The prompt for this segment
+    """
+    if total == 1:
+        return prompt
+    return (
+        prompt
+        + f"\n\nThe content is analysed in {total} parts. You are analysing {description or segment.label}."
+        + " Report only what appears in this part; the results of all parts are merged afterwards."
+        + " Score this part on its own."
+    )
@@ -0,0 +1,277 @@
+"""
+Session history compaction for the Analyser Agent.
+This module keeps the prompt size of long-lived sessions flat: the last turns of a
+session are kept verbatim, while older tool outputs and long messages are replaced
+with short previews, and the oldest turns are dropped once the session exceeds its
+token limit. Every later run then replays the compacted history instead of the full one.
+"""
+
+import os
+import json
+import logging
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.genai import types
+
+from .html_extract import CHARS_PER_TOKEN
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Compaction configuration
+COMPACTION_ENABLED = os.getenv("ANALYSER_SESSION_COMPACTION", "true").lower() in ("1", "true", "yes")
+COMPACTION_KEEP_TURNS = int(os.getenv("ANALYSER_COMPACTION_KEEP_TURNS", 2))
+COMPACTION_PREVIEW_TOKENS = int(os.getenv("ANALYSER_COMPACTION_PREVIEW_TOKENS", 100))
+SESSION_MAX_TOKENS = int(os.getenv("ANALYSER_SESSION_MAX_TOKENS", 16000))
+
+
+@dataclass
+class CompactionResult:
+    """The compacted events of a session and what compaction saved."""
+    events: List[Event]
+    tokens_before: int
+    tokens_after: int
+    events_compacted: int = 0
+    events_dropped: int = 0
+    turns: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def report(self) -> Dict[str, int]:
+        """Summarize the compaction for responses and logs."""
+        return {
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "tokens_saved": self.tokens_saved,
+            "events_compacted": self.events_compacted,
+            "events_dropped": self.events_dropped,
+            "turns": self.turns,
+        }
+
+
+@dataclass
+class CompactionStats:
+    """Running totals of session compaction, reported by /stats."""
+    sessions_compacted: int = 0
+    tokens_saved: int = 0
+    events_compacted: int = 0
+    events_dropped: int = 0
+    errors: int = 0
+
+    def add(self, result: CompactionResult):
+        self.sessions_compacted += 1
+        self.tokens_saved += result.tokens_saved
+        self.events_compacted += result.events_compacted
+        self.events_dropped += result.events_dropped
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "enabled": COMPACTION_ENABLED,
+            "keep_turns": COMPACTION_KEEP_TURNS,
+            "max_tokens": SESSION_MAX_TOKENS,
+            **self.__dict__,
+        }
+
+
+def _part_chars(part: types.Part) -> int:
+    """Approximate prompt characters of a content part."""
+    if part.text:
+        return len(part.text)
+    if part.function_call:
+        return len(json.dumps(part.function_call.args or {}, default=str))
+    if part.function_response:
+        return len(json.dumps(part.function_response.response or {}, default=str))
+    if part.inline_data and part.inline_data.data:
+        return len(part.inline_data.data)
+    return 0
+
+
+def event_tokens(event: Event) -> int:
+    """Approximate prompt tokens an event adds to every later run of its session."""
+    if not event.content or not event.content.parts:
+        return 0
+    return sum(_part_chars(part) for part in event.content.parts) // CHARS_PER_TOKEN
+
+
+def _preview(text: str, preview_tokens: int) -> str:
+    """Shorten text to a preview that says how much was left out."""
+    keep = preview_tokens * CHARS_PER_TOKEN
+    omitted = (len(text) - keep) // CHARS_PER_TOKEN
+    return f"{text[:keep].rstrip()} [... {omitted} tokens compacted ...]"
+
+
+def _compact_part(part: types.Part, preview_tokens: int) -> types.Part:
+    """Replace a long part with a preview, keeping function call and response IDs paired."""
+    # Only parts well over the preview size are worth rewriting
+    if _part_chars(part) <= 2 * preview_tokens * CHARS_PER_TOKEN:
+        return part
+    if part.text:
+        return types.Part(text=_preview(part.text, preview_tokens), thought=part.thought)
+    if part.function_call:
+        args = json.dumps(part.function_call.args or {}, default=str)
+        return types.Part(function_call=types.FunctionCall(
+            id=part.function_call.id,
+            name=part.function_call.name,
+            args={"compacted": _preview(args, preview_tokens)},
+        ))
+    if part.function_response:
+        response = json.dumps(part.function_response.response or {}, default=str)
+        return types.Part(function_response=types.FunctionResponse(
+            id=part.function_response.id,
+            name=part.function_response.name,
+            response={"compacted": _preview(response, preview_tokens)},
+        ))
+    if part.inline_data:
+        return types.Part(text=f"[{part.inline_data.mime_type or 'inline'} attachment of {len(part.inline_data.data)} bytes compacted]")
+    return part
+
+
+def compact_event(event: Event, preview_tokens: int = COMPACTION_PREVIEW_TOKENS) -> Event:
+    """
+    Compact the long parts of an event.
+
+    Args:
+        event: The event to compact
+        preview_tokens: Approximate tokens kept from each compacted part
+
+    Returns:
+        The event itself if nothing was compacted, otherwise a compacted copy
+    """
+    if not event.content or not event.content.parts:
+        return event
+    parts = [_compact_part(part, preview_tokens) for part in event.content.parts]
+    if all(new is old for new, old in zip(parts, event.content.parts)):
+        return event
+    compacted = event.model_copy(deep=True)
+    compacted.content = types.Content(role=event.content.role, parts=parts)
+    return compacted
+
+
+def split_turns(events: List[Event]) -> List[List[Event]]:
+    """
+    Group session events into turns, each starting at a user message.
+
+    Events before the first user message form the first turn.
+
+    Args:
+        events: The session's events in order
+
+    Returns:
+        The turns in order
+    """
+    turns: List[List[Event]] = []
+    for event in events:
+        starts_turn = event.author == "user" and event.content is not None and bool(event.content.parts)
+        if starts_turn or not turns:
+            turns.append([])
+        turns[-1].append(event)
+    return turns
+
+
+def compact_events(events: List[Event],
+                   keep_turns: int = COMPACTION_KEEP_TURNS,
+                   preview_tokens: int = COMPACTION_PREVIEW_TOKENS,
+                   max_tokens: int = SESSION_MAX_TOKENS) -> CompactionResult:
+    """
+    Compact a session's history.
+
+    The last keep_turns turns are kept verbatim. Long parts of older turns are replaced
+    with previews, and if the history still exceeds max_tokens the oldest turns are
+    dropped; the turns kept verbatim are never dropped.
+
+    Args:
+        events: The session's events in order
+        keep_turns: Number of most recent turns kept verbatim
+        preview_tokens: Approximate tokens kept from each compacted part
+        max_tokens: Token limit for the whole history (0 for no limit)
+
+    Returns:
+        The compacted events and token counts
+    """
+    tokens_before = sum(event_tokens(event) for event in events)
+    turns = split_turns(events)
+    old_turns, recent_turns = turns[:max(0, len(turns) - keep_turns)], turns[max(0, len(turns) - keep_turns):]
+
+    compacted_turns: List[List[Event]] = []
+    events_compacted = 0
+    for turn in old_turns:
+        compacted_turn = []
+        for event in turn:
+            compacted = compact_event(event, preview_tokens)
+            events_compacted += compacted is not event
+            compacted_turn.append(compacted)
+        compacted_turns.append(compacted_turn)
+
+    recent_tokens = sum(event_tokens(event) for turn in recent_turns for event in turn)
+    turn_tokens = [sum(event_tokens(event) for event in turn) for turn in compacted_turns]
+    events_dropped = 0
+    while compacted_turns and max_tokens > 0 and recent_tokens + sum(turn_tokens) > max_tokens:
+        events_dropped += len(compacted_turns.pop(0))
+        turn_tokens.pop(0)
+
+    kept = [event for turn in compacted_turns + recent_turns for event in turn]
+    return CompactionResult(
+        events=kept,
+        tokens_before=tokens_before,
+        tokens_after=sum(event_tokens(event) for event in kept),
+        events_compacted=events_compacted,
+        events_dropped=events_dropped,
+        turns=len(turns),
+    )
+
+
+async def replace_session_events(session_service: BaseSessionService, session: Session, events: List[Event]) -> Optional[Session]:
+    """
+    Replace a session's events in its session store, keeping its state.
+
+    The store swaps the events atomically and refuses if the session changed since it
+    was read, so a concurrent run never loses events. Stores without an atomic swap are
+    left untouched.
+
+    Args:
+        session_service: The session service holding the session
+        session: The session as last read from the service
+        events: The events the session should hold
+
+    Returns:
+        The rewritten session, or None if the session was left as it was
+    """
+    replace_events = getattr(session_service, "replace_events", None)
+    if replace_events is None:
+        logger.info(f"Session store {type(session_service).__name__} cannot replace events atomically, not compacting")
+        return None
+    return await replace_events(session, events)
+
+
+async def compact_session(session_service: BaseSessionService, session: Session) -> Tuple[Session, CompactionResult]:
+    """
+    Compact a session's history in its session store if that saves any tokens.
+
+    Args:
+        session_service: The session service holding the session
+        session: The session as last read from the service
+
+    Returns:
+        The session (rewritten if it was compacted) and the compaction result, which
+        saves no tokens if the session could not be rewritten
+    """
+    result = compact_events(session.events)
+    if result.tokens_saved <= 0:
+        return session, result
+    logger.info(
+        f"Compacting session {session.id}: {result.tokens_before} -> {result.tokens_after} tokens "
+        f"({result.events_compacted} events compacted, {result.events_dropped} dropped)"
+    )
+    compacted = await replace_session_events(session_service, session, result.events)
+    if compacted is None:
+        # Another run wrote the session first (or the store cannot swap events): run uncompacted
+        session = await session_service.get_session(app_name=session.app_name, user_id=session.user_id, session_id=session.id) or session
+        return session, replace(result, events=session.events, tokens_after=result.tokens_before,
+                                events_compacted=0, events_dropped=0)
+    return compacted, result
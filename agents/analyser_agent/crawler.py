@@ -0,0 +1,300 @@
+"""
+Website crawler for the Analyser Agent.
+This module crawls a site from a seed URL, discovering pages from its sitemap and from
+same-origin links, and yields each distinct page for analysis as soon as it is fetched.
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from .cache import normalize_url
+from .executor import run_blocking
+from .html_extract import extract_page
+from .web_fetch import FETCH_USER_AGENT, FetchError, WebFetcher, normalize_fetch_url, web_fetcher
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Crawl configuration
+CRAWL_MAX_PAGES = int(os.getenv("WEB_CRAWL_MAX_PAGES", 20))
+CRAWL_MAX_DEPTH = int(os.getenv("WEB_CRAWL_MAX_DEPTH", 2))
+CRAWL_CONCURRENCY = int(os.getenv("WEB_CRAWL_CONCURRENCY", 4))
+CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("WEB_CRAWL_PER_HOST_CONCURRENCY", 2))
+CRAWL_DELAY = float(os.getenv("WEB_CRAWL_DELAY", 0.25))
+CRAWL_RESPECT_ROBOTS = os.getenv("WEB_CRAWL_RESPECT_ROBOTS", "true").lower() in ("1", "true", "yes")
+CRAWL_USE_SITEMAP = os.getenv("WEB_CRAWL_USE_SITEMAP", "true").lower() in ("1", "true", "yes")
+
+# Nested sitemaps followed from a sitemap index
+MAX_SITEMAPS = 10
+
+# Links to files that are never analysable pages
+SKIPPED_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".pdf", ".zip", ".gz",
+    ".mp4", ".mov", ".webm", ".mp3", ".css", ".js", ".json", ".xml", ".woff", ".woff2",
+)
+
+
+@dataclass
+class CrawledPage:
+    """A distinct page found by the crawler."""
+    url: str
+    depth: int
+    text: str
+    content_hash: str
+    from_cache: bool = False
+
+
+def origin(url: str) -> Tuple[str, str]:
+    """Return the (scheme, host) origin of a URL."""
+    parts = urlsplit(url)
+    return parts.scheme.lower(), parts.netloc.lower()
+
+
+def parse_sitemap(content: bytes) -> Tuple[List[str], List[str]]:
+    """
+    Parse a sitemap or sitemap index.
+
+    Args:
+        content: The sitemap XML
+
+    Returns:
+        The page URLs and the nested sitemap URLs it lists
+    """
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as e:
+        logger.warning(f"Could not parse sitemap: {str(e)}")
+        return [], []
+    locs = [element.text.strip() for element in root.iter() if element.tag.endswith("loc") and element.text]
+    if root.tag.endswith("sitemapindex"):
+        return [], locs
+    return locs, []
+
+
+class HostLimiter:
+    """Per-host politeness: caps concurrent requests and spaces out request starts."""
+
+    def __init__(self, concurrency: int = CRAWL_PER_HOST_CONCURRENCY, delay: float = CRAWL_DELAY):
+        """
+        Initialize the limiter.
+
+        Args:
+            concurrency: Maximum in-flight requests per host
+            delay: Minimum seconds between the starts of two requests to the same host
+        """
+        self.concurrency = max(1, concurrency)
+        self.delay = delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+        self._delays: Dict[str, float] = {}
+
+    def set_delay(self, host: str, delay: float):
+        """Use a longer delay for a host, e.g. its robots.txt Crawl-delay."""
+        self._delays[host] = max(self.delay, delay)
+
+    async def fetch(self, fetcher: WebFetcher, url: str):
+        """Fetch a URL once the host's concurrency and delay limits allow it."""
+        host = urlsplit(url).netloc.lower()
+        semaphore = self._semaphores.setdefault(host, asyncio.Semaphore(self.concurrency))
+        async with semaphore:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self._delays.get(host, self.delay)
+            if start > now:
+                await asyncio.sleep(start - now)
+            return await fetcher.fetch(url)
+
+
+class Crawler:
+    """Same-origin crawler with a depth limit, a page budget and robots.txt handling."""
+
+    def __init__(self,
+                 fetcher: WebFetcher = web_fetcher,
+                 max_pages: int = CRAWL_MAX_PAGES,
+                 max_depth: int = CRAWL_MAX_DEPTH,
+                 concurrency: int = CRAWL_CONCURRENCY,
+                 per_host_concurrency: int = CRAWL_PER_HOST_CONCURRENCY,
+                 delay: float = CRAWL_DELAY,
+                 respect_robots: bool = CRAWL_RESPECT_ROBOTS,
+                 use_sitemap: bool = CRAWL_USE_SITEMAP):
+        """
+        Initialize the crawler.
+
+        Args:
+            fetcher: Fetcher used for pages, robots.txt and sitemaps
+            max_pages: Maximum number of pages fetched per crawl
+            max_depth: Maximum link distance from the seed (the seed is depth 0, sitemap pages depth 1)
+            concurrency: Number of pages fetched at once
+            per_host_concurrency: Maximum in-flight requests per host
+            delay: Minimum seconds between request starts to the same host
+            respect_robots: Skip URLs disallowed by robots.txt and honour its Crawl-delay
+            use_sitemap: Seed the crawl with the URLs from the site's sitemap
+        """
+        self.fetcher = fetcher
+        self.max_pages = max(1, max_pages)
+        self.max_depth = max(0, max_depth)
+        self.concurrency = max(1, concurrency)
+        self.per_host_concurrency = per_host_concurrency
+        self.delay = delay
+        self.respect_robots = respect_robots
+        self.use_sitemap = use_sitemap
+
+    async def _load_robots(self, limiter: HostLimiter, scheme: str, host: str) -> Optional[RobotFileParser]:
+        """Fetch and parse robots.txt; a missing or unreadable file allows everything."""
+        robots_url = f"{scheme}://{host}/robots.txt"
+        try:
+            page = await limiter.fetch(self.fetcher, robots_url)
+        except (httpx.HTTPError, FetchError) as e:
+            logger.info(f"No usable robots.txt at {robots_url}: {str(e)}")
+            return None
+        robots = RobotFileParser(robots_url)
+        robots.parse(page.text.splitlines())
+        crawl_delay = robots.crawl_delay(FETCH_USER_AGENT)
+        if crawl_delay:
+            limiter.set_delay(host, float(crawl_delay))
+        return robots
+
+    async def _sitemap_urls(self, limiter: HostLimiter, sitemaps: List[str]) -> List[str]:
+        """Collect page URLs from sitemaps, following a bounded number of nested sitemap indexes."""
+        pending, seen, urls = list(sitemaps), set(), []
+        while pending and len(seen) < MAX_SITEMAPS and len(urls) < self.max_pages:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            try:
+                page = await limiter.fetch(self.fetcher, sitemap_url)
+            except (httpx.HTTPError, FetchError) as e:
+                logger.info(f"Could not fetch sitemap {sitemap_url}: {str(e)}")
+                continue
+            page_urls, nested = await run_blocking(parse_sitemap, page.content)
+            urls.extend(page_urls)
+            pending.extend(nested)
+        return urls
+
+    async def crawl(self, seed_url: str) -> AsyncIterator[CrawledPage]:
+        """
+        Crawl a site, yielding each page whose content has not been seen yet.
+
+        Args:
+            seed_url: The URL to start from
+
+        Yields:
+            Pages in the order they finish fetching, deduplicated by URL and content hash
+        """
+        seed_url = normalize_fetch_url(seed_url)
+        limiter = HostLimiter(self.per_host_concurrency, self.delay)
+        origins: Set[Tuple[str, str]] = {origin(seed_url)}
+        robots: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        frontier: asyncio.Queue = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue()
+        seen_urls: Set[str] = set()
+        seen_hashes: Set[str] = set()
+        scheduled = 0
+
+        async def allowed(url: str) -> bool:
+            if not self.respect_robots:
+                return True
+            key = origin(url)
+            if key not in robots:
+                # Concurrent workers share one robots.txt fetch per origin
+                robots[key] = asyncio.create_task(self._load_robots(limiter, *key))
+            parser = await robots[key]
+            return parser is None or parser.can_fetch(FETCH_USER_AGENT, url)
+
+        def schedule(url: str, depth: int):
+            nonlocal scheduled
+            if scheduled >= self.max_pages or depth > self.max_depth:
+                return
+            if origin(url) not in origins or urlsplit(url).path.lower().endswith(SKIPPED_EXTENSIONS):
+                return
+            key = normalize_url(url)
+            if key in seen_urls:
+                return
+            seen_urls.add(key)
+            scheduled += 1
+            frontier.put_nowait((url, depth))
+
+        async def visit(url: str, depth: int):
+            if not await allowed(url):
+                logger.info(f"Skipping {url}: disallowed by robots.txt")
+                return
+            try:
+                page = await limiter.fetch(self.fetcher, url)
+            except (httpx.HTTPError, FetchError) as e:
+                logger.warning(f"Could not crawl {url}: {str(e)}")
+                return
+
+            if depth == 0:
+                # Follow the seed's redirects (e.g. http -> https, bare domain -> www)
+                origins.add(origin(page.final_url))
+            if page.content_type and "html" not in page.content_type.lower():
+                logger.debug(f"Skipping {url}: not HTML ({page.content_type})")
+                return
+
+            # Keep the full text; the pipeline cuts it to its own token budget
+            text, links = await run_blocking(extract_page, page.text, page.final_url, 0)
+            content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            if content_hash in seen_hashes:
+                logger.debug(f"Skipping {url}: same content as an earlier page")
+                return
+            seen_hashes.add(content_hash)
+
+            for link in links:
+                schedule(link, depth + 1)
+            await results.put(CrawledPage(url=page.final_url, depth=depth, text=text, content_hash=content_hash, from_cache=page.from_cache))
+
+        async def worker():
+            while True:
+                url, depth = await frontier.get()
+                try:
+                    await visit(url, depth)
+                except Exception as e:
+                    logger.error(f"Error crawling {url}: {str(e)}", exc_info=True)
+                finally:
+                    frontier.task_done()
+
+        logger.info(f"Crawling {seed_url} (max {self.max_pages} pages, depth {self.max_depth})")
+        schedule(seed_url, 0)
+
+        if self.use_sitemap and self.max_depth >= 1:
+            seed_origin = origin(seed_url)
+            sitemaps = [f"{seed_origin[0]}://{seed_origin[1]}/sitemap.xml"]
+            if self.respect_robots and await allowed(seed_url) and robots[seed_origin].result():
+                sitemaps = robots[seed_origin].result().site_maps() or sitemaps
+            for url in await self._sitemap_urls(limiter, sitemaps):
+                schedule(url, 1)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        done = asyncio.create_task(frontier.join())
+        try:
+            while True:
+                getter = asyncio.create_task(results.get())
+                finished, _ = await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+                if getter in finished:
+                    yield getter.result()
+                    continue
+                getter.cancel()
+                # Drain pages that were queued just before the frontier emptied
+                while not results.empty():
+                    yield results.get_nowait()
+                break
+        finally:
+            done.cancel()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, done, return_exceptions=True)
+
+        logger.info(f"Crawl of {seed_url} finished: {len(seen_hashes)} distinct pages from {scheduled} URLs")
@@ -4,11 +4,17 @@ This module handles SQLite database operations for storing analysis results.
 """
 
 import os
+import re
 import json
+import base64
+import asyncio
 import sqlite3
 import logging
 import datetime
-from typing import Dict, Any, List, Optional, Union
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,18 +23,431 @@ logger = logging.getLogger(__name__)
 # Database file path
 DB_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "analysis_results.db")
 
+# Connection configuration
+DB_READERS = int(os.getenv("ANALYSER_DB_READERS", 4))
+DB_CACHE_KB = int(os.getenv("ANALYSER_DB_CACHE_KB", 16384))
+DB_STATEMENT_CACHE = int(os.getenv("ANALYSER_DB_STATEMENT_CACHE", 128))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("ANALYSER_DB_BUSY_TIMEOUT_MS", 5000))
+
+
+def connect_database(db_path: str) -> sqlite3.Connection:
+    """
+    Open a long-lived SQLite connection tuned for concurrent readers and one writer.
+
+    Args:
+        db_path: Path to the database file
+
+    Returns:
+        The connection, usable from any thread
+    """
+    conn = sqlite3.connect(db_path, cached_statements=DB_STATEMENT_CACHE, check_same_thread=False)
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{DB_CACHE_KB}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    return conn
+
+
+def _on_writer(method):
+    """Run the decorated write method on the database's writer thread."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._write(method, self, *args, **kwargs)
+    return wrapper
+
+
+# Columns returned by listings, and the heavy ones that can be left out
+LIST_COLUMNS = ("document_id", "document_name", "upload_time", "status", "score", "document_type",
+                "file_url", "suggestions", "conflicts", "guidelines", "summary")
+HEAVY_COLUMNS = ("summary",)
+
+# Indexes supporting the newest-first listing and its filters
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_analysis_results_upload_time ON analysis_results (upload_time, document_id)",
+    "CREATE INDEX IF NOT EXISTS idx_analysis_results_status ON analysis_results (status, upload_time, document_id)",
+    "CREATE INDEX IF NOT EXISTS idx_analysis_results_document_type ON analysis_results (document_type, upload_time, document_id)",
+    "CREATE INDEX IF NOT EXISTS idx_analysis_results_score ON analysis_results (score)",
+)
+
+
+# Full-text index over the searchable columns, kept in sync with analysis_results by triggers.
+# Rows are matched on document_id, not rowid, since a VACUUM may renumber analysis_results rowids.
+SEARCH_COLUMNS = ("document_id", "document_name", "summary", "conflicts", "suggestions")
+
+# Relative bm25 weight of each search column (document_id is not indexed)
+SEARCH_WEIGHTS = (0.0, 2.0, 1.0, 3.0, 3.0)
+
+# JSON list columns are indexed as their joined items rather than raw JSON
+_SEARCH_VALUES = """
+    new.document_id, new.document_name, new.summary,
+    CASE WHEN json_valid(new.conflicts) THEN (SELECT group_concat(value, ' | ') FROM json_each(new.conflicts)) ELSE new.conflicts END,
+    CASE WHEN json_valid(new.suggestions) THEN (SELECT group_concat(value, ' | ') FROM json_each(new.suggestions)) ELSE new.suggestions END
+"""
+
+SEARCH_SCHEMA = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS analysis_results_fts USING fts5(
+        document_id UNINDEXED, document_name, summary, conflicts, suggestions,
+        tokenize = 'porter unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS analysis_results_fts_insert AFTER INSERT ON analysis_results BEGIN
+        INSERT INTO analysis_results_fts ({", ".join(SEARCH_COLUMNS)}) VALUES ({_SEARCH_VALUES});
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS analysis_results_fts_delete AFTER DELETE ON analysis_results BEGIN
+        DELETE FROM analysis_results_fts WHERE document_id = old.document_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS analysis_results_fts_update
+    AFTER UPDATE OF document_id, document_name, summary, conflicts, suggestions ON analysis_results BEGIN
+        DELETE FROM analysis_results_fts WHERE document_id = old.document_id;
+        INSERT INTO analysis_results_fts ({", ".join(SEARCH_COLUMNS)}) VALUES ({_SEARCH_VALUES});
+    END
+    """,
+)
+
+
+def _create_search_index(cursor: sqlite3.Cursor):
+    """Create the full-text index and its triggers, backfilling it from existing rows if it is new."""
+    # Indexes built by rowid-keyed triggers may already be out of sync after a VACUUM: rebuild them
+    legacy = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'analysis_results_fts_%' AND sql LIKE '%old.rowid%'"
+    ).fetchone()
+    if legacy:
+        logger.info("Rebuilding the search index with triggers keyed on document_id")
+        for trigger in ("analysis_results_fts_insert", "analysis_results_fts_delete", "analysis_results_fts_update"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute("DROP TABLE IF EXISTS analysis_results_fts")
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analysis_results_fts'"
+    ).fetchone()
+    for statement in SEARCH_SCHEMA:
+        cursor.execute(statement)
+    if not exists:
+        cursor.execute(f'''
+        INSERT INTO analysis_results_fts ({", ".join(SEARCH_COLUMNS)})
+        SELECT {_SEARCH_VALUES.replace("new.", "")} FROM analysis_results
+        ''')
+        if cursor.rowcount > 0:
+            logger.info(f"Indexed {cursor.rowcount} existing analysis results for search")
+
+
+# Daily rollups per document type, kept up to date by triggers so analytics never scan analysis_results.
+# Scores are also counted in one-point buckets (0-100) for percentiles.
+_ROLLUP_ADD = """
+    INSERT INTO analysis_daily_rollups (day, document_type, total, approved, rejected, needs_review, score_sum)
+    VALUES (date(new.upload_time), coalesce(new.document_type, ''), 1,
+            coalesce(new.status = 'Approved', 0), coalesce(new.status = 'Reject', 0),
+            coalesce(new.status NOT IN ('Approved', 'Reject'), 1),
+            coalesce(new.score, 0))
+    ON CONFLICT (day, document_type) DO UPDATE SET
+        total = total + 1,
+        approved = approved + excluded.approved,
+        rejected = rejected + excluded.rejected,
+        needs_review = needs_review + excluded.needs_review,
+        score_sum = score_sum + excluded.score_sum;
+    INSERT INTO analysis_score_histogram (day, document_type, bucket, count)
+    VALUES (date(new.upload_time), coalesce(new.document_type, ''), CAST(min(max(coalesce(new.score, 0), 0), 100) AS INTEGER), 1)
+    ON CONFLICT (day, document_type, bucket) DO UPDATE SET count = count + 1;
+"""
+
+_ROLLUP_REMOVE = """
+    UPDATE analysis_daily_rollups SET
+        total = total - 1,
+        approved = approved - coalesce(old.status = 'Approved', 0),
+        rejected = rejected - coalesce(old.status = 'Reject', 0),
+        needs_review = needs_review - coalesce(old.status NOT IN ('Approved', 'Reject'), 1),
+        score_sum = score_sum - coalesce(old.score, 0)
+    WHERE day = date(old.upload_time) AND document_type = coalesce(old.document_type, '');
+    DELETE FROM analysis_daily_rollups
+    WHERE day = date(old.upload_time) AND document_type = coalesce(old.document_type, '') AND total <= 0;
+    UPDATE analysis_score_histogram SET count = count - 1
+    WHERE day = date(old.upload_time) AND document_type = coalesce(old.document_type, '')
+      AND bucket = CAST(min(max(coalesce(old.score, 0), 0), 100) AS INTEGER);
+    DELETE FROM analysis_score_histogram
+    WHERE day = date(old.upload_time) AND document_type = coalesce(old.document_type, '') AND count <= 0;
+"""
+
+ROLLUP_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS analysis_daily_rollups (
+        day TEXT,
+        document_type TEXT,
+        total INTEGER,
+        approved INTEGER,
+        rejected INTEGER,
+        needs_review INTEGER,
+        score_sum REAL,
+        PRIMARY KEY (day, document_type)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS analysis_score_histogram (
+        day TEXT,
+        document_type TEXT,
+        bucket INTEGER,  -- Score rounded down to a whole point
+        count INTEGER,
+        PRIMARY KEY (day, document_type, bucket)
+    )
+    """,
+    f"CREATE TRIGGER IF NOT EXISTS analysis_rollups_insert AFTER INSERT ON analysis_results BEGIN {_ROLLUP_ADD} END",
+    f"CREATE TRIGGER IF NOT EXISTS analysis_rollups_delete AFTER DELETE ON analysis_results BEGIN {_ROLLUP_REMOVE} END",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS analysis_rollups_update
+    AFTER UPDATE OF upload_time, status, score, document_type ON analysis_results BEGIN {_ROLLUP_REMOVE} {_ROLLUP_ADD} END
+    """,
+)
+
+# Percentiles reported by get_analytics
+ANALYTICS_PERCENTILES = (25, 50, 75, 90)
+
+# Per-section content fingerprints of analysed websites, used for incremental re-analysis
+FINGERPRINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS website_fingerprints (
+    url TEXT PRIMARY KEY,   -- Normalized URL
+    context_key TEXT,       -- Guidelines, prompt and model the findings were produced with
+    document_id TEXT,       -- Latest analysis_results row for the URL
+    page_hash TEXT,
+    sections TEXT,          -- JSON array of {heading, fingerprint, conflicts, suggestions}
+    result TEXT,            -- JSON analysis output and page-level findings
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def _create_rollups(cursor: sqlite3.Cursor):
+    """Create the rollup tables and triggers, filling them from existing rows if they are new."""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analysis_daily_rollups'"
+    ).fetchone()
+    for statement in ROLLUP_SCHEMA:
+        cursor.execute(statement)
+    if not exists:
+        _fill_rollups(cursor)
+
+
+def _fill_rollups(cursor: sqlite3.Cursor):
+    """Recompute the rollup tables from analysis_results."""
+    cursor.execute('DELETE FROM analysis_daily_rollups')
+    cursor.execute('DELETE FROM analysis_score_histogram')
+    cursor.execute('''
+    INSERT INTO analysis_daily_rollups (day, document_type, total, approved, rejected, needs_review, score_sum)
+    SELECT date(upload_time), coalesce(document_type, ''), COUNT(*),
+           SUM(coalesce(status = 'Approved', 0)), SUM(coalesce(status = 'Reject', 0)),
+           SUM(coalesce(status NOT IN ('Approved', 'Reject'), 1)),
+           SUM(coalesce(score, 0))
+    FROM analysis_results GROUP BY 1, 2
+    ''')
+    cursor.execute('''
+    INSERT INTO analysis_score_histogram (day, document_type, bucket, count)
+    SELECT date(upload_time), coalesce(document_type, ''), CAST(min(max(coalesce(score, 0), 0), 100) AS INTEGER), COUNT(*)
+    FROM analysis_results GROUP BY 1, 2, 3
+    ''')
+
+
+def _summarize(total: int, approved: int, rejected: int, needs_review: int, score_sum: float, histogram: Dict[int, int]) -> Dict[str, Any]:
+    """Build the analytics metrics for one group from its counts and score histogram."""
+    summary = {
+        "total": total,
+        "approved": approved,
+        "rejected": rejected,
+        "needs_review": needs_review,
+        "approval_rate": round(approved / total, 4) if total else None,
+        "mean_score": round(score_sum / total, 2) if total else None,
+    }
+    buckets = sorted(histogram.items())
+    for percentile in ANALYTICS_PERCENTILES:
+        value, seen = None, 0
+        for bucket, count in buckets:
+            seen += count
+            if seen >= percentile / 100 * total:
+                value = bucket
+                break
+        summary[f"p{percentile}_score"] = value
+    return summary
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn plain search text into an FTS5 query.
+    
+    Each word must match; text in double quotes must match as a phrase.
+    
+    Args:
+        text: The search text, e.g. black box "guaranteed results"
+        
+    Returns:
+        The FTS5 query expression
+        
+    Raises:
+        ValueError: If the text contains no search terms
+    """
+    terms = [phrase or word for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text)]
+    terms = [term.replace('"', '""') for term in terms if term.strip()]
+    if not terms:
+        raise ValueError("Search query is empty")
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def normalize_timestamp(value: str) -> str:
+    """
+    Convert an ISO 8601 date or datetime into the format upload_time is stored in (UTC).
+    
+    Args:
+        value: Date or datetime such as 2025-06-20 or 2025-06-20T14:00:00+02:00
+        
+    Returns:
+        The timestamp as YYYY-MM-DD HH:MM:SS
+        
+    Raises:
+        ValueError: If the value is not a valid ISO 8601 date or datetime
+    """
+    parsed = datetime.datetime.fromisoformat(value.strip())
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def encode_cursor(upload_time: str, document_id: str) -> str:
+    """Encode the position of a row as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(json.dumps([upload_time, document_id]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a pagination cursor into the (upload_time, document_id) it points after.
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        upload_time, document_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return str(upload_time), str(document_id)
+
+
+def build_filters(status: Optional[str] = None,
+                  document_type: Optional[str] = None,
+                  min_score: Optional[float] = None,
+                  max_score: Optional[float] = None,
+                  uploaded_after: Optional[str] = None,
+                  uploaded_before: Optional[str] = None) -> Tuple[List[str], List[Any]]:
+    """
+    Build WHERE conditions for filtering analysis results.
+    
+    Args:
+        status: Only results with this status
+        document_type: Only results of this document type
+        min_score: Only results scoring at least this
+        max_score: Only results scoring at most this
+        uploaded_after: Only results uploaded at or after this ISO 8601 date/time
+        uploaded_before: Only results uploaded before this ISO 8601 date/time
+        
+    Returns:
+        Tuple of (list of SQL conditions, list of parameters)
+        
+    Raises:
+        ValueError: If a date/time is not valid ISO 8601
+    """
+    conditions, params = [], []
+    if status is not None:
+        conditions.append("status = ?")
+        params.append(status)
+    if document_type is not None:
+        conditions.append("document_type = ?")
+        params.append(document_type)
+    if min_score is not None:
+        conditions.append("score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        conditions.append("score <= ?")
+        params.append(max_score)
+    if uploaded_after is not None:
+        conditions.append("upload_time >= ?")
+        params.append(normalize_timestamp(uploaded_after))
+    if uploaded_before is not None:
+        conditions.append("upload_time < ?")
+        params.append(normalize_timestamp(uploaded_before))
+    return conditions, params
+
+
+def _row_to_result(row: sqlite3.Row) -> Dict[str, Any]:
+    """Convert a row to a dict, parsing the JSON list columns."""
+    result = dict(row)
+    for key in ("suggestions", "conflicts", "guidelines"):
+        if result.get(key) is not None:
+            result[key] = json.loads(result[key])
+    return result
+
+
 class AnalysisDatabase:
-    """Database handler for analysis results."""
+    """
+    Database handler for analysis results.
     
-    def __init__(self, db_path: str = DB_FILE):
-        """Initialize the database connection."""
+    Connections are long-lived: all writes go through one dedicated writer thread,
+    and reads use per-thread connections on a small reader pool. Every method has
+    an *_async variant that runs on those threads so callers never block the event loop.
+    """
+    
+    def __init__(self, db_path: str = DB_FILE, readers: int = DB_READERS):
+        """
+        Initialize the database connections.
+        
+        Args:
+            db_path: Path to the database file
+            readers: Number of reader threads used by the async methods
+        """
         self.db_path = db_path
-        self._ensure_db_exists()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis-db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=max(1, readers), thread_name_prefix="analysis-db-reader")
+        self._write(self._ensure_db_exists)
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening and tuning it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect_database(self.db_path)
+            conn.row_factory = sqlite3.Row  # This enables column access by name
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _write(self, func, *args, **kwargs):
+        """Run a write on the writer thread and wait for its result."""
+        return self._writer.submit(func, *args, **kwargs).result()
+    
+    async def _write_async(self, func, *args, **kwargs):
+        """Run a write on the writer thread without blocking the event loop."""
+        return await asyncio.wrap_future(self._writer.submit(func, *args, **kwargs))
+    
+    async def _read_async(self, func, *args, **kwargs):
+        """Run a read on the reader pool without blocking the event loop."""
+        return await asyncio.wrap_future(self._readers.submit(func, *args, **kwargs))
+    
+    def close(self):
+        """Stop the worker threads and close all connections."""
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
     
     def _ensure_db_exists(self):
         """Create the database and tables if they don't exist."""
+        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connection()
             cursor = conn.cursor()
             
             # Create the analysis_results table
@@ -48,14 +467,24 @@ class AnalysisDatabase:
             )
             ''')
             
+            for index in INDEXES:
+                cursor.execute(index)
+            
+            # Create the full-text search index
+            _create_search_index(cursor)
+            
+            # Create the analytics rollups
+            _create_rollups(cursor)
+            
+            # Create the website fingerprints table
+            cursor.execute(FINGERPRINT_SCHEMA)
+            
             conn.commit()
             logger.info(f"Database initialized at {self.db_path}")
         except sqlite3.Error as e:
             logger.error(f"Database initialization error: {str(e)}")
-        finally:
-            if conn:
-                conn.close()
     
+    @_on_writer
     def store_analysis_result(self, 
                              document_id: str,
                              document_name: str,
@@ -85,8 +514,9 @@ class AnalysisDatabase:
         Returns:
             bool: True if successful, False otherwise
         """
+        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connection()
             cursor = conn.cursor()
             
             # Convert lists to JSON strings
@@ -94,10 +524,22 @@ class AnalysisDatabase:
             conflicts_json = json.dumps(conflicts)
             guidelines_json = json.dumps(guidelines)
             
+            # Upsert rather than INSERT OR REPLACE so the search index triggers see an update
             cursor.execute('''
-            INSERT OR REPLACE INTO analysis_results 
+            INSERT INTO analysis_results 
             (document_id, document_name, upload_time, status, score, document_type, file_url, suggestions, conflicts, guidelines, summary)
             VALUES (?, ?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (document_id) DO UPDATE SET
+                document_name = excluded.document_name,
+                upload_time = excluded.upload_time,
+                status = excluded.status,
+                score = excluded.score,
+                document_type = excluded.document_type,
+                file_url = excluded.file_url,
+                suggestions = excluded.suggestions,
+                conflicts = excluded.conflicts,
+                guidelines = excluded.guidelines,
+                summary = excluded.summary
             ''', (document_id, document_name, status, score, document_type, file_url, suggestions_json, conflicts_json, guidelines_json, summary))
             
             conn.commit()
@@ -105,10 +547,9 @@ class AnalysisDatabase:
             return True
         except sqlite3.Error as e:
             logger.error(f"Error storing analysis result: {str(e)}")
-            return False
-        finally:
             if conn:
-                conn.close()
+                conn.rollback()
+            return False
     
     def get_analysis_result(self, document_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -120,29 +561,22 @@ class AnalysisDatabase:
         Returns:
             Dict containing the analysis result or None if not found
         """
+        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row  # This enables column access by name
+            conn = self._connection()
             cursor = conn.cursor()
             
             cursor.execute('SELECT * FROM analysis_results WHERE document_id = ?', (document_id,))
             row = cursor.fetchone()
             
             if row:
-                result = dict(row)
                 # Parse JSON strings back to lists
-                result['suggestions'] = json.loads(result['suggestions'])
-                result['conflicts'] = json.loads(result['conflicts'])
-                result['guidelines'] = json.loads(result['guidelines'])
-                return result
+                return _row_to_result(row)
             else:
                 return None
         except sqlite3.Error as e:
             logger.error(f"Error retrieving analysis result: {str(e)}")
             return None
-        finally:
-            if conn:
-                conn.close()
     
     def get_all_analysis_results(self) -> List[Dict[str, Any]]:
         """
@@ -151,31 +585,292 @@ class AnalysisDatabase:
         Returns:
             List of dictionaries containing all analysis results
         """
+        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            conn = self._connection()
             cursor = conn.cursor()
             
-            cursor.execute('SELECT * FROM analysis_results ORDER BY upload_time DESC')
+            cursor.execute('SELECT * FROM analysis_results ORDER BY upload_time DESC, document_id DESC')
             rows = cursor.fetchall()
             
-            results = []
-            for row in rows:
-                result = dict(row)
-                # Parse JSON strings back to lists
-                result['suggestions'] = json.loads(result['suggestions'])
-                result['conflicts'] = json.loads(result['conflicts'])
-                result['guidelines'] = json.loads(result['guidelines'])
-                results.append(result)
-            
-            return results
+            # Parse JSON strings back to lists
+            return [_row_to_result(row) for row in rows]
         except sqlite3.Error as e:
             logger.error(f"Error retrieving all analysis results: {str(e)}")
             return []
+    
+    def list_analysis_results(self,
+                              limit: int = 100,
+                              cursor: Optional[str] = None,
+                              include_summary: bool = True,
+                              **filters) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Retrieve one page of analysis results, newest first, using keyset pagination.
+        
+        Args:
+            limit: Maximum number of results to return
+            cursor: Cursor returned with the previous page, or None for the first page
+            include_summary: Whether to include heavy columns such as summary
+            **filters: Filters accepted by build_filters
+            
+        Returns:
+            Tuple of (list of results, cursor for the next page or None on the last page)
+            
+        Raises:
+            ValueError: If the cursor or a filter value is invalid
+        """
+        conditions, params = build_filters(**filters)
+        if cursor:
+            conditions.append("(upload_time, document_id) < (?, ?)")
+            params.extend(decode_cursor(cursor))
+        
+        columns = [column for column in LIST_COLUMNS if include_summary or column not in HEAVY_COLUMNS]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+            SELECT {", ".join(columns)} FROM analysis_results {where}
+            ORDER BY upload_time DESC, document_id DESC LIMIT ?
+            ''', (*params, limit + 1))
+            rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error listing analysis results: {str(e)}")
+            return [], None
+        
+        # Parse JSON strings back to lists
+        results = [_row_to_result(row) for row in rows[:limit]]
+        
+        # An extra row means there is another page after this one
+        next_cursor = None
+        if len(rows) > limit:
+            last = results[-1]
+            next_cursor = encode_cursor(last["upload_time"], last["document_id"])
+        return results, next_cursor
+    
+    def iter_analysis_results(self,
+                              batch_size: int = 500,
+                              include_summary: bool = True,
+                              **filters) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Iterate over all matching analysis results in batches, newest first.
+        
+        The rows are read with fetchmany on a dedicated connection, so memory use
+        stays at one batch however many rows match, and the read sees one consistent
+        snapshot without blocking writers.
+        
+        Args:
+            batch_size: Number of rows fetched per batch
+            include_summary: Whether to include heavy columns such as summary
+            **filters: Filters accepted by build_filters
+            
+        Yields:
+            Lists of at most batch_size results
+            
+        Raises:
+            ValueError: If a filter value is invalid
+        """
+        conditions, params = build_filters(**filters)
+        columns = [column for column in LIST_COLUMNS if include_summary or column not in HEAVY_COLUMNS]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        # The export may outlive many requests and move between threads, so it gets its own connection
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+            cursor = conn.cursor()
+            cursor.arraysize = batch_size
+            cursor.execute(f'''
+            SELECT {", ".join(columns)} FROM analysis_results {where}
+            ORDER BY upload_time DESC, document_id DESC
+            ''', params)
+            
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    break
+                # Parse JSON strings back to lists
+                yield [_row_to_result(row) for row in rows]
         finally:
+            conn.close()
+    
+    def search_analysis_results(self,
+                                query: str,
+                                limit: int = 20,
+                                raw_query: bool = False,
+                                **filters) -> List[Dict[str, Any]]:
+        """
+        Full-text search over document names, summaries, conflicts and suggestions.
+        
+        Args:
+            query: Plain search text, or an FTS5 expression if raw_query is set
+            limit: Maximum number of results
+            raw_query: Pass the query to FTS5 unchanged (supports OR, NOT, NEAR and prefix*)
+            **filters: Filters accepted by build_filters
+            
+        Returns:
+            Matching results, best first, each with its bm25 rank and a highlighted snippet
+            
+        Raises:
+            ValueError: If the query or a filter value is invalid
+        """
+        conditions, params = build_filters(**filters)
+        match = query if raw_query else fts_query(query)
+        where = "".join(f" AND {condition}" for condition in conditions)
+        
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+            SELECT r.document_id, r.document_name, r.upload_time, r.status, r.score, r.document_type, r.file_url,
+                   bm25(analysis_results_fts, {", ".join(str(weight) for weight in SEARCH_WEIGHTS)}) AS rank,
+                   snippet(analysis_results_fts, -1, '[', ']', '...', 16) AS snippet
+            FROM analysis_results_fts
+            JOIN analysis_results r ON r.document_id = analysis_results_fts.document_id
+            WHERE analysis_results_fts MATCH ?{where}
+            ORDER BY rank LIMIT ?
+            ''', (match, *params, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        except sqlite3.OperationalError as e:
+            # Malformed FTS5 expressions are reported as operational errors
+            if raw_query:
+                raise ValueError(f"Invalid search query: {str(e)}") from e
+            logger.error(f"Error searching analysis results: {str(e)}")
+            return []
+        except sqlite3.Error as e:
+            logger.error(f"Error searching analysis results: {str(e)}")
+            return []
+    
+    @_on_writer
+    def rebuild_search_index(self) -> bool:
+        """
+        Rebuild the full-text index from analysis_results, e.g. if it was restored from an older backup.
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = None
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('DROP TABLE IF EXISTS analysis_results_fts')
+            _create_search_index(cursor)
+            
+            conn.commit()
+            logger.info("Search index rebuilt")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error rebuilding search index: {str(e)}")
             if conn:
-                conn.close()
+                conn.rollback()
+            return False
+    
+    def get_analytics(self,
+                      start_day: Optional[str] = None,
+                      end_day: Optional[str] = None,
+                      document_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Approval and score analytics from the daily rollups.
+        
+        Args:
+            start_day: First day to include (YYYY-MM-DD), or None for no lower bound
+            end_day: Last day to include (YYYY-MM-DD), or None for no upper bound
+            document_type: Only this document type
+            
+        Returns:
+            Dict with the overall summary, a summary per document type and a daily series
+            per document type. Each summary has counts, approval rate, mean score and
+            score percentiles (to the nearest point)
+            
+        Raises:
+            ValueError: If a day is not a valid ISO 8601 date
+        """
+        conditions, params = [], []
+        if start_day is not None:
+            conditions.append("day >= ?")
+            params.append(datetime.date.fromisoformat(start_day).isoformat())
+        if end_day is not None:
+            conditions.append("day <= ?")
+            params.append(datetime.date.fromisoformat(end_day).isoformat())
+        if document_type is not None:
+            conditions.append("document_type = ?")
+            params.append(document_type)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+            SELECT day, document_type, total, approved, rejected, needs_review, score_sum
+            FROM analysis_daily_rollups {where} ORDER BY day, document_type
+            ''', params)
+            rollups = cursor.fetchall()
+            cursor.execute(f'SELECT day, document_type, bucket, count FROM analysis_score_histogram {where}', params)
+            histogram_rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading analytics: {str(e)}")
+            return {"summary": _summarize(0, 0, 0, 0, 0.0, {}), "by_document_type": {}, "daily": []}
+        
+        # Score histograms per day and type, per type, and overall
+        histograms: Dict[Any, Dict[int, int]] = {}
+        for day, doc_type, bucket, count in histogram_rows:
+            for key in ((day, doc_type), doc_type, None):
+                histogram = histograms.setdefault(key, {})
+                histogram[bucket] = histogram.get(bucket, 0) + count
+        
+        # Counts per type and overall
+        totals: Dict[Any, List[float]] = {}
+        daily = []
+        for day, doc_type, total, approved, rejected, needs_review, score_sum in rollups:
+            counts = (total, approved, rejected, needs_review, score_sum)
+            for key in (doc_type, None):
+                running = totals.setdefault(key, [0, 0, 0, 0, 0.0])
+                for i, value in enumerate(counts):
+                    running[i] += value
+            daily.append({"day": day, "document_type": doc_type, **_summarize(*counts, histograms.get((day, doc_type), {}))})
+        
+        return {
+            "summary": _summarize(*totals.get(None, (0, 0, 0, 0, 0.0)), histograms.get(None, {})),
+            "by_document_type": {
+                doc_type: _summarize(*counts, histograms.get(doc_type, {}))
+                for doc_type, counts in totals.items() if doc_type is not None
+            },
+            "daily": daily,
+        }
+    
+    @_on_writer
+    def rebuild_rollups(self) -> bool:
+        """
+        Recompute the analytics rollups from analysis_results.
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = None
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            
+            for statement in ROLLUP_SCHEMA:
+                cursor.execute(statement)
+            _fill_rollups(cursor)
+            
+            conn.commit()
+            logger.info("Analytics rollups rebuilt")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error rebuilding analytics rollups: {str(e)}")
+            if conn:
+                conn.rollback()
+            return False
     
+    @_on_writer
     def delete_analysis_result(self, document_id: str) -> bool:
         """
         Delete an analysis result from the database.
@@ -186,8 +881,9 @@ class AnalysisDatabase:
         Returns:
             bool: True if successful, False otherwise
         """
+        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connection()
             cursor = conn.cursor()
             
             cursor.execute('DELETE FROM analysis_results WHERE document_id = ?', (document_id,))
@@ -201,11 +897,136 @@ class AnalysisDatabase:
                 return False
         except sqlite3.Error as e:
             logger.error(f"Error deleting analysis result: {str(e)}")
+            if conn:
+                conn.rollback()
             return False
-        finally:
+    
+    def get_website_fingerprint(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve the stored section fingerprints and findings for a website.
+        
+        Args:
+            url: Normalized URL of the page
+            
+        Returns:
+            Dict with context_key, document_id, page_hash, sections and result, or None if not found
+        """
+        conn = None
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT * FROM website_fingerprints WHERE url = ?', (url,))
+            row = cursor.fetchone()
+            
+            if row:
+                fingerprint = dict(row)
+                fingerprint["sections"] = json.loads(fingerprint["sections"])
+                fingerprint["result"] = json.loads(fingerprint["result"])
+                return fingerprint
+            else:
+                return None
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving website fingerprint: {str(e)}")
+            return None
+    
+    @_on_writer
+    def store_website_fingerprint(self,
+                                  url: str,
+                                  context_key: str,
+                                  page_hash: str,
+                                  sections: List[Dict[str, Any]],
+                                  result: Dict[str, Any]) -> bool:
+        """
+        Store the section fingerprints and findings for a website, replacing earlier ones.
+        
+        Args:
+            url: Normalized URL of the page
+            context_key: Key of the guidelines, prompt and model the findings were produced with
+            page_hash: Hash of the whole page text
+            sections: Sections with their fingerprints and findings
+            result: The analysis output and page-level findings
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        conn = None
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+            INSERT INTO website_fingerprints (url, context_key, page_hash, sections, result, updated_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (url) DO UPDATE SET
+                context_key = excluded.context_key,
+                page_hash = excluded.page_hash,
+                sections = excluded.sections,
+                result = excluded.result,
+                updated_at = excluded.updated_at
+            ''', (url, context_key, page_hash, json.dumps(sections), json.dumps(result)))
+            
+            conn.commit()
+            logger.info(f"Stored website fingerprint for: {url}")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Error storing website fingerprint: {str(e)}")
             if conn:
-                conn.close()
+                conn.rollback()
+            return False
+    
+    @_on_writer
+    def link_website_fingerprint(self, url: str, document_id: str) -> bool:
+        """
+        Point a website's fingerprint at the analysis result it produced.
+        
+        Args:
+            url: Normalized URL of the page
+            document_id: The stored analysis result
+            
+        Returns:
+            bool: True if a fingerprint was updated, False otherwise
+        """
+        conn = None
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('UPDATE website_fingerprints SET document_id = ? WHERE url = ?', (document_id, url))
+            conn.commit()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Error linking website fingerprint: {str(e)}")
+            if conn:
+                conn.rollback()
+            return False
+    
+    @_on_writer
+    def delete_website_fingerprint(self, url: str) -> bool:
+        """
+        Delete a website's fingerprint, so its next analysis reviews every section.
+        
+        Args:
+            url: Normalized URL of the page
+            
+        Returns:
+            bool: True if a fingerprint was deleted, False otherwise
+        """
+        conn = None
+        try:
+            conn = self._connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('DELETE FROM website_fingerprints WHERE url = ?', (url,))
+            conn.commit()
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Error deleting website fingerprint: {str(e)}")
+            if conn:
+                conn.rollback()
+            return False
     
+    @_on_writer
     def reset_database(self) -> bool:
         """
         Reset the database by dropping and recreating the analysis_results table.
@@ -213,12 +1034,18 @@ class AnalysisDatabase:
         Returns:
             bool: True if successful, False otherwise
         """
+        conn = None
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connection()
             cursor = conn.cursor()
             
-            # Drop the table if it exists
+            # Drop the tables if they exist
             cursor.execute('DROP TABLE IF EXISTS analysis_results')
+            cursor.execute('DROP TABLE IF EXISTS analysis_results_fts')
+            cursor.execute('DROP TABLE IF EXISTS analysis_daily_rollups')
+            cursor.execute('DROP TABLE IF EXISTS analysis_score_histogram')
+            # Fingerprints link to results that no longer exist after a reset
+            cursor.execute('DROP TABLE IF EXISTS website_fingerprints')
             
             # Recreate the table
             cursor.execute('''
@@ -237,12 +1064,114 @@ class AnalysisDatabase:
             )
             ''')
             
+            for index in INDEXES:
+                cursor.execute(index)
+            
+            # Create the full-text search index
+            _create_search_index(cursor)
+            
+            # Create the analytics rollups
+            _create_rollups(cursor)
+            
+            # Create the website fingerprints table
+            cursor.execute(FINGERPRINT_SCHEMA)
+            
             conn.commit()
             logger.info("Database has been reset successfully")
             return True
         except sqlite3.Error as e:
             logger.error(f"Error resetting database: {str(e)}")
-            return False
-        finally:
             if conn:
-                conn.close()
+                conn.rollback()
+            return False
+    
+    async def store_analysis_result_async(self, *args, **kwargs) -> bool:
+        """Store an analysis result without blocking the event loop (see store_analysis_result)."""
+        return await self._write_async(self.store_analysis_result.__wrapped__, self, *args, **kwargs)
+    
+    async def get_analysis_result_async(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve an analysis result without blocking the event loop (see get_analysis_result)."""
+        return await self._read_async(self.get_analysis_result, document_id)
+    
+    async def get_all_analysis_results_async(self) -> List[Dict[str, Any]]:
+        """Retrieve all analysis results without blocking the event loop (see get_all_analysis_results)."""
+        return await self._read_async(self.get_all_analysis_results)
+    
+    async def list_analysis_results_async(self, *args, **kwargs) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Retrieve one page of analysis results without blocking the event loop (see list_analysis_results)."""
+        return await self._read_async(self.list_analysis_results, *args, **kwargs)
+    
+    async def search_analysis_results_async(self, *args, **kwargs) -> List[Dict[str, Any]]:
+        """Full-text search without blocking the event loop (see search_analysis_results)."""
+        return await self._read_async(self.search_analysis_results, *args, **kwargs)
+    
+    async def get_analytics_async(self, *args, **kwargs) -> Dict[str, Any]:
+        """Approval and score analytics without blocking the event loop (see get_analytics)."""
+        return await self._read_async(self.get_analytics, *args, **kwargs)
+    
+    async def delete_analysis_result_async(self, document_id: str) -> bool:
+        """Delete an analysis result without blocking the event loop (see delete_analysis_result)."""
+        return await self._write_async(self.delete_analysis_result.__wrapped__, self, document_id)
+    
+    async def get_website_fingerprint_async(self, url: str) -> Optional[Dict[str, Any]]:
+        """Retrieve a website fingerprint without blocking the event loop (see get_website_fingerprint)."""
+        return await self._read_async(self.get_website_fingerprint, url)
+    
+    async def store_website_fingerprint_async(self, *args, **kwargs) -> bool:
+        """Store a website fingerprint without blocking the event loop (see store_website_fingerprint)."""
+        return await self._write_async(self.store_website_fingerprint.__wrapped__, self, *args, **kwargs)
+    
+    async def link_website_fingerprint_async(self, url: str, document_id: str) -> bool:
+        """Link a website fingerprint to its result without blocking the event loop (see link_website_fingerprint)."""
+        return await self._write_async(self.link_website_fingerprint.__wrapped__, self, url, document_id)
+    
+    async def delete_website_fingerprint_async(self, url: str) -> bool:
+        """Delete a website fingerprint without blocking the event loop (see delete_website_fingerprint)."""
+        return await self._write_async(self.delete_website_fingerprint.__wrapped__, self, url)
+    
+    async def reset_database_async(self) -> bool:
+        """Reset the database without blocking the event loop (see reset_database)."""
+        return await self._write_async(self.reset_database.__wrapped__, self)
+
+
+_shared_database: Optional[AnalysisDatabase] = None
+_shared_database_lock = threading.Lock()
+
+
+def get_database() -> AnalysisDatabase:
+    """
+    Get the process-wide database handler, opening it on first use.
+    
+    Returns:
+        The shared AnalysisDatabase
+    """
+    global _shared_database
+    if _shared_database is None:
+        with _shared_database_lock:
+            if _shared_database is None:
+                _shared_database = AnalysisDatabase()
+    return _shared_database
+
+
+def main():
+    """Command line maintenance for the analysis database."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Analyser Agent database maintenance")
+    parser.add_argument("command", choices=["rebuild-rollups", "rebuild-search-index"], help="Maintenance task to run")
+    parser.add_argument("--db", default=DB_FILE, help="Path to the database file")
+    args = parser.parse_args()
+    
+    db = AnalysisDatabase(db_path=args.db)
+    try:
+        if args.command == "rebuild-rollups":
+            success = db.rebuild_rollups()
+        else:
+            success = db.rebuild_search_index()
+    finally:
+        db.close()
+    raise SystemExit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Event capture for the Analyser Agent.
+This module decides which agent events a task returns and where full traces go: a
+run keeps only the events it will return in a fixed-size ring buffer and serializes
+them once, at the end, while an optional sink receives every event in the background
+and writes it to a JSONL file or hands it to an asyncio queue.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from google.adk.events import Event
+
+from .executor import run_blocking
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Event capture configuration
+EVENT_CAPTURE_MODES = ("none", "final", "last")
+EVENT_CAPTURE = os.getenv("ANALYSER_EVENT_CAPTURE", "last").lower()
+EVENT_CAPTURE_COUNT = int(os.getenv("ANALYSER_EVENT_CAPTURE_COUNT", 3))
+EVENT_SINK_FILE = os.getenv("ANALYSER_EVENT_SINK_FILE", "")
+EVENT_SINK_QUEUE_SIZE = int(os.getenv("ANALYSER_EVENT_SINK_QUEUE_SIZE", 1000))
+EVENT_SINK_BATCH_SIZE = 100
+
+if EVENT_CAPTURE not in EVENT_CAPTURE_MODES:
+    logger.warning(f"Unknown ANALYSER_EVENT_CAPTURE '{EVENT_CAPTURE}', capturing the last {EVENT_CAPTURE_COUNT} events")
+    EVENT_CAPTURE = "last"
+
+
+class EventCapture:
+    """The events of one run that are returned to the caller, kept unserialized until the end."""
+
+    def __init__(self, mode: str = EVENT_CAPTURE, count: int = EVENT_CAPTURE_COUNT):
+        """
+        Initialize the capture.
+
+        Args:
+            mode: "none" keeps no events, "final" keeps the final response event,
+                "last" keeps the last count events
+            count: Number of events kept in "last" mode
+        """
+        self.mode = mode
+        maxlen = {"none": 0, "final": 1}.get(mode, max(0, count))
+        self._events: Deque[Event] = deque(maxlen=maxlen)
+
+    def add(self, event: Event):
+        """Offer an event to the capture; the buffer drops the oldest when full."""
+        if self.mode == "last" or (self.mode == "final" and event.is_final_response()):
+            self._events.append(event)
+
+    def dump(self) -> List[Dict[str, Any]]:
+        """Serialize the captured events."""
+        return [event.model_dump(exclude_none=True) for event in self._events]
+
+
+class EventSink(ABC):
+    """
+    Background consumer of every event of every run.
+
+    emit() never blocks the run: events go on a bounded queue drained by a background
+    task, and are dropped (and counted) when the queue is full.
+    """
+
+    def __init__(self, queue_size: int = EVENT_SINK_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.counters = {"emitted": 0, "written": 0, "dropped": 0, "errors": 0}
+
+    def _ensure_started(self):
+        """Start the background task on the running event loop, recreating it for a new loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._task = loop.create_task(self._drain(), name=f"{type(self).__name__}-drain")
+
+    def emit(self, event: Event, **metadata: Any):
+        """
+        Queue an event for the sink without waiting.
+
+        Args:
+            event: The agent event
+            **metadata: Fields recorded with the event (e.g. session_id, pipeline)
+        """
+        self._ensure_started()
+        self.counters["emitted"] += 1
+        try:
+            self._queue.put_nowait((time.time(), metadata, event))
+        except asyncio.QueueFull:
+            self.counters["dropped"] += 1
+
+    async def _drain(self):
+        """Hand queued events to the sink in batches."""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < EVENT_SINK_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                self.counters["written"] += await self.write(batch)
+            except Exception as e:
+                self.counters["errors"] += 1
+                logger.error(f"Error writing {len(batch)} events to {type(self).__name__}: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @abstractmethod
+    async def write(self, batch: List[tuple]) -> int:
+        """Consume a batch of (received_at, metadata, event) tuples and return how many were written."""
+
+    async def flush(self):
+        """Wait until every queued event has been handed to the sink."""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the sink type, queue depth and event counters."""
+        return {
+            "sink": type(self).__name__,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            **self.counters,
+        }
+
+
+def _record(received_at: float, metadata: Dict[str, Any], event: Event) -> Dict[str, Any]:
+    """Build the JSON record of a sunk event."""
+    return {"received_at": received_at, **metadata, "event": event.model_dump(mode="json", exclude_none=True)}
+
+
+class JsonlEventSink(EventSink):
+    """Appends full event traces to a JSON Lines file, serializing on the shared thread pool."""
+
+    def __init__(self, path: str, queue_size: int = EVENT_SINK_QUEUE_SIZE):
+        """
+        Initialize the sink.
+
+        Args:
+            path: The JSONL file to append to
+            queue_size: Maximum number of events waiting to be written
+        """
+        super().__init__(queue_size)
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _append(self, batch: List[tuple]):
+        """Serialize a batch and append it to the file in one write."""
+        lines = "".join(json.dumps(_record(*item), default=str) + "\n" for item in batch)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def write(self, batch: List[tuple]) -> int:
+        await run_blocking(self._append, batch)
+        return len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "path": self.path}
+
+
+class QueueEventSink(EventSink):
+    """Hands event records to an asyncio queue read by another consumer in the same process."""
+
+    def __init__(self, target: asyncio.Queue, queue_size: int = EVENT_SINK_QUEUE_SIZE):
+        """
+        Initialize the sink.
+
+        Args:
+            target: The queue receiving the event records (records are dropped when it is full)
+            queue_size: Maximum number of events waiting to be handed over
+        """
+        super().__init__(queue_size)
+        self.target = target
+
+    async def write(self, batch: List[tuple]) -> int:
+        written = 0
+        for item in batch:
+            try:
+                self.target.put_nowait(_record(*item))
+                written += 1
+            except asyncio.QueueFull:
+                self.counters["dropped"] += 1
+        return written
+
+
+def create_event_sink() -> Optional[EventSink]:
+    """Create the event sink configured by ANALYSER_EVENT_SINK_FILE, or None if it is not set."""
+    if not EVENT_SINK_FILE:
+        return None
+    logger.info(f"Writing full agent event traces to {EVENT_SINK_FILE}")
+    return JsonlEventSink(EVENT_SINK_FILE)
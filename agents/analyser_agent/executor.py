@@ -0,0 +1,52 @@
+"""
+Thread pool for blocking work in the Analyser Agent.
+This module offloads blocking SDK and I/O calls from the event loop so a single
+process can keep many analyses in flight without stalling other requests.
+"""
+
+import os
+import asyncio
+import logging
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Maximum number of blocking calls running at once
+TOOL_THREADS = int(os.getenv("ANALYSER_TOOL_THREADS", 64))
+
+_executor = ThreadPoolExecutor(max_workers=TOOL_THREADS, thread_name_prefix="analyser-tool")
+_in_flight = 0
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking function on the shared thread pool and await its result.
+
+    The caller's context variables are propagated to the worker thread.
+
+    Args:
+        func: The blocking function to call
+        *args: Positional arguments for the function
+        **kwargs: Keyword arguments for the function
+
+    Returns:
+        The function's return value
+    """
+    global _in_flight
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    _in_flight += 1
+    try:
+        return await loop.run_in_executor(_executor, call)
+    finally:
+        _in_flight -= 1
+
+
+def executor_stats() -> Dict[str, int]:
+    """Return the pool size and the number of blocking calls in flight."""
+    return {"threads": TOOL_THREADS, "in_flight": _in_flight}
@@ -0,0 +1,61 @@
+"""
+Export serializers for the Analyser Agent.
+This module turns batches of analysis results into NDJSON or CSV chunks for
+streaming responses, one batch at a time.
+"""
+
+import io
+import csv
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+# Supported formats and their media types
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def ndjson_chunks(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    """
+    Serialize batches of results as newline-delimited JSON.
+
+    Args:
+        batches: Batches of analysis results
+
+    Yields:
+        One chunk of NDJSON lines per batch
+    """
+    for batch in batches:
+        yield "".join(json.dumps(result) + "\n" for result in batch).encode("utf-8")
+
+
+def csv_chunks(batches: Iterable[List[Dict[str, Any]]], columns: Sequence[str]) -> Iterator[bytes]:
+    """
+    Serialize batches of results as CSV with a header row.
+
+    List columns (suggestions, conflicts, guidelines) are written as JSON arrays.
+
+    Args:
+        batches: Batches of analysis results
+        columns: Columns to write, in order
+
+    Yields:
+        The header row, then one chunk of CSV rows per batch
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for result in batch:
+            writer.writerow([
+                json.dumps(result.get(column)) if isinstance(result.get(column), list) else result.get(column)
+                for column in columns
+            ])
+        yield buffer.getvalue().encode("utf-8")
+
@@ -0,0 +1,121 @@
+"""
+Shared Gemini client for the Analyser Agent.
+This module configures the Gemini SDK once per process and hands out cached model
+objects, so every tool call reuses the same long-lived connections, timeouts and
+transport settings.
+"""
+
+import os
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import google.generativeai as genai
+from dotenv import load_dotenv
+
+from .executor import run_blocking
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Client configuration
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-2.0-flash")
+GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "grpc")
+GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", 600))
+MODEL_CACHE_SIZE = int(os.getenv("GEMINI_MODEL_CACHE_SIZE", 32))
+
+# Request options passed to every generate_content call
+REQUEST_OPTIONS = {"timeout": GEMINI_REQUEST_TIMEOUT}
+
+_configure_lock = threading.Lock()
+_configured = False
+
+
+def configure_gemini():
+    """
+    Configure the Gemini SDK for this process if it has not been configured yet.
+
+    The SDK keeps one client per service after configuration, so configuring once
+    means every model and file call shares the same gRPC channel (or pooled HTTP
+    session with the rest transport) instead of reconnecting.
+    """
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if _configured:
+            return
+        api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+        genai.configure(api_key=api_key, transport=GEMINI_TRANSPORT)
+        _configured = True
+        logger.info(f"Configured Gemini client (transport={GEMINI_TRANSPORT}, timeout={GEMINI_REQUEST_TIMEOUT}s)")
+
+
+def _freeze(generation_config: Optional[Dict[str, Any]]):
+    """Turn a generation config into a hashable cache key, or None if it cannot be hashed."""
+    if not generation_config:
+        return ()
+    frozen = tuple(sorted(generation_config.items()))
+    try:
+        hash(frozen)
+    except TypeError:
+        return None
+    return frozen
+
+
+@lru_cache(maxsize=MODEL_CACHE_SIZE)
+def _cached_model(model_name: str, frozen_config: tuple) -> genai.GenerativeModel:
+    """Build a model for a name and frozen generation config; results are cached."""
+    logger.debug(f"Initializing Gemini model {model_name}")
+    return genai.GenerativeModel(model_name=model_name, generation_config=dict(frozen_config) or None)
+
+
+def get_model(generation_config: Optional[Dict[str, Any]] = None, model_name: str = GEMINI_MODEL) -> genai.GenerativeModel:
+    """
+    Get a shared model object for a model name and generation config.
+
+    Args:
+        generation_config: Generation settings for the model
+        model_name: The Gemini model name
+
+    Returns:
+        The cached GenerativeModel
+    """
+    configure_gemini()
+    frozen_config = _freeze(generation_config)
+    if frozen_config is None:
+        # Unhashable settings (e.g. a dict schema) can't be cached
+        return genai.GenerativeModel(model_name=model_name, generation_config=generation_config)
+    return _cached_model(model_name, frozen_config)
+
+
+async def generate_content(contents, generation_config: Optional[Dict[str, Any]] = None, model_name: str = GEMINI_MODEL):
+    """
+    Generate content with a shared model on the tool thread pool, using the configured timeout.
+
+    Args:
+        contents: The prompt and any uploaded files
+        generation_config: Generation settings for the model
+        model_name: The Gemini model name
+
+    Returns:
+        The Gemini response
+    """
+    model = get_model(generation_config, model_name)
+    return await run_blocking(model.generate_content, contents, request_options=REQUEST_OPTIONS)
+
+
+def model_cache_stats() -> Dict[str, Any]:
+    """Return hit/miss counts for the model cache."""
+    info = _cached_model.cache_info()
+    return {
+        "model": GEMINI_MODEL,
+        "transport": GEMINI_TRANSPORT,
+        "hits": info.hits,
+        "misses": info.misses,
+        "cached_models": info.currsize,
+    }
@@ -0,0 +1,432 @@
+"""
+Gemini Files API helpers for the Analyser Agent.
+This module waits for uploaded files to finish processing, records how long they take,
+keeps uploaded files alive for reuse across requests and generates content from them.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import google.generativeai as genai
+
+from .executor import run_blocking
+from .gemini_client import configure_gemini, generate_content
+from .hashing import hash_file
+from .progress import report_progress
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Polling configuration for files in the PROCESSING state
+POLL_INITIAL_INTERVAL = float(os.getenv("GEMINI_POLL_INITIAL_INTERVAL", 0.5))
+POLL_MAX_INTERVAL = float(os.getenv("GEMINI_POLL_MAX_INTERVAL", 8.0))
+POLL_BACKOFF = float(os.getenv("GEMINI_POLL_BACKOFF", 1.5))
+POLL_MAX_WAIT = float(os.getenv("GEMINI_POLL_MAX_WAIT", 600))
+
+# Reuse of uploaded files (Gemini deletes uploads after 48 hours)
+FILE_HANDLE_TTL = int(os.getenv("GEMINI_FILE_HANDLE_TTL", 24 * 3600))
+FILE_HANDLE_MAX = int(os.getenv("GEMINI_FILE_HANDLE_MAX", 1000))
+FILE_CLEANUP_INTERVAL = int(os.getenv("GEMINI_FILE_CLEANUP_INTERVAL", 300))
+
+# Stop reusing a handle this many seconds before the service expires it
+EXPIRY_MARGIN_SECONDS = 600
+
+
+class FileProcessingError(Exception):
+    """Raised when Gemini fails to process an uploaded file."""
+
+
+class FileProcessingTimeout(FileProcessingError):
+    """Raised when an uploaded file is still processing after the maximum wait."""
+
+
+class ProcessingStats:
+    """Rolling statistics on how long uploaded files spend in the PROCESSING state."""
+
+    def __init__(self, window: int = 500):
+        """
+        Initialize the statistics.
+
+        Args:
+            window: Number of recent samples kept for percentiles
+        """
+        self.samples = deque(maxlen=window)
+        self.outcomes = {"active": 0, "failed": 0, "timeout": 0, "cancelled": 0}
+        self.polls = 0
+
+    def record(self, seconds: float, polls: int, outcome: str):
+        """
+        Record one wait.
+
+        Args:
+            seconds: Time spent waiting for the file
+            polls: Number of get_file calls made
+            outcome: One of active, failed, timeout or cancelled
+        """
+        self.outcomes[outcome] += 1
+        self.polls += polls
+        if outcome == "active":
+            self.samples.append(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the outcome counts and processing time percentiles in seconds."""
+        ordered = sorted(self.samples)
+
+        def percentile(p: float):
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+        return {
+            "outcomes": dict(self.outcomes),
+            "polls": self.polls,
+            "samples": len(ordered),
+            "mean_seconds": round(sum(ordered) / len(ordered), 3) if ordered else None,
+            "p50_seconds": percentile(0.5),
+            "p90_seconds": percentile(0.9),
+            "max_seconds": round(ordered[-1], 3) if ordered else None,
+        }
+
+
+processing_stats = ProcessingStats()
+
+
+async def wait_for_file_active(file,
+                               initial_interval: float = POLL_INITIAL_INTERVAL,
+                               max_interval: float = POLL_MAX_INTERVAL,
+                               backoff: float = POLL_BACKOFF,
+                               max_wait: float = POLL_MAX_WAIT):
+    """
+    Wait for an uploaded file to leave the PROCESSING state.
+
+    Polls with a short initial interval that grows by the backoff factor up to
+    max_interval. Cancelling the awaiting task stops the polling.
+
+    Args:
+        file: The uploaded Gemini file
+        initial_interval: Seconds before the first poll
+        max_interval: Upper bound on the interval between polls
+        backoff: Factor the interval grows by after each poll
+        max_wait: Maximum number of seconds to wait
+
+    Returns:
+        The file once it is ACTIVE
+
+    Raises:
+        FileProcessingTimeout: If the file is still processing after max_wait
+        FileProcessingError: If processing failed
+    """
+    start = time.monotonic()
+    interval = initial_interval
+    polls = 0
+
+    try:
+        while file.state.name == "PROCESSING":
+            elapsed = time.monotonic() - start
+            if elapsed >= max_wait:
+                processing_stats.record(elapsed, polls, "timeout")
+                raise FileProcessingTimeout(f"File {file.name} still processing after {elapsed:.1f}s")
+
+            await asyncio.sleep(min(interval, max_wait - elapsed))
+            file = await run_blocking(genai.get_file, file.name)
+            polls += 1
+            interval = min(interval * backoff, max_interval)
+            report_progress("gemini_processing", file=file.name, state=file.state.name, elapsed=round(time.monotonic() - start, 1))
+    except asyncio.CancelledError:
+        processing_stats.record(time.monotonic() - start, polls, "cancelled")
+        logger.info(f"Stopped waiting for file {file.name} (cancelled)")
+        raise
+
+    elapsed = time.monotonic() - start
+    if file.state.name == "FAILED":
+        processing_stats.record(elapsed, polls, "failed")
+        raise FileProcessingError(f"Gemini failed to process file {file.name}")
+
+    processing_stats.record(elapsed, polls, "active")
+    logger.info(f"File {file.name} ready after {elapsed:.2f}s in PROCESSING ({polls} polls)")
+    return file
+
+
+class FileHandleRegistry:
+    """
+    Registry of uploaded Gemini files keyed by content hash.
+
+    Files are kept for a TTL (capped by the service's own expiration) and reused by
+    later requests for the same content. Every acquire takes a reference that the caller
+    gives back with release_after_use or invalidate; a file still referenced is never
+    evicted or expired, and a file dropped while in use is deleted by its last release.
+    Deletes run as background tasks instead of on the request path.
+    """
+
+    def __init__(self,
+                 ttl: int = FILE_HANDLE_TTL,
+                 max_handles: int = FILE_HANDLE_MAX,
+                 cleanup_interval: int = FILE_CLEANUP_INTERVAL):
+        """
+        Initialize the registry.
+
+        Args:
+            ttl: Seconds an uploaded file is reused for (0 deletes files right after use)
+            max_handles: Maximum number of files kept; the least recently used are released first
+            cleanup_interval: Seconds between background cleanup runs
+        """
+        self.ttl = ttl
+        self.max_handles = max_handles
+        self.cleanup_interval = cleanup_interval
+        self.handles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.metrics = {"uploads": 0, "reuses": 0, "deletes": 0, "delete_errors": 0}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # Content hash -> number of acquire calls holding or waiting for its lock
+        self._lock_users: Dict[str, int] = {}
+        # Remote file name -> number of requests using it
+        self._refs: Dict[str, int] = {}
+        self._hash_memo: Dict[tuple, str] = {}
+        self._pending_deletes = set()
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    async def content_hash(self, path: str) -> str:
+        """
+        Hash a local file, memoized by path, size and modification time.
+
+        Args:
+            path: Path to the file
+
+        Returns:
+            The SHA-256 hex digest
+        """
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in self._hash_memo:
+            if len(self._hash_memo) >= self.max_handles:
+                self._hash_memo.clear()
+            self._hash_memo[memo_key] = await run_blocking(hash_file, path)
+        return self._hash_memo[memo_key]
+
+    def remember_hash(self, path: str, digest: str):
+        """
+        Record a hash computed elsewhere (e.g. while the file was uploaded) to skip rehashing.
+
+        Args:
+            path: Path to the file
+            digest: The SHA-256 hex digest of its content
+        """
+        stat = os.stat(path)
+        if len(self._hash_memo) >= self.max_handles:
+            self._hash_memo.clear()
+        self._hash_memo[(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)] = digest
+
+    async def acquire(self, path: str):
+        """
+        Get an ACTIVE Gemini file for a local file, uploading it only if no live handle exists.
+
+        Args:
+            path: Path to the file
+
+        Returns:
+            The ACTIVE Gemini file
+        """
+        digest = await self.content_hash(path)
+        lock = self._locks.setdefault(digest, asyncio.Lock())
+        self._lock_users[digest] = self._lock_users.get(digest, 0) + 1
+        try:
+            return await self._acquire(path, digest, lock)
+        finally:
+            self._lock_users[digest] -= 1
+            if not self._lock_users[digest]:
+                del self._lock_users[digest]
+                # Locks only outlive their callers while a handle for the content is kept
+                if digest not in self.handles:
+                    self._locks.pop(digest, None)
+
+    async def _acquire(self, path: str, digest: str, lock: asyncio.Lock):
+        """Reuse or upload a file under its content's lock and take a reference to it."""
+        async with lock:
+            entry = self.handles.get(digest)
+            if entry and entry["expires_at"] > time.time():
+                self.handles.move_to_end(digest)
+                entry["last_used"] = time.time()
+                self.metrics["reuses"] += 1
+                logger.info(f"Reusing uploaded file {entry['file'].name} for {path}")
+                report_progress("gemini_upload", status="reused", file=entry["file"].name)
+                self._refs[entry["file"].name] = self._refs.get(entry["file"].name, 0) + 1
+                return entry["file"]
+
+            if entry:
+                self._release(digest)
+
+            logger.debug(f"Uploading file: {path}")
+            configure_gemini()
+            report_progress("gemini_upload", status="uploading", bytes=os.path.getsize(path))
+            file = await run_blocking(genai.upload_file, path=path)
+            self.metrics["uploads"] += 1
+            report_progress("gemini_upload", status="uploaded", file=file.name)
+            try:
+                file = await wait_for_file_active(file)
+            except BaseException:
+                self._schedule_delete(file.name)
+                raise
+
+            self._refs[file.name] = self._refs.get(file.name, 0) + 1
+            if self.ttl > 0:
+                expires_at = time.time() + self.ttl
+                if getattr(file, "expiration_time", None):
+                    expires_at = min(expires_at, file.expiration_time.timestamp() - EXPIRY_MARGIN_SECONDS)
+                self.handles[digest] = {"file": file, "expires_at": expires_at, "last_used": time.time()}
+                self._evict()
+                self._ensure_cleanup_task()
+
+            return file
+
+    def release_after_use(self, file):
+        """
+        Signal that a request is done with a file, giving back the reference acquire took.
+
+        Files tracked by the registry stay alive for reuse; untracked files (when
+        reuse is disabled, or dropped while in use) are deleted in the background
+        once no request uses them.
+
+        Args:
+            file: The Gemini file returned by acquire
+        """
+        refs = self._refs.get(file.name, 0) - 1
+        if refs > 0:
+            self._refs[file.name] = refs
+            return
+        self._refs.pop(file.name, None)
+        if self._digest_of(file.name) is None:
+            self._schedule_delete(file.name)
+
+    def invalidate(self, file):
+        """
+        Stop reusing a file, e.g. after the service rejected it, and give back the reference.
+
+        The file is deleted in the background once no other request uses it.
+
+        Args:
+            file: The Gemini file returned by acquire
+        """
+        digest = self._digest_of(file.name)
+        if digest is not None:
+            self._release(digest)
+        self.release_after_use(file)
+
+    @asynccontextmanager
+    async def use(self, path: str) -> AsyncIterator[Any]:
+        """
+        Hold an ACTIVE Gemini file for a local file while the body runs.
+
+        The file is released when the body finishes and invalidated if it raises,
+        since the service may have rejected or expired the upload.
+
+        Args:
+            path: Path to the file
+
+        Yields:
+            The ACTIVE Gemini file
+        """
+        file = await self.acquire(path)
+        try:
+            yield file
+        except Exception:
+            self.invalidate(file)
+            raise
+        except BaseException:
+            self.release_after_use(file)
+            raise
+        self.release_after_use(file)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return upload/reuse counts and the number of live handles."""
+        return {
+            **self.metrics,
+            "live_handles": len(self.handles),
+            "in_use": len(self._refs),
+            "pending_deletes": len(self._pending_deletes),
+            "ttl_seconds": self.ttl,
+        }
+
+    def _digest_of(self, name: str) -> Optional[str]:
+        """Return the content hash a remote file is tracked under, or None if it is not tracked."""
+        for digest, entry in self.handles.items():
+            if entry["file"].name == name:
+                return digest
+        return None
+
+    def _release(self, digest: str):
+        """Forget a handle and delete its remote file in the background, or after its last use."""
+        entry = self.handles.pop(digest, None)
+        if digest not in self._lock_users:
+            self._locks.pop(digest, None)
+        if entry and entry["file"].name not in self._refs:
+            self._schedule_delete(entry["file"].name)
+
+    def _evict(self):
+        """Release the least recently used handles not in use until at most max_handles are kept."""
+        for digest in list(self.handles):
+            if len(self.handles) <= self.max_handles:
+                break
+            if self.handles[digest]["file"].name not in self._refs:
+                self._release(digest)
+
+    def _schedule_delete(self, name: str):
+        """Delete a remote file without blocking the caller."""
+        task = asyncio.get_running_loop().create_task(self._delete(name))
+        self._pending_deletes.add(task)
+        task.add_done_callback(self._pending_deletes.discard)
+
+    async def _delete(self, name: str):
+        """Delete a remote file, logging rather than raising on failure."""
+        try:
+            await run_blocking(genai.delete_file, name)
+            self.metrics["deletes"] += 1
+            logger.debug(f"Deleted uploaded file: {name}")
+        except Exception as e:
+            self.metrics["delete_errors"] += 1
+            logger.warning(f"Error deleting uploaded file {name}: {str(e)}")
+
+    def _ensure_cleanup_task(self):
+        """Start the background cleanup loop if it is not running."""
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.get_running_loop().create_task(self._cleanup_loop())
+
+    async def _cleanup_loop(self):
+        """Periodically release expired handles until none are left."""
+        while self.handles:
+            await asyncio.sleep(self.cleanup_interval)
+            now = time.time()
+            # Files in use stay until their last release; acquire no longer hands them out
+            expired = [digest for digest, entry in self.handles.items()
+                       if entry["expires_at"] <= now and entry["file"].name not in self._refs]
+            for digest in expired:
+                self._release(digest)
+            if expired:
+                logger.info(f"Released {len(expired)} expired uploaded files")
+
+
+file_registry = FileHandleRegistry()
+
+
+async def generate_from_file(path: str, prompt: str, generation_config: Optional[Dict[str, Any]] = None):
+    """
+    Generate content from a prompt and a local file uploaded to Gemini.
+
+    A live upload of the same content is reused; otherwise the file is uploaded and
+    waited on. An upload the call fails with is not handed out again.
+
+    Args:
+        path: Path to the file
+        prompt: The full prompt to send with the file
+        generation_config: Generation settings for the model
+
+    Returns:
+        The Gemini response
+    """
+    async with file_registry.use(path) as file:
+        logger.info("Generating content with Gemini")
+        return await generate_content([prompt, file], generation_config=generation_config)
@@ -0,0 +1,263 @@
+"""
+HTML text extraction for the Analyser Agent.
+This module turns a web page into compact prompt text in a single streaming pass: it
+skips scripts and boilerplate (navigation, footers, cookie banners), normalizes whitespace,
+keeps headings as Markdown and cuts the text to a token budget.
+"""
+
+import os
+import re
+import logging
+from html.parser import HTMLParser
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Extraction configuration
+EXTRACT_MAX_TOKENS = int(os.getenv("WEB_EXTRACT_MAX_TOKENS", 8000))
+EXTRACT_REMOVE_BOILERPLATE = os.getenv("WEB_EXTRACT_REMOVE_BOILERPLATE", "true").lower() in ("1", "true", "yes")
+
+# Rough characters per token for English text, used to size the budget without a tokenizer call
+CHARS_PER_TOKEN = 4
+
+TRUNCATION_MARKER = "[... page text truncated ...]"
+
+# Elements whose content is never page text
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "canvas", "iframe", "object"}
+
+# Page chrome repeated on every page of a site
+BOILERPLATE_TAGS = {"nav", "footer", "dialog"}
+BOILERPLATE_ROLES = {"navigation", "contentinfo", "search", "dialog", "alertdialog"}
+BOILERPLATE_PATTERN = re.compile(r"cookie|consent|gdpr|onetrust|cookiebot|cc-banner|cc-window|newsletter-popup", re.IGNORECASE)
+
+# Elements that hold the page itself, never dropped for their id or class
+STRUCTURAL_TAGS = {"html", "body", "main", "article"}
+# Elements whose presence shows that an element matching BOILERPLATE_PATTERN wraps page content
+CONTENT_TAGS = {"main", "article", "h1"}
+# Text length above which an element matching BOILERPLATE_PATTERN is page content, not a banner
+BOILERPLATE_MAX_CHARS = 2000
+
+# Elements that start a new line of text
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset", "figcaption",
+    "figure", "form", "header", "hr", "li", "main", "ol", "p", "pre", "section", "table", "tr",
+    "ul",
+}
+HEADING_TAGS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+# Extracted lines for headings start with one "#" per heading level
+HEADING = re.compile(r"^#{1,6} ")
+
+# Elements without a closing tag
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param",
+    "source", "track", "wbr",
+}
+
+WHITESPACE = re.compile(r"\s+")
+
+
+class _PageExtractor(HTMLParser):
+    """Streaming parser that collects page text lines and link targets."""
+
+    def __init__(self, base_url: str = "", remove_boilerplate: bool = True):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.remove_boilerplate = remove_boilerplate
+        self.title = ""
+        self.lines: List[str] = []
+        self.links: List[str] = []
+        self._line: List[str] = []
+        self._prefix = ""
+        self._skip_tag: Optional[str] = None
+        self._skip_depth = 0
+        self._skip_is_chrome = False
+        self._in_title = False
+        # Open elements matching BOILERPLATE_PATTERN, dropped on close unless they hold page content
+        self._suspects: List[dict] = []
+
+    def _flush(self, keep_prefix: bool = False):
+        """End the current line; an empty line keeps its prefix when a nested block starts."""
+        text = WHITESPACE.sub(" ", "".join(self._line)).strip()
+        if text:
+            self.lines.append(self._prefix + text)
+        if text or not keep_prefix:
+            self._prefix = ""
+        self._line = []
+
+    def _is_boilerplate(self, tag: str, attrs: dict) -> bool:
+        """Whether an element is site chrome rather than page content."""
+        if tag in BOILERPLATE_TAGS or attrs.get("role") in BOILERPLATE_ROLES:
+            return True
+        return "hidden" in attrs or attrs.get("aria-hidden") == "true"
+
+    def _is_suspect(self, tag: str, attrs: dict) -> bool:
+        """
+        Whether an element's id or class looks like a cookie banner or popup.
+
+        Such classes also appear on wrappers of the whole page (e.g. "cookie-consent-given"
+        on <body>), so the element is only dropped if it turns out to hold no page content.
+        """
+        if tag in STRUCTURAL_TAGS:
+            return False
+        marker = f"{attrs.get('id') or ''} {attrs.get('class') or ''}"
+        return bool(marker.strip()) and bool(BOILERPLATE_PATTERN.search(marker))
+
+    def _close_suspect(self):
+        """Close the innermost suspect element, dropping its text if it held no page content."""
+        suspect = self._suspects.pop()
+        self._flush()
+        text_chars = sum(len(line) for line in self.lines[suspect["start"]:])
+        if not suspect["content"] and text_chars <= BOILERPLATE_MAX_CHARS:
+            del self.lines[suspect["start"]:]
+        elif self._suspects:
+            # Page content inside a suspect also keeps the suspects around it
+            self._suspects[-1]["content"] = True
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag == "base" and attrs.get("href"):
+            self.base_url = urljoin(self.base_url, attrs["href"])
+        elif tag == "a" and attrs.get("href") and "nofollow" not in (attrs.get("rel") or "").split():
+            # Links in navigation and footers are still followed by the crawler
+            if not self._skip_tag or self._skip_is_chrome:
+                parts = urlsplit(urljoin(self.base_url, attrs["href"].strip()))
+                if parts.scheme in ("http", "https"):
+                    self.links.append(urlunsplit((parts.scheme, parts.netloc, parts.path or "/", parts.query, "")))
+        elif tag == "title" and not self.title:
+            self._in_title = True
+
+        if tag in VOID_TAGS:
+            if tag in ("br", "hr") and not self._skip_tag:
+                self._flush()
+            return
+
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+
+        if tag in SKIPPED_TAGS or (self.remove_boilerplate and self._is_boilerplate(tag, attrs)):
+            self._skip_tag = tag
+            self._skip_depth = 1
+            self._skip_is_chrome = tag not in SKIPPED_TAGS
+            return
+
+        for suspect in self._suspects:
+            if suspect["tag"] == tag:
+                suspect["depth"] += 1
+        if self._suspects and tag in CONTENT_TAGS:
+            self._suspects[-1]["content"] = True
+        if self.remove_boilerplate and self._is_suspect(tag, attrs):
+            self._flush()
+            self._suspects.append({"tag": tag, "depth": 1, "start": len(self.lines), "content": False})
+
+        if tag in HEADING_TAGS:
+            self._flush()
+            self._prefix = "#" * HEADING_TAGS[tag] + " "
+        elif tag in BLOCK_TAGS:
+            self._flush(keep_prefix=True)
+            if tag == "li":
+                self._prefix = "- "
+        elif tag in ("td", "th"):
+            self._line.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag in HEADING_TAGS or tag in BLOCK_TAGS:
+            self._flush()
+        for suspect in self._suspects:
+            if suspect["tag"] == tag:
+                suspect["depth"] -= 1
+        while self._suspects and self._suspects[-1]["depth"] <= 0:
+            self._close_suspect()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_tag:
+            self._line.append(data)
+
+    def close(self):
+        super().close()
+        self._flush()
+        while self._suspects:
+            self._close_suspect()
+
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Cut text to an approximate token budget at a line boundary.
+
+    Args:
+        text: The text to cut
+        max_tokens: The token budget; 0 or less disables the cut
+
+    Returns:
+        The text, ending with a truncation marker if it was cut
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if max_tokens <= 0 or len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars - len(TRUNCATION_MARKER) - 1)
+    if cut <= 0:
+        cut = max_chars - len(TRUNCATION_MARKER) - 1
+    return text[:cut].rstrip() + "\n" + TRUNCATION_MARKER
+
+
+def extract_page(html: str,
+                 base_url: str = "",
+                 max_tokens: int = EXTRACT_MAX_TOKENS,
+                 remove_boilerplate: bool = EXTRACT_REMOVE_BOILERPLATE) -> Tuple[str, List[str]]:
+    """
+    Extract the prompt text and the link targets of an HTML page.
+
+    Args:
+        html: The HTML content
+        base_url: URL the page was served from, used to resolve relative links
+        max_tokens: Approximate token budget for the text
+        remove_boilerplate: Drop navigation, footers, hidden elements and cookie banners
+
+    Returns:
+        The text, one block per line with headings as Markdown, and the page's absolute
+        http(s) links without fragments
+    """
+    parser = _PageExtractor(base_url, remove_boilerplate)
+    parser.feed(html)
+    parser.close()
+
+    lines = parser.lines
+    title = WHITESPACE.sub(" ", parser.title).strip()
+    if title and (not lines or lines[0].lstrip("# ") != title):
+        lines = [f"Title: {title}"] + lines
+    return truncate_to_budget("\n".join(lines), max_tokens), parser.links
+
+
+def extract_text(html: str, max_tokens: int = EXTRACT_MAX_TOKENS) -> str:
+    """
+    Extract the prompt text of an HTML page.
+
+    Args:
+        html: The HTML content
+        max_tokens: Approximate token budget for the text
+
+    Returns:
+        The page text without scripts and boilerplate
+    """
+    return extract_page(html, max_tokens=max_tokens)[0]
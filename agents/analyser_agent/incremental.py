@@ -0,0 +1,201 @@
+"""
+Incremental website analysis for the Analyser Agent.
+This module splits a page into heading sections and fingerprints each one, so a
+re-check only sends the sections that changed to Gemini and merges the new findings
+with the stored ones. A page whose sections are all unchanged needs no Gemini call.
+"""
+
+import json
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from .cache import MODEL_VERSION, PROMPT_VERSION, normalize_url
+from .chunking import unique_findings
+from .database import get_database
+from .gemini_client import generate_content
+from .html_extract import HEADING, WHITESPACE
+from .subagents.website_analyser_agent.website_act_agent.prompt import WEBSITE_GUIDELINES, WEBSITE_SECTION_ANALYSIS_PROMPT
+from .subagents.website_analyser_agent.website_act_agent.tools import get_website_data
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INTRO_HEADING = "(page introduction)"
+
+
+class SectionFindings(BaseModel):
+    """Findings for one reviewed section."""
+    section_id: int = Field(..., description="Number of the reviewed section.")
+    conflicts: List[str] = Field(..., description="Conflicts with the guidelines found in this section.")
+    suggestions: List[str] = Field(..., description="Suggestions to improve this section.")
+
+
+class SectionedOutput(BaseModel):
+    """Output of a section-by-section website analysis."""
+    sections: List[SectionFindings] = Field(..., description="Findings for each reviewed section.")
+    page_conflicts: List[str] = Field(..., description="Conflicts that concern the page as a whole.")
+    page_suggestions: List[str] = Field(..., description="Suggestions that concern the page as a whole.")
+    summary: str = Field(..., description="Summary of the whole page.")
+    score: int = Field(..., description="Overall score of the page based on the guidelines (0-100).")
+    guidelines: List[str] = Field(..., description="Guidelines used for the analysis.")
+
+
+@dataclass
+class Section:
+    """A heading and the text under it."""
+    heading: str
+    text: str
+    fingerprint: str
+
+
+def fingerprint_text(text: str) -> str:
+    """Hash text after normalizing case and whitespace, so reflowed markup does not count as a change."""
+    return hashlib.sha256(WHITESPACE.sub(" ", text).strip().lower().encode("utf-8")).hexdigest()
+
+
+def split_sections(text: str) -> List[Section]:
+    """
+    Split extracted page text into sections at its heading lines.
+
+    Args:
+        text: Page text from html_extract, with headings as Markdown
+
+    Returns:
+        The sections in page order; text before the first heading forms the first section
+    """
+    sections, heading, lines = [], INTRO_HEADING, []
+    for line in text.splitlines():
+        if HEADING.match(line):
+            if lines:
+                sections.append((heading, lines))
+            heading, lines = line.lstrip("# ").strip(), [line]
+        elif line.strip():
+            lines.append(line)
+    if lines:
+        sections.append((heading, lines))
+    return [Section(heading, "\n".join(body), fingerprint_text("\n".join(body))) for heading, body in sections]
+
+
+def context_key(guidelines: Optional[str]) -> str:
+    """Key of everything besides the page that the findings depend on."""
+    key_material = {
+        "guidelines": [WEBSITE_GUIDELINES, guidelines or ""],
+        "prompt_version": PROMPT_VERSION,
+        "model": MODEL_VERSION,
+    }
+    return hashlib.sha256(json.dumps(key_material, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def build_section_prompt(url: str,
+                         sections: List[Section],
+                         review_ids: List[int],
+                         previous: Optional[Dict[str, Any]],
+                         known: Dict[str, Dict[str, Any]],
+                         guidelines: Optional[str]) -> str:
+    """
+    Build the prompt for a section-by-section analysis.
+
+    Args:
+        url: The website URL
+        sections: All sections of the page
+        review_ids: Indexes of the sections to send for review
+        previous: The stored result of the previous analysis, if any
+        known: Stored findings of the unchanged sections, keyed by fingerprint
+        guidelines: Per-request guidelines, if any
+
+    Returns:
+        The prompt text
+    """
+    prompt = WEBSITE_SECTION_ANALYSIS_PROMPT + f"\n\nYou must use the following guidelines for the Website: {WEBSITE_GUIDELINES}"
+    if guidelines:
+        prompt += f"\n\nAlso apply these additional guidelines: {guidelines}"
+    prompt += f"\n\nWebsite URL: {url}\n\nPage outline:\n"
+    prompt += "\n".join(
+        f"[{i}] {section.heading}" + ("" if i in review_ids else " (unchanged)")
+        for i, section in enumerate(sections)
+    )
+
+    if previous:
+        prompt += f"\n\nPrevious analysis of this page:\nSummary: {previous['output']['summary']}\nScore: {previous['output']['score']}"
+        prompt += f"\nPage conflicts: {json.dumps(previous['page_conflicts'])}\nPage suggestions: {json.dumps(previous['page_suggestions'])}"
+        prompt += "\nFindings for the unchanged sections:"
+        for i, section in enumerate(sections):
+            if i not in review_ids:
+                findings = known[section.fingerprint]
+                prompt += f"\n[{i}] conflicts: {json.dumps(findings['conflicts'])}; suggestions: {json.dumps(findings['suggestions'])}"
+
+    prompt += "\n\nSections to review:"
+    for i in review_ids:
+        prompt += f"\n\n=== [{i}] ===\n{sections[i].text}"
+    return prompt
+
+
+async def get_incremental_website_analysis(url: str, guidelines: Optional[str] = None) -> dict:
+    """
+    Analyze a website, re-reviewing only the sections that changed since its last analysis.
+
+    Args:
+        url: The URL of the website to analyze
+        guidelines: Additional guidelines provided with the request
+
+    Returns:
+        The analysis as an AgentOutput dict, with an "incremental" entry describing what was re-reviewed
+    """
+    logger.info(f"Getting incremental website analysis for: {url}")
+    db = get_database()
+
+    text = await get_website_data(url)
+    sections = split_sections(text)
+    page_key = normalize_url(url)
+    key = context_key(guidelines)
+
+    stored = await db.get_website_fingerprint_async(page_key)
+    if stored and stored["context_key"] != key:
+        logger.info(f"Guidelines, prompt or model changed since the last analysis of {url}, re-reviewing every section")
+        stored = None
+
+    known = {section["fingerprint"]: section for section in stored["sections"]} if stored else {}
+    review_ids = [i for i, section in enumerate(sections) if section.fingerprint not in known]
+
+    stats = {"sections": len(sections), "reviewed": len(review_ids)}
+    if stored and set(known) == {section.fingerprint for section in sections}:
+        logger.info(f"No sections of {url} changed, reusing the previous analysis")
+        return {**stored["result"]["output"], "incremental": {"mode": "unchanged", **stats}}
+
+    # Sections the model must review (every section on a first analysis)
+    previous = stored["result"] if stored else None
+    prompt = build_section_prompt(url, sections, review_ids, previous, known, guidelines)
+    logger.info(f"Reviewing {len(review_ids)} of {len(sections)} sections of {url} with Gemini")
+    response = await generate_content(prompt, generation_config={"response_mime_type": "application/json", "response_schema": SectionedOutput})
+    analysis = SectionedOutput.model_validate_json(response.text)
+
+    # Merge: new findings for reviewed sections, stored findings for the rest
+    reviewed = {findings.section_id: findings for findings in analysis.sections}
+    merged_sections = []
+    for i, section in enumerate(sections):
+        if i in reviewed:
+            findings = {"conflicts": reviewed[i].conflicts, "suggestions": reviewed[i].suggestions}
+        elif section.fingerprint in known:
+            findings = {field: known[section.fingerprint][field] for field in ("conflicts", "suggestions")}
+        else:
+            logger.warning(f"Gemini returned no findings for section [{i}] of {url}")
+            findings = {"conflicts": [], "suggestions": []}
+        merged_sections.append({"heading": section.heading, "fingerprint": section.fingerprint, **findings})
+
+    output = {
+        "conflicts": unique_findings(analysis.page_conflicts + [item for section in merged_sections for item in section["conflicts"]]),
+        "suggestions": unique_findings(analysis.page_suggestions + [item for section in merged_sections for item in section["suggestions"]]),
+        "summary": analysis.summary,
+        "score": analysis.score,
+        "guidelines": analysis.guidelines,
+    }
+    result = {"output": output, "page_conflicts": analysis.page_conflicts, "page_suggestions": analysis.page_suggestions}
+    await db.store_website_fingerprint_async(page_key, key, fingerprint_text(text), merged_sections, result)
+
+    logger.info("Incremental website analysis generated successfully")
+    return {**output, "incremental": {"mode": "partial" if stored else "full", **stats}}
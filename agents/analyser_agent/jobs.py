@@ -0,0 +1,447 @@
+"""
+Background job queue for the Analyser Agent.
+This module runs long analyses on a bounded pool of in-process workers so the
+HTTP request that submitted them can return immediately. Job records live in a
+job store: in memory, or in a SQLite database shared by every server process.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+from .database import DB_FILE
+from .executor import run_blocking
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Job configuration
+JOB_WORKERS = int(os.getenv("ANALYSER_JOB_WORKERS", 4))
+JOB_QUEUE_SIZE = int(os.getenv("ANALYSER_JOB_QUEUE_SIZE", 100))
+JOB_TTL_SECONDS = int(os.getenv("ANALYSER_JOB_TTL", 3600))
+JOB_STORE = os.getenv("ANALYSER_JOB_STORE", "memory").lower()
+JOB_DB_FILE = os.getenv("ANALYSER_JOB_DB", os.path.join(os.path.dirname(DB_FILE), "analysis_jobs.db"))
+JOB_POLL_INTERVAL = float(os.getenv("ANALYSER_JOB_POLL_INTERVAL", 0.5))
+JOB_BUSY_TIMEOUT_MS = 5000
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED)
+JOB_STATES = (JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED)
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class MemoryJobStore:
+    """Job records held in this process's memory."""
+
+    shared = False
+
+    def __init__(self):
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+
+    def put(self, job: Dict[str, Any]):
+        """Insert or replace a job record."""
+        self.jobs[job["job_id"]] = dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a job record, or None if not found."""
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    def counts(self) -> Dict[str, int]:
+        """Count jobs by state."""
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self.jobs.values():
+            counts[job["status"]] += 1
+        return counts
+
+    def purge(self, cutoff: float) -> int:
+        """Forget finished jobs that finished before the cutoff and return how many were removed."""
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job["status"] in FINISHED_STATES and job["finished_at"] < cutoff
+        ]
+        for job_id in expired:
+            self.jobs.pop(job_id, None)
+        return len(expired)
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    """Whether a process with this ID is running on this host."""
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SqliteJobStore:
+    """
+    Job records in a SQLite database in WAL mode, shared by every server process on the host.
+
+    Each record keeps the ID of the process running the job, so a job left unfinished by
+    a worker process that exited is reported as failed instead of running forever.
+    """
+
+    shared = True
+
+    def __init__(self, db_path: str = JOB_DB_FILE):
+        """
+        Initialize the store.
+
+        Args:
+            db_path: Path to the job database file
+        """
+        self.db_path = db_path
+        self._ensure_db_exists()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection that waits for other processes' writes instead of failing."""
+        conn = sqlite3.connect(self.db_path, timeout=JOB_BUSY_TIMEOUT_MS / 1000)
+        conn.execute(f"PRAGMA busy_timeout = {JOB_BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _ensure_db_exists(self):
+        """Create the jobs table if it doesn't exist and switch the database to WAL mode."""
+        conn = None
+        try:
+            conn = self._connect()
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_jobs (
+                job_id TEXT PRIMARY KEY,
+                status TEXT,
+                created_at REAL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,       -- JSON analysis response
+                error TEXT,        -- JSON error details
+                pid INTEGER        -- process running the job
+            )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_analysis_jobs_finished ON analysis_jobs (status, finished_at)')
+            conn.commit()
+            logger.info(f"Job store initialized at {self.db_path}")
+        finally:
+            if conn:
+                conn.close()
+
+    def put(self, job: Dict[str, Any]):
+        """Insert or replace a job record, owned by this process."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                '''INSERT OR REPLACE INTO analysis_jobs
+                   (job_id, status, created_at, started_at, finished_at, result, error, pid)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                (
+                    job["job_id"], job["status"], job["created_at"], job["started_at"], job["finished_at"],
+                    json.dumps(job["result"], default=str) if job["result"] is not None else None,
+                    json.dumps(job["error"]) if job["error"] is not None else None,
+                    os.getpid(),
+                ),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record, or None if not found."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT job_id, status, created_at, started_at, finished_at, result, error, pid FROM analysis_jobs WHERE job_id = ?',
+                (job_id,),
+            ).fetchone()
+            if not row:
+                return None
+            job = {
+                "job_id": row[0],
+                "status": row[1],
+                "created_at": row[2],
+                "started_at": row[3],
+                "finished_at": row[4],
+                "result": json.loads(row[5]) if row[5] else None,
+                "error": json.loads(row[6]) if row[6] else None,
+            }
+            if job["status"] not in FINISHED_STATES and not _pid_alive(row[7]):
+                logger.warning(f"Analysis job {job_id} was left {job['status']} by worker process {row[7]}, which exited")
+                job["status"] = JOB_FAILED
+                job["finished_at"] = time.time()
+                job["error"] = {"message": "The worker process running the job exited", "error_type": "WorkerExited"}
+                conn.execute(
+                    'UPDATE analysis_jobs SET status = ?, finished_at = ?, error = ? WHERE job_id = ?',
+                    (job["status"], job["finished_at"], json.dumps(job["error"]), job_id),
+                )
+                conn.commit()
+            return job
+        finally:
+            conn.close()
+
+    def counts(self) -> Dict[str, int]:
+        """Count jobs by state across all processes."""
+        conn = self._connect()
+        try:
+            counts = {state: 0 for state in JOB_STATES}
+            for status, count in conn.execute('SELECT status, COUNT(*) FROM analysis_jobs GROUP BY status'):
+                counts[status] = count
+            return counts
+        finally:
+            conn.close()
+
+    def purge(self, cutoff: float) -> int:
+        """Delete finished jobs that finished before the cutoff and return how many were removed."""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f'DELETE FROM analysis_jobs WHERE status IN ({",".join("?" * len(FINISHED_STATES))}) AND finished_at < ?',
+                (*FINISHED_STATES, cutoff),
+            )
+            conn.commit()
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+
+def create_job_store():
+    """Create the job store selected by ANALYSER_JOB_STORE (memory or sqlite)."""
+    if JOB_STORE == "sqlite":
+        return SqliteJobStore(JOB_DB_FILE)
+    if JOB_STORE != "memory":
+        logger.warning(f"Unknown ANALYSER_JOB_STORE '{JOB_STORE}', keeping jobs in memory")
+    return MemoryJobStore()
+
+
+class JobManager:
+    """
+    Bounded in-process job queue drained by a fixed pool of asyncio workers.
+
+    Jobs run in the process that accepted them; their records are kept in a job store,
+    so with a shared store any server process can report a job's status and result.
+    """
+
+    def __init__(self,
+                 handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 workers: int = JOB_WORKERS,
+                 queue_size: int = JOB_QUEUE_SIZE,
+                 ttl: int = JOB_TTL_SECONDS,
+                 store=None):
+        """
+        Initialize the job manager.
+
+        Args:
+            handler: Coroutine function called with a job payload, returning the job result
+            workers: Number of concurrent workers draining the queue
+            queue_size: Maximum number of jobs waiting to run
+            ttl: Seconds a finished job is kept before it is forgotten
+            store: Job record store (defaults to the store selected by ANALYSER_JOB_STORE)
+        """
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.ttl = ttl
+        self.store = store if store is not None else create_job_store()
+        # Records of the jobs accepted by this process and not yet forgotten
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks = []
+
+    async def _call_store(self, func, *args):
+        """Call a job store method, off the event loop when the store does I/O."""
+        if self.store.shared:
+            return await run_blocking(func, *args)
+        return func(*args)
+
+    async def start(self):
+        """Start the worker pool if it is not already running."""
+        if self._worker_tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i), name=f"analysis-job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} analysis job workers (queue size {self.queue_size})")
+
+    async def stop(self):
+        """Cancel the workers; running jobs are recorded as failed and queued jobs that have not started are dropped."""
+        if not self._worker_tasks:
+            return
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        logger.info("Analysis job workers stopped")
+
+    async def submit(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a job for background execution.
+
+        Args:
+            payload: The arguments passed to the handler
+
+        Returns:
+            The newly created job record
+
+        Raises:
+            JobQueueFullError: If the queue is at capacity
+        """
+        await self.start()
+        await self._purge_expired()
+
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "status": JOB_QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+
+        # Take the queue slot before awaiting anything, so concurrent submits cannot overfill it
+        recorded = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((job_id, payload, recorded))
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"Job queue is full ({self.queue_size} jobs waiting)")
+        self.jobs[job_id] = job
+        self._events[job_id] = asyncio.Event()
+
+        # Store the record before a worker may start the job, so any process can find it once its ID is returned
+        try:
+            await self._call_store(self.store.put, dict(job))
+        except BaseException:
+            # The worker skips jobs it no longer knows
+            self.jobs.pop(job_id, None)
+            self._events.pop(job_id, None)
+            raise
+        finally:
+            recorded.set_result(None)
+        logger.info(f"Queued analysis job {job_id} ({self._queue.qsize()} waiting)")
+        return dict(job)
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a job record by ID.
+
+        Args:
+            job_id: The job identifier
+
+        Returns:
+            A copy of the job record or None if not found
+        """
+        job = self.jobs.get(job_id)
+        if job:
+            return dict(job)
+        return await self._call_store(self.store.get, job_id)
+
+    async def wait_for_job(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait until a job finishes or the timeout expires.
+
+        Jobs running in this process are awaited directly; jobs running in another
+        process are polled in the shared store.
+
+        Args:
+            job_id: The job identifier
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            The job record (finished or not) or None if not found
+        """
+        event = self._events.get(job_id)
+        if event and timeout > 0:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            return await self.get_job(job_id)
+
+        job = await self.get_job(job_id)
+        deadline = time.monotonic() + timeout
+        while job and job["status"] not in FINISHED_STATES and time.monotonic() < deadline:
+            await asyncio.sleep(min(JOB_POLL_INTERVAL, max(0.0, deadline - time.monotonic())))
+            job = await self.get_job(job_id)
+        return job
+
+    async def stats(self) -> Dict[str, Any]:
+        """Return counts of jobs by state and this process's queue depth."""
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "queue_size": self.queue_size,
+            "store": "sqlite" if self.store.shared else "memory",
+            "jobs": await self._call_store(self.store.counts),
+        }
+
+    async def _worker(self, index: int):
+        """Drain the queue, running one job at a time."""
+        while True:
+            job_id, payload, recorded = await self._queue.get()
+            try:
+                await recorded
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                job["status"] = JOB_RUNNING
+                job["started_at"] = time.time()
+                await self._save(job)
+                logger.info(f"Worker {index} running analysis job {job_id}")
+                try:
+                    job["result"] = await self.handler(payload)
+                    job["status"] = JOB_COMPLETED
+                except asyncio.CancelledError:
+                    # The workers are being stopped: record the job as failed so waiters and pollers see it end
+                    logger.warning(f"Analysis job {job_id} cancelled while running")
+                    job["error"] = {"message": "The job was cancelled because the server is shutting down", "error_type": "CancelledError"}
+                    job["status"] = JOB_FAILED
+                    job["finished_at"] = time.time()
+                    await self._save(job)
+                    self._events[job_id].set()
+                    raise
+                except Exception as e:
+                    logger.error(f"Analysis job {job_id} failed: {str(e)}", exc_info=True)
+                    job["error"] = {"message": str(e), "error_type": type(e).__name__}
+                    job["status"] = JOB_FAILED
+                job["finished_at"] = time.time()
+                await self._save(job)
+                logger.info(f"Analysis job {job_id} {job['status']} in {job['finished_at'] - job['started_at']:.1f}s")
+                self._events[job_id].set()
+            finally:
+                self._queue.task_done()
+
+    async def _save(self, job: Dict[str, Any]):
+        """Write a job record to the store; a store error is logged and does not fail the job."""
+        try:
+            await self._call_store(self.store.put, job)
+        except Exception as e:
+            logger.error(f"Error saving analysis job {job['job_id']}: {str(e)}")
+
+    async def _purge_expired(self):
+        """Forget finished jobs older than the TTL."""
+        cutoff = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self.jobs.items() if job["status"] in FINISHED_STATES and job["finished_at"] < cutoff]:
+            self.jobs.pop(job_id, None)
+            self._events.pop(job_id, None)
+        expired = await self._call_store(self.store.purge, cutoff)
+        if expired:
+            logger.info(f"Purged {expired} expired analysis jobs")
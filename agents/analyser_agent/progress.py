@@ -0,0 +1,162 @@
+"""
+Progress streaming for the Analyser Agent.
+This module streams what an analysis is doing while it runs. Code anywhere below a
+request reports stage events with report_progress(), which does nothing unless the
+request is streaming; stream_progress() runs the analysis as a task and yields the
+reported events as server-sent events, ending with the result. A client that
+disconnects cancels the analysis.
+"""
+
+import os
+import json
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from google.adk.events import Event
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Progress streaming configuration
+SSE_KEEPALIVE_SECONDS = float(os.getenv("ANALYSER_SSE_KEEPALIVE", 15))
+PROGRESS_QUEUE_SIZE = 1000
+
+# Response headers that keep proxies from buffering or caching the stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+# The progress queue of the streaming request the current task belongs to
+_progress_queue: ContextVar[Optional[asyncio.Queue]] = ContextVar("analysis_progress", default=None)
+
+
+def is_streaming() -> bool:
+    """Return whether the current task belongs to a streaming request."""
+    return _progress_queue.get() is not None
+
+
+def report_progress(stage: str, **data: Any):
+    """
+    Report a stage event to the streaming request the current task belongs to, if any.
+
+    Progress is best effort: events are dropped if the client falls too far behind.
+
+    Args:
+        stage: The SSE event name (e.g. "tool_started")
+        **data: JSON-serializable event fields
+    """
+    queue = _progress_queue.get()
+    if queue is None:
+        return
+    try:
+        queue.put_nowait((stage, data))
+    except asyncio.QueueFull:
+        pass
+
+
+def _text(event: Event) -> str:
+    """Join the non-thought text parts of an event."""
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text for part in event.content.parts if part.text and not part.thought)
+
+
+def report_event(event: Event):
+    """
+    Report the stages visible in an agent event: routing, tool calls and partial text.
+
+    Args:
+        event: An event yielded by the runner
+    """
+    if not is_streaming():
+        return
+    if event.partial:
+        text = _text(event)
+        if text:
+            report_progress("partial_text", author=event.author, text=text)
+        return
+    for call in event.get_function_calls():
+        if call.name == "transfer_to_agent":
+            report_progress("routing", author=event.author, agent=(call.args or {}).get("agent_name"))
+        else:
+            report_progress("tool_started", author=event.author, tool=call.name)
+    for response in event.get_function_responses():
+        if response.name != "transfer_to_agent":
+            report_progress("tool_finished", author=event.author, tool=response.name)
+    if event.is_final_response() and _text(event):
+        report_progress("agent_response", author=event.author, text=_text(event))
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    Encode a server-sent event.
+
+    Args:
+        event: The event name
+        data: The JSON-serializable event data
+
+    Returns:
+        The encoded event
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def stream_progress(run: Callable[[], Awaitable[Dict[str, Any]]],
+                          started: Optional[Dict[str, Any]] = None,
+                          keepalive: float = SSE_KEEPALIVE_SECONDS) -> AsyncIterator[str]:
+    """
+    Run an analysis as a task and stream its progress as server-sent events.
+
+    The stream opens with a "started" event, then carries the stage events reported by
+    the analysis and ends with a "result" event holding its return value, or an "error"
+    event. Comment lines keep the connection alive during long silent stages. If the
+    stream is closed early, because the client disconnected, the analysis is cancelled.
+
+    Args:
+        run: Coroutine function running the analysis
+        started: Fields of the opening "started" event
+        keepalive: Seconds of silence before a keep-alive comment is sent
+
+    Yields:
+        Encoded server-sent events
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=PROGRESS_QUEUE_SIZE)
+    # The task copies the current context, so everything it runs reports to this queue
+    token = _progress_queue.set(queue)
+    try:
+        task = asyncio.create_task(run())
+    finally:
+        _progress_queue.reset(token)
+
+    get: Optional[asyncio.Future] = None
+    try:
+        yield format_sse("started", started or {})
+        while not task.done():
+            get = get or asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({get, task}, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED)
+            if get in done:
+                yield format_sse(*get.result())
+                get = None
+            elif not done:
+                yield ": keep-alive\n\n"
+        if get is not None and get.done():
+            yield format_sse(*get.result())
+            get = None
+        while not queue.empty():
+            yield format_sse(*queue.get_nowait())
+
+        if task.cancelled():
+            yield format_sse("error", {"message": "Analysis cancelled", "error_type": "CancelledError"})
+        elif task.exception() is not None:
+            error = task.exception()
+            logger.error(f"Error in streamed analysis: {str(error)}")
+            yield format_sse("error", {"message": str(error), "error_type": type(error).__name__})
+        else:
+            yield format_sse("result", task.result())
+    finally:
+        if get is not None:
+            get.cancel()
+        if not task.done():
+            logger.info("Stream closed before the analysis finished, cancelling it")
+            task.cancel()
@@ -0,0 +1,139 @@
+"""
+Result parsing for the Analyser Agent.
+This module turns the output of an analysis run into a validated AgentOutput dict.
+"""
+
+import ast
+import json
+import logging
+from typing import Dict, Any, Optional, List, Tuple
+
+from pydantic import AliasChoices, BaseModel, Field, ValidationError, field_validator
+
+from .subagents.ad_video_analyser_agent.video_response_agent.agent import AgentOutput as VideoAgentOutput
+from .subagents.instapost_analyser_agent.insta_response_agent.agent import AgentOutput as InstaAgentOutput
+from .subagents.website_analyser_agent.website_response_agent.agent import AgentOutput as WebsiteAgentOutput
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Output schema of each pipeline, keyed by content type
+OUTPUT_MODELS = {
+    "video": VideoAgentOutput,
+    "image": InstaAgentOutput,
+    "website": WebsiteAgentOutput,
+}
+
+
+class AnalysisResult(BaseModel):
+    """
+    Normalized analysis result stored in the database.
+    Accepts the output of any pipeline, including the video pipeline's video_summary field.
+    """
+    conflicts: List[str] = Field(default_factory=list, description="List of conflicts or issues found in the content.")
+    suggestions: List[str] = Field(default_factory=list, description="List of suggestions to improve the content.")
+    summary: str = Field("", validation_alias=AliasChoices("summary", "video_summary"), description="Summary of the content.")
+    score: float = Field(0.0, description="Overall score based on the analyses (0-100).")
+    guidelines: List[str] = Field(default_factory=list, description="Guidelines used for the analysis.")
+
+    @field_validator("conflicts", "suggestions", "guidelines", mode="before")
+    @classmethod
+    def _coerce_list(cls, value):
+        """Accept a single string or None where a list is expected."""
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [value]
+        return [str(item) for item in value]
+
+
+def _strip_code_fence(text: str) -> str:
+    """Remove a surrounding markdown code fence (```json ... ```) if present."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def _load_message(message: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode a model message into a dict.
+
+    Tries strict JSON first, then a Python literal for legacy output, then the
+    outermost {...} block embedded in surrounding prose.
+
+    Args:
+        message: The final model message
+
+    Returns:
+        The decoded dict or None if the message does not contain one
+    """
+    text = _strip_code_fence(message or "")
+    if not text:
+        return None
+
+    candidates = [text]
+    start, end = text.find("{"), text.rfind("}")
+    if 0 <= start < end and (start, end) != (0, len(text) - 1):
+        candidates.append(text[start:end + 1])
+
+    for candidate in candidates:
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            try:
+                data = ast.literal_eval(candidate)
+            except (ValueError, SyntaxError, MemoryError, RecursionError):
+                continue
+        if isinstance(data, dict):
+            return data
+    return None
+
+
+def parse_analysis_result(result: Dict[str, Any], pipeline: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Extract the analysis output from a task manager result.
+
+    The structured final_output captured from session state is used when present; the
+    final message text is only decoded when it is missing. The output must match the
+    pipeline's own schema (or at least carry a score on the routed path), so malformed
+    output is reported as a parse error rather than stored with default values.
+
+    Args:
+        result: The task manager result (message, status, data)
+        pipeline: The pipeline that produced the result, used to pick its output schema
+
+    Returns:
+        Tuple of (normalized AnalysisResult dict or None, parse error message or None)
+    """
+    final_output = result.get("data", {}).get("final_output")
+    if isinstance(final_output, dict):
+        source, data = "final_output", final_output
+    else:
+        source, data = "message", _load_message(result.get("message", ""))
+        if data is None:
+            return None, "No structured output found in the analysis result"
+
+    content_type = (pipeline or "").split("_")[0]
+    output_model = OUTPUT_MODELS.get(content_type)
+
+    # Validate against the pipeline's own output schema, which has no defaults
+    if output_model is not None:
+        try:
+            output_model.model_validate(data)
+        except ValidationError as e:
+            logger.warning(f"Analysis {source} does not match the {content_type} output schema: {e.error_count()} errors")
+            return None, f"{source}: {e.error_count()} validation errors against the {content_type} output schema"
+    elif "score" not in data:
+        return None, f"{source}: missing score"
+
+    try:
+        parsed = AnalysisResult.model_validate(data)
+    except ValidationError as e:
+        return None, f"{source}: {e.error_count()} validation errors"
+
+    logger.info(f"Parsed analysis result from {source}")
+    return parsed.model_dump(), None
@@ -0,0 +1,129 @@
+"""
+Server for the Analyser Agent (pre MLR version).
+This module builds the agent's A2A server with API endpoints and serves it, in one
+process or in ANALYSER_WORKERS worker processes sharing the same port. It lives
+outside __main__ so worker processes can import their entry point.
+"""
+
+import os
+import logging
+import uvicorn
+import asyncio
+from fastapi.middleware.cors import CORSMiddleware
+
+# Use relative imports within the agent package
+from .task_manager import TaskManager
+from .agent import root_agent, PIPELINES
+from .api import create_api_router
+from .uploads import UploadSizeLimitMiddleware
+from .supervisor import bind_socket, run_workers
+from .sessions import SESSION_DB_URL, SharedSessionService
+from .jobs import JOB_DB_FILE, SqliteJobStore
+from common.a2a_server import create_agent_server
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler()],
+)
+logger = logging.getLogger(__name__)
+
+async def main(sockets=None):
+    """
+    Initialize and start the Analyser Agent server (pre MLR implementation).
+    
+    Args:
+        sockets: Listening sockets bound by the supervisor in multi-worker mode
+            (None binds ANALYSER_A2A_HOST and ANALYSER_A2A_PORT)
+    """
+
+    logger.info("Starting Analyser Agent A2A Server initialization...")
+    
+    # Await the root_agent coroutine to get the actual agent and exit_stack
+    logger.info("Awaiting root_agent creation...")
+    agent_instance = await root_agent
+    logger.info(f"Agent instance created: {agent_instance.name}")
+
+    # Initialize the TaskManager with the resolved agent instance
+    task_manager_instance = await TaskManager.create(agent=agent_instance, pipelines=PIPELINES)
+    logger.info("TaskManager initialized with agent instance.")
+
+    # Configuration for the A2A server
+    host = os.getenv("ANALYSER_A2A_HOST", "127.0.0.1")
+    port = int(os.getenv("ANALYSER_A2A_PORT", 8003))
+    
+    # Create the FastAPI app
+    app = create_agent_server(
+        name=agent_instance.name,
+        description=agent_instance.description,
+        task_manager=task_manager_instance 
+    )
+    
+    # Add API router
+    api_router = create_api_router(task_manager_instance)
+    app.include_router(api_router)
+    
+    # Reject oversized uploads before the body is buffered
+    app.add_middleware(UploadSizeLimitMiddleware)
+    
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Allows all origins
+        allow_credentials=True,
+        allow_methods=["*"],  # Allows all methods
+        allow_headers=["*"],  # Allows all headers
+        expose_headers=["X-Next-Cursor"],  # Pagination cursor of GET /analysis
+    )
+    
+    logger.info(f"Analyser Agent A2A server with API endpoints starting on {host}:{port}")
+    
+    # Configure uvicorn
+    config = uvicorn.Config(app, host=host, port=port, log_level="info")
+    server = uvicorn.Server(config)
+    
+    # Run the server
+    await server.serve(sockets=sockets)
+    
+    # This part will be reached after the server is stopped (e.g., Ctrl+C)
+    logger.info("Analyser Agent A2A server stopped.")
+
+def run_worker(sock, index: int):
+    """
+    Serve requests from a socket shared with the other worker processes.
+    
+    Args:
+        sock: The listening socket bound by the supervisor
+        index: The worker's index
+    """
+    logger.info(f"Worker {index} starting (pid {os.getpid()})")
+    try:
+        asyncio.run(main(sockets=[sock]))
+    except KeyboardInterrupt:
+        pass
+
+def serve_workers(workers: int):
+    """
+    Serve with several worker processes behind one port.
+    
+    Sessions and job records must be visible to every worker, so they default to the
+    shared database stores; the workers inherit these settings from the environment.
+    
+    Args:
+        workers: Number of worker processes
+    """
+    os.environ.setdefault("ANALYSER_SESSION_STORE", "database")
+    os.environ.setdefault("ANALYSER_JOB_STORE", "sqlite")
+    if os.environ["ANALYSER_SESSION_STORE"] != "database" or os.environ["ANALYSER_JOB_STORE"] != "sqlite":
+        logger.warning("Sessions or jobs are kept per process; a session_id or job_id only works on the worker that created it")
+    
+    # Create the shared tables once, before the workers race to create them
+    if os.environ["ANALYSER_SESSION_STORE"] == "database":
+        SharedSessionService(SESSION_DB_URL).db_engine.dispose()
+    if os.environ["ANALYSER_JOB_STORE"] == "sqlite":
+        SqliteJobStore(JOB_DB_FILE)
+    
+    host = os.getenv("ANALYSER_A2A_HOST", "127.0.0.1")
+    port = int(os.getenv("ANALYSER_A2A_PORT", 8003))
+    run_workers(run_worker, workers, bind_socket(host, port))
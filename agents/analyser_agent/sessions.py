@@ -0,0 +1,511 @@
+"""
+Bounded session store for the Analyser Agent.
+This module keeps ADK sessions in memory within a byte budget: sessions idle for
+longer than a TTL are dropped and the least recently used sessions are evicted when
+the budget is exceeded, optionally spilling them to sessions.db so they can be
+restored when the client comes back. When several server processes must see the
+same sessions, the database session store keeps them all in sessions.db instead.
+"""
+
+import os
+import copy
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.database_session_service import Base, DatabaseSessionService, StorageEvent, StorageSession
+from sqlalchemy import create_engine, delete, event as sqlalchemy_event, func, select, update
+from sqlalchemy.orm import sessionmaker
+
+from .executor import run_blocking
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Session database file, next to the package like the analysis results database
+SESSION_DB_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "sessions.db")
+
+# Session store configuration: "memory" (bounded, per process) or "database" (shared)
+SESSION_STORE = os.getenv("ANALYSER_SESSION_STORE", "memory").lower()
+SESSION_MAX_MB = float(os.getenv("ANALYSER_SESSION_MAX_MB", 64))
+SESSION_TTL_SECONDS = int(os.getenv("ANALYSER_SESSION_TTL", 3600))
+SESSION_SPILL = os.getenv("ANALYSER_SESSION_SPILL", "false").lower() in ("1", "true", "yes")
+SESSION_DB_URL = os.getenv("ANALYSER_SESSION_DB_URL", f"sqlite:///{SESSION_DB_FILE}")
+
+SESSION_BUSY_TIMEOUT_MS = 5000
+
+SessionKey = Tuple[str, str, str]
+
+
+def _sqlite_connect_args(db_url: str) -> Dict[str, Any]:
+    """Connection arguments letting pooled SQLite connections move between worker threads."""
+    return {"check_same_thread": False} if db_url.startswith("sqlite") else {}
+
+
+def _tune_sqlite(dbapi_connection, connection_record):
+    """Put a new SQLite connection in WAL mode and make it wait for other processes' writes."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute(f"PRAGMA busy_timeout = {SESSION_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.close()
+
+
+def _run_to_completion(coroutine):
+    """
+    Run a coroutine that never suspends, such as a DatabaseSessionService method, to completion.
+
+    DatabaseSessionService's coroutines do blocking SQLAlchemy I/O without awaiting
+    anything, so they are driven here on a pool thread instead of on the event loop.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("Session store coroutine suspended unexpectedly")
+
+
+def _delete_stored_session(db, app_name: str, user_id: str, session_id: str):
+    """
+    Delete a stored session and its events within a transaction.
+
+    Events are deleted explicitly: SQLite does not cascade the session's deletion to
+    its events unless foreign keys are enabled on the connection.
+    """
+    db.execute(delete(StorageEvent).where(
+        StorageEvent.app_name == app_name,
+        StorageEvent.user_id == user_id,
+        StorageEvent.session_id == session_id,
+    ))
+    db.execute(delete(StorageSession).where(
+        StorageSession.app_name == app_name,
+        StorageSession.user_id == user_id,
+        StorageSession.id == session_id,
+    ))
+
+
+def _event_size(event: Event) -> int:
+    """Approximate bytes held by an event, measured as its JSON size."""
+    return len(event.model_dump_json(exclude_none=True))
+
+
+def _session_size(session: Session) -> int:
+    """Approximate bytes held by a session and its events."""
+    return len(session.model_dump_json(exclude_none=True))
+
+
+class SessionSpillStore:
+    """Evicted sessions saved in the ADK database session schema."""
+
+    def __init__(self, db_url: str = SESSION_DB_URL):
+        """
+        Open the session database and create its tables if needed.
+
+        Args:
+            db_url: SQLAlchemy URL of the session database
+        """
+        self.engine = create_engine(db_url, connect_args=_sqlite_connect_args(db_url))
+        if db_url.startswith("sqlite"):
+            sqlalchemy_event.listen(self.engine, "connect", _tune_sqlite)
+        Base.metadata.create_all(self.engine)
+        self.factory = sessionmaker(bind=self.engine)
+
+    def save(self, session: Session, ttl_seconds: int = SESSION_TTL_SECONDS):
+        """
+        Save a session with its events, replacing any stored copy, and purge expired sessions.
+
+        Args:
+            session: The session to save
+            ttl_seconds: Stored sessions idle for longer than this are deleted
+        """
+        with self.factory() as db:
+            _delete_stored_session(db, session.app_name, session.user_id, session.id)
+            db.add(StorageSession(
+                app_name=session.app_name,
+                user_id=session.user_id,
+                id=session.id,
+                state=session.state,
+                update_time=datetime.fromtimestamp(session.last_update_time or time.time()),
+            ))
+            db.add_all(StorageEvent.from_event(session, event) for event in session.events)
+
+            if ttl_seconds > 0:
+                cutoff = datetime.fromtimestamp(time.time() - ttl_seconds)
+                expired = db.execute(select(StorageSession.app_name, StorageSession.user_id, StorageSession.id)
+                                     .where(StorageSession.update_time < cutoff)).all()
+                for app_name, user_id, session_id in expired:
+                    _delete_stored_session(db, app_name, user_id, session_id)
+            db.commit()
+
+    def pop(self, app_name: str, user_id: str, session_id: str, ttl_seconds: int = SESSION_TTL_SECONDS) -> Optional[Session]:
+        """
+        Load a stored session with its events and remove it from the store.
+
+        Args:
+            app_name: The app name
+            user_id: The user ID
+            session_id: The session ID
+            ttl_seconds: A session idle for longer than this is deleted instead of returned
+
+        Returns:
+            The session, or None if it is not stored or has expired
+        """
+        with self.factory() as db:
+            stored = db.get(StorageSession, (app_name, user_id, session_id))
+            if stored is None:
+                return None
+            session = None
+            if ttl_seconds <= 0 or stored.update_time.timestamp() >= time.time() - ttl_seconds:
+                events = db.scalars(select(StorageEvent).where(
+                    StorageEvent.app_name == app_name,
+                    StorageEvent.user_id == user_id,
+                    StorageEvent.session_id == session_id,
+                ).order_by(StorageEvent.timestamp)).all()
+                session = Session(
+                    app_name=app_name,
+                    user_id=user_id,
+                    id=session_id,
+                    state=dict(stored.state),
+                    events=[event.to_event() for event in events],
+                    last_update_time=stored.update_time.timestamp(),
+                )
+            _delete_stored_session(db, app_name, user_id, session_id)
+            db.commit()
+        return session
+
+    def delete(self, app_name: str, user_id: str, session_id: str):
+        """Delete a stored session."""
+        with self.factory() as db:
+            _delete_stored_session(db, app_name, user_id, session_id)
+            db.commit()
+
+    def list(self, app_name: str, user_id: str) -> list:
+        """List a user's stored sessions, without their events and state."""
+        with self.factory() as db:
+            rows = db.execute(select(StorageSession.id, StorageSession.update_time).where(
+                StorageSession.app_name == app_name,
+                StorageSession.user_id == user_id,
+            )).all()
+        return [
+            Session(app_name=app_name, user_id=user_id, id=session_id, last_update_time=update_time.timestamp())
+            for session_id, update_time in rows
+        ]
+
+
+class BoundedSessionService(InMemorySessionService):
+    """
+    In-memory ADK session service with a byte budget, idle TTL and LRU eviction.
+
+    Sessions are tracked in least recently used order with an approximate size. After
+    each write, sessions idle for longer than the TTL are dropped, then the least
+    recently used sessions are evicted until the store fits its budget. The session
+    just written is never evicted. With a spill store, evicted sessions are saved to
+    the database and restored on their next read.
+    """
+
+    def __init__(self,
+                 max_bytes: int = int(SESSION_MAX_MB * 1024 * 1024),
+                 ttl_seconds: int = SESSION_TTL_SECONDS,
+                 spill_store: Optional[SessionSpillStore] = None):
+        """
+        Initialize the session service.
+
+        Args:
+            max_bytes: Memory budget for sessions, in approximate bytes (0 for no limit)
+            ttl_seconds: Seconds a session may stay idle before it is dropped (0 for no limit)
+            spill_store: Store for evicted sessions, or None to drop them
+        """
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.spill_store = spill_store
+        # Session key -> (approximate bytes, last access time), least recently used first
+        self._lru: "OrderedDict[SessionKey, Tuple[int, float]]" = OrderedDict()
+        self._bytes = 0
+        # Spills still being written, awaited before a read of the same session
+        self._spilling: Dict[SessionKey, asyncio.Task] = {}
+        self._counters = {"created": 0, "expired": 0, "evicted": 0, "spilled": 0, "restored": 0, "spill_errors": 0}
+
+    def _track(self, key: SessionKey, size: int):
+        """Record a session's size and mark it as most recently used."""
+        old_size, _ = self._lru.pop(key, (0, 0.0))
+        self._lru[key] = (size, time.time())
+        self._bytes += size - old_size
+
+    def _touch(self, key: SessionKey):
+        """Mark a session as most recently used."""
+        if key in self._lru:
+            self._lru[key] = (self._lru.pop(key)[0], time.time())
+
+    def _untrack(self, key: SessionKey) -> Optional[Session]:
+        """Remove a session from memory and return it."""
+        size, _ = self._lru.pop(key, (0, 0.0))
+        self._bytes -= size
+        app_name, user_id, session_id = key
+        return self.sessions.get(app_name, {}).get(user_id, {}).pop(session_id, None)
+
+    def _admit(self, session: Session):
+        """Put a session restored from outside memory back into the store."""
+        self.sessions.setdefault(session.app_name, {}).setdefault(session.user_id, {})[session.id] = session
+        self._track((session.app_name, session.user_id, session.id), _session_size(session))
+
+    def _enforce_limits(self, keep: Optional[SessionKey] = None):
+        """Drop idle sessions, then evict least recently used sessions until the budget fits."""
+        if self.ttl_seconds > 0:
+            cutoff = time.time() - self.ttl_seconds
+            while self._lru:
+                key, (_, last_access) = next(iter(self._lru.items()))
+                if last_access >= cutoff or key == keep:
+                    break
+                self._untrack(key)
+                self._counters["expired"] += 1
+                logger.info(f"Dropped session {key[2]} after {self.ttl_seconds}s idle")
+
+        if self.max_bytes > 0:
+            for key in list(self._lru):
+                if self._bytes <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                session = self._untrack(key)
+                self._counters["evicted"] += 1
+                logger.info(f"Evicted session {key[2]} to keep sessions within {self.max_bytes} bytes")
+                if session is not None and self.spill_store is not None:
+                    self._spilling[key] = asyncio.create_task(self._spill(key, session))
+
+    async def _spill(self, key: SessionKey, session: Session):
+        """Save an evicted session to the spill store."""
+        try:
+            await run_blocking(self.spill_store.save, session, self.ttl_seconds)
+            self._counters["spilled"] += 1
+        except Exception as e:
+            self._counters["spill_errors"] += 1
+            logger.error(f"Error spilling session {key[2]}: {str(e)}")
+        finally:
+            if self._spilling.get(key) is asyncio.current_task():
+                del self._spilling[key]
+
+    async def _restore(self, key: SessionKey) -> bool:
+        """Bring an evicted session back into memory from the spill store, if it is there."""
+        pending = self._spilling.get(key)
+        if pending is not None:
+            await asyncio.shield(pending)
+        if self.spill_store is None or key in self._lru:
+            return key in self._lru
+        session = await run_blocking(self.spill_store.pop, *key, self.ttl_seconds)
+        if session is None or key in self._lru:
+            return key in self._lru
+        self._admit(session)
+        self._counters["restored"] += 1
+        logger.info(f"Restored session {key[2]} from the spill store")
+        self._enforce_limits(keep=key)
+        return True
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> Session:
+        session = await super().create_session(app_name=app_name, user_id=user_id, state=state, session_id=session_id)
+        key = (app_name, user_id, session.id)
+        self._track(key, _session_size(session))
+        self._counters["created"] += 1
+        self._enforce_limits(keep=key)
+        return session
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        key = (app_name, user_id, session_id)
+        if key in self._lru and self.ttl_seconds > 0 and self._lru[key][1] < time.time() - self.ttl_seconds:
+            self._untrack(key)
+            self._counters["expired"] += 1
+        if key not in self._lru and not await self._restore(key):
+            return None
+        self._touch(key)
+        return await super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config)
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        response = await super().list_sessions(app_name=app_name, user_id=user_id)
+        if self.spill_store is not None:
+            if self._spilling:
+                await asyncio.shield(asyncio.gather(*self._spilling.values(), return_exceptions=True))
+            live = {session.id for session in response.sessions}
+            spilled = await run_blocking(self.spill_store.list, app_name, user_id)
+            response.sessions.extend(session for session in spilled if session.id not in live)
+        return response
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id)
+        self._untrack(key)
+        if self.spill_store is not None:
+            pending = self._spilling.get(key)
+            if pending is not None:
+                await asyncio.shield(pending)
+            await run_blocking(self.spill_store.delete, *key)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        key = (session.app_name, session.user_id, session.id)
+        if not event.partial and key not in self._lru:
+            # Evicted while its invocation was still running: the caller's copy is current
+            pending = self._spilling.pop(key, None)
+            if pending is not None:
+                await asyncio.shield(pending)
+            if self.spill_store is not None:
+                await run_blocking(self.spill_store.delete, *key)
+            self._admit(copy.deepcopy(session))
+            logger.info(f"Readmitted session {session.id} evicted during its invocation")
+
+        event = await super().append_event(session, event)
+        if not event.partial and key in self._lru:
+            self._track(key, self._lru[key][0] + _event_size(event))
+            self._enforce_limits(keep=key)
+        return event
+
+    async def replace_events(self, session: Session, events: List[Event]) -> Optional[Session]:
+        """
+        Replace a session's events in place, unless it changed since it was read.
+
+        The swap does not yield to the event loop, so no other run can write the
+        session in between. The session's state is left as it is.
+
+        Args:
+            session: The session as last read from the service
+            events: The events the session should hold
+
+        Returns:
+            The rewritten session, or None if the stored session is missing or newer
+        """
+        key = (session.app_name, session.user_id, session.id)
+        stored = self.sessions.get(session.app_name, {}).get(session.user_id, {}).get(session.id)
+        if stored is None or key not in self._lru or stored.last_update_time != session.last_update_time \
+                or [event.id for event in stored.events] != [event.id for event in session.events]:
+            return None
+        stored.events = copy.deepcopy(events)
+        stored.last_update_time = time.time()
+        self._track(key, _session_size(stored))
+        return await super().get_session(app_name=session.app_name, user_id=session.user_id, session_id=session.id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of live sessions, the bytes they hold and eviction counters."""
+        return {
+            "store": "memory",
+            "live_sessions": len(self._lru),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "spill": self.spill_store is not None,
+            **self._counters,
+        }
+
+
+class SharedSessionService(DatabaseSessionService):
+    """
+    ADK database session service for sessions shared by several server processes.
+
+    Every session and event is stored in the database, so a session_id continues
+    whichever process handles the next request. SQLite (the default, in WAL mode) covers
+    the processes on one host; any SQLAlchemy URL, such as PostgreSQL, covers several
+    hosts. The blocking database calls run on the shared thread pool.
+    """
+
+    def __init__(self, db_url: str = SESSION_DB_URL):
+        """
+        Open the session database and create its tables if needed.
+
+        Args:
+            db_url: SQLAlchemy URL of the session database
+        """
+        super().__init__(db_url, connect_args=_sqlite_connect_args(db_url))
+        if db_url.startswith("sqlite"):
+            # Connections opened while creating the tables predate the listener
+            self.db_engine.dispose()
+            sqlalchemy_event.listen(self.db_engine, "connect", _tune_sqlite)
+        self.db_url = db_url
+        self._counters = {"created": 0, "reads": 0, "events": 0}
+
+    async def create_session(self, *, app_name: str, user_id: str, state: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None) -> Session:
+        self._counters["created"] += 1
+        return await run_blocking(_run_to_completion, super().create_session(app_name=app_name, user_id=user_id, state=state, session_id=session_id))
+
+    async def get_session(self, *, app_name: str, user_id: str, session_id: str, config: Optional[GetSessionConfig] = None) -> Optional[Session]:
+        self._counters["reads"] += 1
+        return await run_blocking(_run_to_completion, super().get_session(app_name=app_name, user_id=user_id, session_id=session_id, config=config))
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        return await run_blocking(_run_to_completion, super().list_sessions(app_name=app_name, user_id=user_id))
+
+    def _delete_session(self, app_name: str, user_id: str, session_id: str):
+        """Delete a session and its events."""
+        with self.database_session_factory() as db:
+            _delete_stored_session(db, app_name, user_id, session_id)
+            db.commit()
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        await run_blocking(self._delete_session, app_name, user_id, session_id)
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if not event.partial:
+            self._counters["events"] += 1
+        return await run_blocking(_run_to_completion, super().append_event(session, event))
+
+    def _replace_events(self, session: Session, events: List[Event]) -> Optional[Session]:
+        """Replace a session's events in one transaction, unless it changed since it was read."""
+        with self.database_session_factory() as db:
+            # Lock the session row first (the whole database on SQLite), so no other run can append in between
+            locked = db.execute(update(StorageSession).where(
+                StorageSession.app_name == session.app_name,
+                StorageSession.user_id == session.user_id,
+                StorageSession.id == session.id,
+            ).values(update_time=StorageSession.update_time))
+            storage_session = db.get(StorageSession, (session.app_name, session.user_id, session.id)) if locked.rowcount == 1 else None
+            # Appending an event without a state change leaves update_time alone, so the events are compared too
+            stored_ids = set(db.scalars(select(StorageEvent.id).where(
+                StorageEvent.app_name == session.app_name,
+                StorageEvent.user_id == session.user_id,
+                StorageEvent.session_id == session.id,
+            )))
+            if storage_session is None or storage_session.update_time.timestamp() > session.last_update_time \
+                    or stored_ids != {event.id for event in session.events}:
+                db.rollback()
+                return None
+            storage_session.update_time = func.now()
+            db.execute(delete(StorageEvent).where(
+                StorageEvent.app_name == session.app_name,
+                StorageEvent.user_id == session.user_id,
+                StorageEvent.session_id == session.id,
+            ))
+            db.add_all(StorageEvent.from_event(session, event) for event in events)
+            db.commit()
+        return _run_to_completion(super().get_session(app_name=session.app_name, user_id=session.user_id, session_id=session.id))
+
+    async def replace_events(self, session: Session, events: List[Event]) -> Optional[Session]:
+        """
+        Replace a session's events in one database transaction, unless it changed since it was read.
+
+        Args:
+            session: The session as last read from the service
+            events: The events the session should hold
+
+        Returns:
+            The rewritten session, or None if the stored session is missing or newer
+        """
+        return await run_blocking(self._replace_events, session, events)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return this process's session store call counts."""
+        return {"store": "database", "url": self.db_engine.url.render_as_string(hide_password=True), **self._counters}
+
+
+def create_session_service():
+    """Create the session service configured by the ANALYSER_SESSION_* environment variables."""
+    if SESSION_STORE == "database":
+        logger.info(f"Session store: shared database at {SESSION_DB_URL}")
+        return SharedSessionService(SESSION_DB_URL)
+    if SESSION_STORE != "memory":
+        logger.warning(f"Unknown ANALYSER_SESSION_STORE '{SESSION_STORE}', keeping sessions in memory")
+    spill_store = SessionSpillStore(SESSION_DB_URL) if SESSION_SPILL else None
+    logger.info(f"Session store: {SESSION_MAX_MB} MB budget, {SESSION_TTL_SECONDS}s idle TTL, spill {'to ' + SESSION_DB_URL if spill_store else 'disabled'}")
+    return BoundedSessionService(spill_store=spill_store)
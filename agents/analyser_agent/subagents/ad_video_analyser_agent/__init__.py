@@ -1,4 +1,4 @@
 """Video analyser agent for system monitoring."""
 
-from .agent import ad_video_analyser_agent
+from .agent import ad_video_analyser_agent, ad_video_structured_agent, ad_video_chunked_agent
 from .video_response_agent import video_response_agent
\ No newline at end of file
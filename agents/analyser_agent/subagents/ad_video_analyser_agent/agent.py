@@ -7,6 +7,8 @@ This agent is responsible for analysing videos.
 from google.adk.agents import SequentialAgent
 from .video_response_agent import video_response_agent
 from .video_act_agent import video_act_agent
+from .video_act_agent.tools import get_structured_video_analysis, get_chunked_video_analysis
+from ..structured_analyser_agent import StructuredAnalyserAgent
 
 # Video Agent
 ad_video_analyser_agent = SequentialAgent(
@@ -14,3 +16,21 @@ ad_video_analyser_agent = SequentialAgent(
     description=("""This is the Video Analysis Agent that coordinates the analysis of video ads."""),
     sub_agents=[video_act_agent, video_response_agent],
 )
+
+# Single-call structured pipeline: the tool's Gemini call returns AgentOutput directly
+ad_video_structured_agent = StructuredAnalyserAgent(
+    name="VideoStructuredAnalyserAgent",
+    description=("""This is the single-call Video Analysis Agent that returns the structured analysis of video ads directly."""),
+    analyse=get_structured_video_analysis,
+    input_key="file_path",
+    output_key="final_output",
+)
+
+# Map-reduce pipeline: long videos are analysed by time range in concurrent calls and the results merged
+ad_video_chunked_agent = StructuredAnalyserAgent(
+    name="VideoChunkedAnalyserAgent",
+    description=("""This is the chunked Video Analysis Agent that analyses long video ads by time range in concurrent parts."""),
+    analyse=get_chunked_video_analysis,
+    input_key="file_path",
+    output_key="final_output",
+)
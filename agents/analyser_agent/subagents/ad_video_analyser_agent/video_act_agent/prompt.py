@@ -9,4 +9,7 @@ VIDEO_GUIDELINES = """
 8. Use large, easy-to-read font (e.g., sans-serif).
 9. Avoid rapid scene changes or distracting animations during key messages.
 10. Present honest, balanced information. Do not exaggerate benefits or hide risks.
-"""
\ No newline at end of file
+"""
+
+VIDEO_ANALYSIS_PROMPT = """You are a video analysis tool. Your job is to analyze the video content and provide a summary, conflicts, suggestions for improvement, and a score out of 100 based on the provided guidelines.
+List the guidelines you applied in the guidelines field."""
@@ -2,22 +2,18 @@
 Get summary description along with the audio to text of a video using Google Gemini.
 """
 
-import os
 import logging
-import time
-import google.generativeai as genai
-from dotenv import load_dotenv
-from .prompt import VIDEO_GUIDELINES
+from typing import Optional
+from .prompt import VIDEO_GUIDELINES, VIDEO_ANALYSIS_PROMPT
+from ..video_response_agent.agent import AgentOutput
+from ....chunking import CHUNK_CONCURRENCY, map_segments, reduce_outputs, segment_prompt, time_segments
+from ....gemini_client import generate_content
+from ....gemini_files import file_registry, generate_from_file
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
-api_key = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=api_key)
-
-def get_video_summary(
+async def get_video_summary(
         path: str,
         prompt: str,
     ) -> str:
@@ -34,26 +30,106 @@ def get_video_summary(
     prompt += f"\n\nYou must use the following guidelines for the video ad: {VIDEO_GUIDELINES}\n\nAlso, provide a score out of 100 based on the guidelines."
     
     try:
-        logger.debug(f"Uploading video file: {path}")
-        file1 = genai.upload_file(path=path)
-
-        # Check whether the file is ready to be used.
-        while file1.state.name == "PROCESSING":
-            print('.', end='')
-            time.sleep(10)
-            file1 = genai.get_file(file1.name)
-        
-        logger.debug("Initializing Gemini model")
-        model = genai.GenerativeModel(model_name="models/gemini-2.0-flash")
-        
-        logger.info("Generating content with Gemini")
-        response = model.generate_content([prompt, file1], request_options={"timeout": 600})
-        
-        logger.debug(f"Deleting uploaded file: {file1.name}")
-        genai.delete_file(file1.name)
+        response = await generate_from_file(path, prompt)
         
         logger.info("Video summary generated successfully")
         return response.text
     except Exception as e:
         logger.error(f"Error generating video summary: {str(e)}")
         raise
+
+async def get_structured_video_analysis(
+        path: str,
+        guidelines: Optional[str] = None,
+    ) -> dict:
+    """
+    Analyze a video ad in a single Gemini call constrained to the AgentOutput schema.
+    Args:
+        path (str): The path of the video to analyze.
+        guidelines (str, optional): Additional guidelines provided with the request.
+    Returns:
+        dict: The analysis as an AgentOutput dict.
+    """
+    logger.info(f"Getting structured video analysis for file: {path}")
+    
+    prompt = VIDEO_ANALYSIS_PROMPT + f"\n\nYou must use the following guidelines for the video ad: {VIDEO_GUIDELINES}"
+    if guidelines:
+        prompt += f"\n\nAlso apply these additional guidelines: {guidelines}"
+    prompt += "\n\nAlso, provide a score out of 100 based on the guidelines."
+    
+    try:
+        response = await generate_from_file(
+            path,
+            prompt,
+            generation_config={"response_mime_type": "application/json", "response_schema": AgentOutput},
+        )
+        output = AgentOutput.model_validate_json(response.text).model_dump(exclude_none=True)
+        
+        logger.info("Structured video analysis generated successfully")
+        return output
+    except Exception as e:
+        logger.error(f"Error generating structured video analysis: {str(e)}")
+        raise
+
+
+def _video_duration(file) -> Optional[float]:
+    """
+    Get the duration of an uploaded video in seconds from its Gemini metadata.
+    Args:
+        file: The ACTIVE Gemini file.
+    Returns:
+        float: The duration, or None if Gemini did not report one.
+    """
+    try:
+        duration = file.video_metadata.video_duration
+    except AttributeError:
+        return None
+    seconds = duration.total_seconds() if hasattr(duration, "total_seconds") else getattr(duration, "seconds", 0)
+    return seconds or None
+
+async def get_chunked_video_analysis(
+        path: str,
+        guidelines: Optional[str] = None,
+    ) -> dict:
+    """
+    Analyze a long video ad by time range in concurrent Gemini calls and merge the results into one AgentOutput.
+    Args:
+        path (str): The path of the video to analyze.
+        guidelines (str, optional): Additional guidelines provided with the request.
+    Returns:
+        dict: The merged analysis as an AgentOutput dict.
+    """
+    logger.info(f"Getting chunked video analysis for file: {path}")
+    
+    prompt = VIDEO_ANALYSIS_PROMPT + f"\n\nYou must use the following guidelines for the video ad: {VIDEO_GUIDELINES}"
+    if guidelines:
+        prompt += f"\n\nAlso apply these additional guidelines: {guidelines}"
+    prompt += "\n\nAlso, provide a score out of 100 based on the guidelines."
+    
+    # Every time range is analysed against the same uploaded file
+    async with file_registry.use(path) as file1:
+        duration = _video_duration(file1)
+        segments = time_segments(duration) if duration else []
+        if len(segments) > 1:
+            async def analyse(segment) -> dict:
+                segment_text = segment_prompt(prompt, segment, len(segments), f"only the part of the video from {segment.label.replace('-', ' to ')}")
+                response = await generate_content(
+                    [segment_text, file1],
+                    generation_config={"response_mime_type": "application/json", "response_schema": AgentOutput},
+                )
+                return AgentOutput.model_validate_json(response.text).model_dump(exclude_none=True)
+            
+            try:
+                logger.info(f"Analyzing {len(segments)} segments of a {duration:.0f}s video (up to {CHUNK_CONCURRENCY} at once)")
+                outputs = await map_segments(segments, analyse)
+                output = reduce_outputs(segments, outputs, summary_field="video_summary", label_findings=True)
+            except Exception as e:
+                logger.error(f"Error generating chunked video analysis: {str(e)}")
+                raise
+    
+    if len(segments) <= 1:
+        logger.info(f"Video duration {duration}s fits in one segment, analyzing it in a single call")
+        return await get_structured_video_analysis(path, guidelines)
+    
+    logger.info("Chunked video analysis generated successfully")
+    return output
@@ -1,4 +1,4 @@
 """Insta post analyser agent for system monitoring."""
 
-from .agent import insta_analyser_agent
+from .agent import insta_analyser_agent, insta_structured_agent
 from .insta_response_agent import insta_response_agent
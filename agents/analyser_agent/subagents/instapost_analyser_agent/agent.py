@@ -7,6 +7,8 @@ This agent is responsible for analyzing Instagram posts to ensure they adhere to
 from google.adk.agents import SequentialAgent
 from .insta_response_agent import insta_response_agent
 from .insta_act_agent import insta_act_agent
+from .insta_act_agent.tools import get_structured_insta_analysis
+from ..structured_analyser_agent import StructuredAnalyserAgent
 
 # Instagram Agent
 insta_analyser_agent = SequentialAgent(
@@ -14,3 +16,12 @@ insta_analyser_agent = SequentialAgent(
     description=("""This is the Instagram Analysis Agent that coordinates the analysis of Instagram posts."""),
     sub_agents=[insta_act_agent, insta_response_agent],
 )
+
+# Single-call structured pipeline: the tool's Gemini call returns AgentOutput directly
+insta_structured_agent = StructuredAnalyserAgent(
+    name="InstaPostStructuredAnalyserAgent",
+    description=("""This is the single-call Instagram Analysis Agent that returns the structured analysis of Instagram posts directly."""),
+    analyse=get_structured_insta_analysis,
+    input_key="file_path",
+    output_key="final_output",
+)
@@ -11,4 +11,7 @@ INSTA_GUIDELINES = """
 10. Give clear calls-to-action without being too pushy.
 11. Make sure links work and go to trusted sites.
 12. Follow any specific rules for your industry (e.g., pharma, finance).
-"""
\ No newline at end of file
+"""
+
+INSTA_ANALYSIS_PROMPT = """You are an Instagram post analysis tool. Your job is to analyze the Instagram post content and provide a summary, conflicts, suggestions for improvement, and a score out of 100 based on the provided guidelines.
+List the guidelines you applied in the guidelines field."""
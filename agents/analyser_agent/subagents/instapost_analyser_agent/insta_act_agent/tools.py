@@ -2,21 +2,16 @@
 Check whether the instagram post adheres to the provided guidelines.
 """
 
-import os
 import logging
-import google.generativeai as genai
-from dotenv import load_dotenv
-from .prompt import INSTA_GUIDELINES
+from typing import Optional
+from .prompt import INSTA_GUIDELINES, INSTA_ANALYSIS_PROMPT
+from ..insta_response_agent.agent import AgentOutput
+from ....gemini_files import generate_from_file
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
-api_key = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=api_key)
-
-def get_insta_summary(
+async def get_insta_summary(
         path: str,
         prompt: str,
     ) -> str:
@@ -33,21 +28,43 @@ def get_insta_summary(
     prompt += f"\n\nYou must also use the following guidelines for the Instagram post: {INSTA_GUIDELINES}\n\nAlso, provide a score out of 100 based if the post follows the guidelines."
     
     try:
-        logger.debug(f"Uploading Instagram post file: {path}")
-        file1 = genai.upload_file(path=path)
-        file1 = genai.get_file(file1.name)
-        
-        logger.debug("Initializing Gemini model")
-        model = genai.GenerativeModel(model_name="models/gemini-2.0-flash")
-        
-        logger.info("Generating content with Gemini")
-        response = model.generate_content([prompt, file1], request_options={"timeout": 600})
-        
-        logger.debug(f"Deleting uploaded file: {file1.name}")
-        genai.delete_file(file1.name)
+        response = await generate_from_file(path, prompt)
         
         logger.info("Instagram post summary generated successfully")
         return response.text
     except Exception as e:
         logger.error(f"Error generating Instagram post summary: {str(e)}")
         raise
+
+async def get_structured_insta_analysis(
+        path: str,
+        guidelines: Optional[str] = None,
+    ) -> dict:
+    """
+    Analyzes an Instagram post in a single Gemini call constrained to the AgentOutput schema.
+    Args:
+        path (str): The path to the Instagram post file.
+        guidelines (str, optional): Additional guidelines provided with the request.
+    Returns:
+        dict: The analysis as an AgentOutput dict.
+    """
+    logger.info(f"Getting structured Instagram post analysis for file: {path}")
+    
+    prompt = INSTA_ANALYSIS_PROMPT + f"\n\nYou must also use the following guidelines for the Instagram post: {INSTA_GUIDELINES}"
+    if guidelines:
+        prompt += f"\n\nAlso apply these additional guidelines: {guidelines}"
+    prompt += "\n\nAlso, provide a score out of 100 based if the post follows the guidelines."
+    
+    try:
+        response = await generate_from_file(
+            path,
+            prompt,
+            generation_config={"response_mime_type": "application/json", "response_schema": AgentOutput},
+        )
+        output = AgentOutput.model_validate_json(response.text).model_dump(exclude_none=True)
+        
+        logger.info("Structured Instagram post analysis generated successfully")
+        return output
+    except Exception as e:
+        logger.error(f"Error generating structured Instagram post analysis: {str(e)}")
+        raise
@@ -0,0 +1,3 @@
+"""Single-call structured analysis agent."""
+
+from .agent import StructuredAnalyserAgent
@@ -0,0 +1,62 @@
+"""
+Structured Analyser Agent
+
+This agent runs an analysis tool directly and emits its structured result as the final
+response. The tool's own Gemini call is constrained to the pipeline's AgentOutput schema,
+so neither an act agent nor a response agent is needed to produce the final output.
+"""
+
+import json
+import inspect
+import logging
+from typing import Any, AsyncGenerator, Callable, Dict
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from typing_extensions import override
+
+from ...executor import run_blocking
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Session state key holding the request context set by the TaskManager
+REQUEST_CONTEXT_KEY = "request_context"
+
+
+class StructuredAnalyserAgent(BaseAgent):
+    """Agent that produces AgentOutput from a single schema-constrained tool call."""
+
+    analyse: Callable[..., Any]
+    """Tool called as analyse(target, guidelines) that returns an AgentOutput dict."""
+
+    input_key: str
+    """Key of the analysis target (e.g. file_path or url) in the request context."""
+
+    output_key: str = "final_output"
+    """Session state key the structured result is saved under."""
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        request_context: Dict[str, Any] = ctx.session.state.get(REQUEST_CONTEXT_KEY) or {}
+        target = request_context.get(self.input_key)
+        if not target:
+            raise ValueError(f"{self.name} requires '{self.input_key}' in the request context")
+
+        guidelines = request_context.get("guidelines")
+        logger.info(f"{self.name} running single-call structured analysis for: {target}")
+
+        if inspect.iscoroutinefunction(self.analyse):
+            output = await self.analyse(target, guidelines)
+        else:
+            output = await run_blocking(self.analyse, target, guidelines)
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=json.dumps(output))]),
+            actions=EventActions(state_delta={self.output_key: output}),
+        )
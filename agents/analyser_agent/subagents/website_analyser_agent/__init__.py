@@ -1,5 +1,5 @@
 """Website post analyser agent for analysing website content."""
 
-from .agent import website_analyser_agent
+from .agent import website_analyser_agent, website_structured_agent, website_chunked_agent, website_incremental_agent
 from .website_response_agent import website_response_agent
 from .website_act_agent import website_act_agent
\ No newline at end of file
@@ -7,6 +7,9 @@ This agent is responsible for analyzing websites to ensure they adhere to specif
 from google.adk.agents import SequentialAgent
 from .website_response_agent import website_response_agent
 from .website_act_agent import website_act_agent
+from .website_act_agent.tools import get_structured_website_analysis, get_chunked_website_analysis
+from ..structured_analyser_agent import StructuredAnalyserAgent
+from ...incremental import get_incremental_website_analysis
 
 # Instagram Agent
 website_analyser_agent = SequentialAgent(
@@ -14,3 +17,30 @@ website_analyser_agent = SequentialAgent(
     description=("""This is the Website Analysis Agent that coordinates the analysis of websites."""),
     sub_agents=[website_act_agent, website_response_agent],
 )
+
+# Single-call structured pipeline: the tool's Gemini call returns AgentOutput directly
+website_structured_agent = StructuredAnalyserAgent(
+    name="WebsiteStructuredAnalyserAgent",
+    description=("""This is the single-call Website Analysis Agent that returns the structured analysis of websites directly."""),
+    analyse=get_structured_website_analysis,
+    input_key="url",
+    output_key="final_output",
+)
+
+# Map-reduce pipeline: long pages are analysed in concurrent chunks and the results merged
+website_chunked_agent = StructuredAnalyserAgent(
+    name="WebsiteChunkedAnalyserAgent",
+    description=("""This is the chunked Website Analysis Agent that analyses long websites in concurrent parts."""),
+    analyse=get_chunked_website_analysis,
+    input_key="url",
+    output_key="final_output",
+)
+
+# Incremental pipeline: only sections changed since the last analysis of the URL are sent to Gemini
+website_incremental_agent = StructuredAnalyserAgent(
+    name="WebsiteIncrementalAnalyserAgent",
+    description=("""This is the incremental Website Analysis Agent that re-reviews only the changed sections of a website."""),
+    analyse=get_incremental_website_analysis,
+    input_key="url",
+    output_key="final_output",
+)
@@ -10,3 +10,11 @@ WEBSITE_GUIDELINES = """
 9. Protect patient data according to privacy standards like HIPAA.
 10. Do not misuse terms like “safe,” “effective,” or “guaranteed.”
 """
+
+WEBSITE_ANALYSIS_PROMPT = """You are a website analysis tool. Your job is to analyze the website content and provide a summary, conflicts, suggestions for improvement, and a score out of 100 based on the provided guidelines.
+List the guidelines you applied in the guidelines field."""
+
+WEBSITE_SECTION_ANALYSIS_PROMPT = """You are a website analysis tool. The website content is split into numbered sections. Review each section under "Sections to review" against the provided guidelines and report its conflicts and suggestions under its section_id, with an empty list where a section has none.
+Report issues that concern the page as a whole, such as required information missing from every section, as page_conflicts and page_suggestions rather than against a section.
+Provide a summary of the whole page and a score out of 100 based on the provided guidelines. When findings from a previous analysis of the unchanged sections are given, treat them as still valid and take them into account in the page-level findings, summary and score.
+List the guidelines you applied in the guidelines field."""
@@ -1,13 +1,20 @@
 """Website crawler tool for crawling and analyzing website content."""
 
 import logging
-import requests
-from bs4 import BeautifulSoup
+from typing import Optional
+import httpx
+from .prompt import WEBSITE_GUIDELINES, WEBSITE_ANALYSIS_PROMPT
+from ..website_response_agent.agent import AgentOutput
+from ....chunking import CHUNK_CONCURRENCY, CHUNK_MAX_SEGMENTS, CHUNK_TOKENS, map_segments, reduce_outputs, segment_prompt, text_segments
+from ....executor import run_blocking
+from ....gemini_client import generate_content
+from ....html_extract import EXTRACT_MAX_TOKENS, extract_text, truncate_to_budget
+from ....web_fetch import web_fetcher, prefetched_page_text, FetchError
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def get_website_data(url: str) -> str:
+async def get_website_data(url: str) -> str:
     """
     Scrape the content of a website and return its text content.
     Args:
@@ -15,38 +22,113 @@ def get_website_data(url: str) -> str:
     Returns:
         str: The text content of the website.
     """
+    return await fetch_website_text(url)
+
+
+async def fetch_website_text(url: str, max_tokens: int = EXTRACT_MAX_TOKENS) -> str:
+    """
+    Scrape the content of a website and return its text cut to a token budget.
+    Args:
+        url (str): The URL of the website to scrape.
+        max_tokens (int): Approximate token budget for the text.
+    Returns:
+        str: The text content of the website.
+    """
+    # Pages the crawler or the result cache already fetched and extracted are not downloaded again
+    text = prefetched_page_text(url)
+    if text is not None:
+        logger.info(f"Using the already fetched text of {url} ({len(text)} characters)")
+        return truncate_to_budget(text, max_tokens)
+    
     logger.info(f"Scraping website content from: {url}")
     
     try:
-        # Add http:// prefix if not present
-        if not url.startswith(('http://', 'https://')):
-            original_url = url
-            url = 'http://' + url
-            logger.debug(f"Added http:// prefix to URL: {original_url} -> {url}")
-            
-        # Make the request
-        logger.debug(f"Making HTTP request to: {url}")
-        response = requests.get(url)
-        response.raise_for_status()  # Raise exception for 4XX/5XX responses
-        logger.debug(f"Received response with status code: {response.status_code}")
-        
-        # Parse the HTML content
-        logger.debug("Parsing HTML content with BeautifulSoup")
-        soup = BeautifulSoup(response.text, 'html.parser')
+        # Fetch over the shared connection pool, revalidating any cached copy
+        page = await web_fetcher.fetch(url)
+        if page.from_cache:
+            logger.debug(f"Using cached copy of {page.url}")
         
-        # Remove script and style elements
-        logger.debug("Removing script and style elements")
-        for script in soup(["script", "style"]):
-            script.extract()
-            
-        # Get the text content
-        text = soup.get_text()
+        # Extract the text off the event loop, dropping boilerplate and cutting it to the token budget
+        text = await run_blocking(extract_text, page.text, max_tokens)
         
         logger.info(f"Successfully scraped website content ({len(text)} characters)")
         return text
-    except requests.exceptions.RequestException as e:
+    except (httpx.HTTPError, FetchError) as e:
         logger.error(f"Error making request to {url}: {str(e)}")
         raise
     except Exception as e:
         logger.error(f"Error scraping website content: {str(e)}")
         raise
+
+
+async def get_structured_website_analysis(
+        url: str,
+        guidelines: Optional[str] = None,
+    ) -> dict:
+    """
+    Scrape a website and analyze it in a single Gemini call constrained to the AgentOutput schema.
+    Args:
+        url (str): The URL of the website to analyze.
+        guidelines (str, optional): Additional guidelines provided with the request.
+    Returns:
+        dict: The analysis as an AgentOutput dict.
+    """
+    logger.info(f"Getting structured website analysis for: {url}")
+    
+    text = await get_website_data(url)
+    
+    prompt = WEBSITE_ANALYSIS_PROMPT + f"\n\nYou must use the following guidelines for the Website: {WEBSITE_GUIDELINES}"
+    if guidelines:
+        prompt += f"\n\nAlso apply these additional guidelines: {guidelines}"
+    prompt += f"\n\nWebsite URL: {url}\n\nWebsite content:\n{text}"
+    
+    try:
+        logger.info("Generating content with Gemini")
+        response = await generate_content(prompt, generation_config={"response_mime_type": "application/json", "response_schema": AgentOutput})
+        output = AgentOutput.model_validate_json(response.text).model_dump(exclude_none=True)
+        
+        logger.info("Structured website analysis generated successfully")
+        return output
+    except Exception as e:
+        logger.error(f"Error generating structured website analysis: {str(e)}")
+        raise
+
+
+async def get_chunked_website_analysis(
+        url: str,
+        guidelines: Optional[str] = None,
+    ) -> dict:
+    """
+    Analyze a long website in concurrent chunks and merge the results into one AgentOutput.
+    Args:
+        url (str): The URL of the website to analyze.
+        guidelines (str, optional): Additional guidelines provided with the request.
+    Returns:
+        dict: The merged analysis as an AgentOutput dict.
+    """
+    logger.info(f"Getting chunked website analysis for: {url}")
+    
+    # The whole page is analysed, so only the chunk budget limits the text
+    text = await fetch_website_text(url, max_tokens=CHUNK_TOKENS * CHUNK_MAX_SEGMENTS)
+    segments = text_segments(text)
+    
+    prompt = WEBSITE_ANALYSIS_PROMPT + f"\n\nYou must use the following guidelines for the Website: {WEBSITE_GUIDELINES}"
+    if guidelines:
+        prompt += f"\n\nAlso apply these additional guidelines: {guidelines}"
+    
+    async def analyse(segment) -> dict:
+        segment_text = segment_prompt(prompt, segment, len(segments), f"{segment.label} of the website content")
+        segment_text += f"\n\nWebsite URL: {url}\n\nWebsite content:\n{segment.content}"
+        response = await generate_content(segment_text, generation_config={"response_mime_type": "application/json", "response_schema": AgentOutput})
+        return AgentOutput.model_validate_json(response.text).model_dump(exclude_none=True)
+    
+    try:
+        logger.info(f"Analyzing {len(segments)} chunks of {url} (up to {CHUNK_CONCURRENCY} at once)")
+        outputs = await map_segments(segments, analyse)
+        output = reduce_outputs(segments, outputs)
+        
+        logger.info("Chunked website analysis generated successfully")
+        return output
+    except Exception as e:
+        logger.error(f"Error generating chunked website analysis: {str(e)}")
+        raise
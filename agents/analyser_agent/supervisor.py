@@ -0,0 +1,95 @@
+"""
+Worker process supervisor for the Analyser Agent.
+This module serves the API from several processes behind one port: it binds the
+listening socket once, starts worker processes that all accept connections from it,
+restarts workers that exit unexpectedly and stops them all on SIGINT or SIGTERM.
+"""
+
+import os
+import time
+import signal
+import socket
+import logging
+import threading
+import multiprocessing
+from typing import Callable, List
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Supervisor configuration
+WORKER_SHUTDOWN_TIMEOUT = float(os.getenv("ANALYSER_WORKER_SHUTDOWN_TIMEOUT", 30))
+WORKER_RESTART_DELAY = 1.0
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """
+    Bind and listen on the server address, so worker processes can share the socket.
+
+    Args:
+        host: Host to bind
+        port: Port to bind
+
+    Returns:
+        The listening socket
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_workers(target: Callable[[socket.socket, int], None], workers: int, sock: socket.socket):
+    """
+    Run worker processes until the supervisor receives SIGINT or SIGTERM.
+
+    Workers are started with the spawn method so each one builds its own event loop,
+    thread pools and database connections.
+
+    Args:
+        target: Module-level function called in each worker with the socket and the worker index
+        workers: Number of worker processes
+        sock: The listening socket shared by the workers
+    """
+    context = multiprocessing.get_context("spawn")
+    stopping = threading.Event()
+
+    def start(index: int) -> multiprocessing.Process:
+        process = context.Process(target=target, args=(sock, index), name=f"analyser-worker-{index}")
+        process.start()
+        logger.info(f"Started worker {index} (pid {process.pid})")
+        return process
+
+    def stop(signum, frame):
+        logger.info(f"Received {signal.Signals(signum).name}, stopping {workers} workers")
+        stopping.set()
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    processes: List[multiprocessing.Process] = [start(index) for index in range(workers)]
+    logger.info(f"Serving on {sock.getsockname()} with {workers} worker processes (supervisor pid {os.getpid()})")
+
+    while not stopping.wait(WORKER_RESTART_DELAY):
+        for index, process in enumerate(processes):
+            if not process.is_alive() and not stopping.is_set():
+                logger.warning(f"Worker {index} (pid {process.pid}) exited with code {process.exitcode}, restarting it")
+                processes[index] = start(index)
+
+    # Workers shut down gracefully on SIGTERM, finishing in-flight requests
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    deadline = time.monotonic() + WORKER_SHUTDOWN_TIMEOUT
+    for index, process in enumerate(processes):
+        process.join(max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            logger.warning(f"Worker {index} (pid {process.pid}) did not stop in {WORKER_SHUTDOWN_TIMEOUT}s, killing it")
+            process.kill()
+            process.join()
+    sock.close()
+    logger.info("All workers stopped")
@@ -7,14 +7,20 @@ import os
 import logging
 import tempfile
 import uuid
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Optional
 
-from google.adk.agents import Agent
+from google.adk.agents import Agent, BaseAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event, EventActions
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
 from google.genai import types as adk_types
 
+from .sessions import create_session_service
+from .compaction import COMPACTION_ENABLED, CompactionStats, compact_session
+from .event_capture import EVENT_CAPTURE, EventCapture, create_event_sink
+from .progress import is_streaming, report_event, report_progress, stream_progress
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,23 +31,27 @@ A2A_APP_NAME = "pre_mlr_app"
 class TaskManager:
     """Task Manager for the Analyser Agent in A2A mode (pre MLR implementation)."""
     
-    def __init__(self, agent: Agent):
+    def __init__(self, agent: Agent, pipelines: Optional[Dict[str, BaseAgent]] = None):
         """Initialize with an Agent instance and set up ADK Runner."""
         logger.info(f"Initializing TaskManager for agent: {agent.name}")
         self.agent = agent
+        self.pipelines = pipelines or {}
+        self.compaction_stats = CompactionStats()
 
     @classmethod
-    async def create(cls, agent):
+    async def create(cls, agent, pipelines: Optional[Dict[str, BaseAgent]] = None):
         """
         Async factory method to create and configure a TaskManager instance.
 
         Args:
             agent: The agent instance to manage.
+            pipelines: Optional sub-agents keyed by pipeline name that can be run
+                directly, bypassing the agent's routing.
 
         Returns:
             TaskManager: Configured instance.
         """
-        self = cls(agent)
+        self = cls(agent, pipelines)
         await self.initialize_runner()
 
         return self
@@ -50,8 +60,11 @@ class TaskManager:
         """Initialize the ADK Runner with the agent and services."""
         
         # Initialize ADK services
-        self.session_service = InMemorySessionService()
+        # Sessions live in memory within a byte budget and idle TTL (see sessions.py)
+        self.session_service = create_session_service()
         self.artifact_service = InMemoryArtifactService()
+        # Full event traces go to an optional background sink (see event_capture.py)
+        self.event_sink = create_event_sink()
         
         # Create the runner
         self.runner = Runner(
@@ -61,8 +74,45 @@ class TaskManager:
             artifact_service=self.artifact_service
         )
         logger.info(f"ADK Runner initialized for app '{self.runner.app_name}'")
+        
+        # Create one runner per directly dispatchable pipeline, sharing the same
+        # services so sessions carry over between routed and direct requests
+        self.pipeline_runners = {
+            name: Runner(
+                agent=pipeline_agent,
+                app_name=A2A_APP_NAME,
+                session_service=self.session_service,
+                artifact_service=self.artifact_service
+            )
+            for name, pipeline_agent in self.pipelines.items()
+        }
+        if self.pipeline_runners:
+            logger.info(f"Direct dispatch runners initialized for pipelines: {list(self.pipeline_runners)}")
 
-    async def process_task(self, message: str, context: Dict[str, Any], session_id: Optional[str] = None) -> Dict[str, Any]:
+    async def _compact(self, session):
+        """
+        Compact a reused session's history before it is replayed to the agents.
+        
+        Args:
+            session: The session as read from the session service.
+            
+        Returns:
+            The session to run (rewritten if it was compacted) and the compaction
+            report, or None if nothing was compacted.
+        """
+        try:
+            session, result = await compact_session(self.session_service, session)
+        except Exception as e:
+            # A failed compaction only costs prompt size; the stored history is rewritten atomically or not at all
+            self.compaction_stats.errors += 1
+            logger.error(f"Error compacting session {session.id}: {str(e)}")
+            return session, None
+        if result.tokens_saved <= 0:
+            return session, None
+        self.compaction_stats.add(result)
+        return session, result.report()
+
+    async def process_task(self, message: str, context: Dict[str, Any], session_id: Optional[str] = None, pipeline: Optional[str] = None) -> Dict[str, Any]:
         """
         Process an A2A task request by running the agent.
         
@@ -70,10 +120,17 @@ class TaskManager:
             message: The text message to process.
             context: Additional context data.
             session_id: Session identifier (generated if None).
+            pipeline: Name of a pipeline to run directly instead of letting the
+                agent route the message (None uses the routed path).
             
         Returns:
             Response dict with message, status, and data.
         """
+        if pipeline and pipeline not in self.pipeline_runners:
+            logger.warning(f"No runner for pipeline '{pipeline}', falling back to routed agent")
+            pipeline = None
+        runner = self.pipeline_runners[pipeline] if pipeline else self.runner
+
         # Get user_id from context or use default
         user_id = context.get("user_id", "default_a2a_user")
         
@@ -82,29 +139,53 @@ class TaskManager:
             session_id = str(uuid.uuid4())
             logger.info(f"Generated new session_id: {session_id}")
             
+        # Expose the request context to agents that read their inputs from session state
+        request_state = {"request_context": context}
+        
         session = await self.session_service.get_session(app_name=A2A_APP_NAME, user_id=user_id, session_id=session_id)
+        compaction = None
         if not session:
-            session = await self.session_service.create_session(app_name=A2A_APP_NAME, user_id=user_id, session_id=session_id, state={})
+            session = await self.session_service.create_session(app_name=A2A_APP_NAME, user_id=user_id, session_id=session_id, state=request_state)
             logger.info(f"Created new session: {session_id}")
+        else:
+            if COMPACTION_ENABLED:
+                session, compaction = await self._compact(session)
+            await self.session_service.append_event(session, Event(author="user", actions=EventActions(state_delta=request_state)))
         
         # Create user message
         request_content = adk_types.Content(role="user", parts=[adk_types.Part(text=message)])
         
         try:
             # Run the agent
-            events_async = self.runner.run_async(
+            logger.info(f"Running {'pipeline ' + pipeline if pipeline else 'routed agent'} for session {session_id}")
+            report_progress("routing", pipeline=pipeline or "routed", session_id=session_id)
+            events_async = runner.run_async(
                 user_id=user_id, 
                 session_id=session_id, 
-                new_message=request_content
+                new_message=request_content,
+                # Streaming requests also get the model's partial text as it is generated
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE if is_streaming() else StreamingMode.NONE)
             )
             
             # Process response
             final_message = "(No response generated)"
-            raw_events = []
+            final_output = None
+            # Only the events returned are kept, and they are serialized once at the end
+            captured = EventCapture()
 
             # Process events
             async for event in events_async:
-                raw_events.append(event.model_dump(exclude_none=True))
+                report_event(event)
+                # Partial events are fragments of the aggregated event that follows them
+                if event.partial:
+                    continue
+                captured.add(event)
+                if self.event_sink:
+                    self.event_sink.emit(event, session_id=session_id, user_id=user_id, pipeline=pipeline or "routed")
+                
+                # Capture the structured output saved to session state by the response agent
+                if event.actions and event.actions.state_delta and "final_output" in event.actions.state_delta:
+                    final_output = event.actions.state_delta["final_output"]
                 
                 # Only extract from the final response
                 if event.is_final_response() and event.content and event.content.role == "model":
@@ -117,7 +198,10 @@ class TaskManager:
                 "message": final_message, 
                 "status": "success",
                 "data": {
-                    "raw_events": raw_events[-3:]
+                    "pipeline": pipeline or "routed",
+                    "final_output": final_output,
+                    **({"raw_events": captured.dump()} if EVENT_CAPTURE != "none" else {}),
+                    **({"compaction": compaction} if compaction else {}),
                 }
             }
 
@@ -128,3 +212,27 @@ class TaskManager:
                 "status": "error",
                 "data": {"error_type": type(e).__name__}
             }
+
+    def stream_task(self, message: str, context: Dict[str, Any], session_id: Optional[str] = None, pipeline: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Process an A2A task request, streaming its progress as server-sent events.
+        
+        Args:
+            message: The text message to process.
+            context: Additional context data.
+            session_id: Session identifier (generated if None).
+            pipeline: Name of a pipeline to run directly (None uses the routed path).
+            
+        Returns:
+            Encoded server-sent events, ending with the process_task response and the session_id.
+        """
+        # Generated here rather than in process_task, so the events can carry the session_id used
+        if not session_id:
+            session_id = str(uuid.uuid4())
+            logger.info(f"Generated new session_id: {session_id}")
+        
+        async def run() -> Dict[str, Any]:
+            result = await self.process_task(message, context, session_id, pipeline=pipeline)
+            return {**result, "session_id": session_id}
+        
+        return stream_progress(run, started={"pipeline": pipeline or "routed", "session_id": session_id})
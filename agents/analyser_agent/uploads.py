@@ -0,0 +1,470 @@
+"""
+Upload handling for the Analyser Agent.
+This module parses multipart upload requests as they arrive: each file part's type is
+sniffed from its first bytes, and the part is hashed and written straight to the upload
+directory, so unsupported or oversized files are rejected before the rest of the
+request is read and the body is written to disk only once.
+"""
+
+import os
+import uuid
+import hashlib
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.routing import APIRoute
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.datastructures import FormData, Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .executor import run_blocking
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upload configuration
+UPLOAD_DIR = os.path.join(os.getcwd(), "static")
+MAX_UPLOAD_BYTES = int(float(os.getenv("ANALYSER_MAX_UPLOAD_MB", 500)) * 1024 * 1024)
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Bytes of a file sniffed for its type
+SNIFF_BYTES = 32
+
+# Maximum size of a form field other than a file, as in Starlette's own parser
+MAX_FIELD_BYTES = 1024 * 1024
+
+# Allowance for the form fields sent alongside the file
+FORM_OVERHEAD_BYTES = 1024 * 1024
+
+# ISO base media brands that identify still images rather than video
+IMAGE_BRANDS = (b"heic", b"heix", b"mif1", b"msf1", b"avif")
+
+
+@dataclass
+class StoredUpload:
+    """An uploaded file saved to disk."""
+    path: str
+    sha256: str
+    size: int
+    mime_type: str
+    kind: str
+    original_filename: Optional[str]
+
+
+def sniff_media_type(header: bytes) -> Optional[Tuple[str, str, str]]:
+    """
+    Detect a supported media type from the first bytes of a file.
+
+    Args:
+        header: The first bytes of the file (at least 16)
+
+    Returns:
+        Tuple of (kind, MIME type, extension) with kind "video" or "image",
+        or None if the type is not supported
+    """
+    if header[4:8] == b"ftyp":
+        brand = header[8:12]
+        if brand in IMAGE_BRANDS:
+            return "image", "image/heic", ".heic"
+        if brand == b"qt  ":
+            return "video", "video/quicktime", ".mov"
+        return "video", "video/mp4", ".mp4"
+    if header.startswith(b"RIFF") and header[8:12] == b"AVI ":
+        return "video", "video/x-msvideo", ".avi"
+    if header.startswith(b"RIFF") and header[8:12] == b"WEBP":
+        return "image", "image/webp", ".webp"
+    if header.startswith(b"\x30\x26\xb2\x75\x8e\x66\xcf\x11"):
+        return "video", "video/x-ms-wmv", ".wmv"
+    if header.startswith(b"FLV"):
+        return "video", "video/x-flv", ".flv"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video", "video/x-matroska", ".mkv"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image", "image/jpeg", ".jpg"
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image", "image/png", ".png"
+    if header.startswith((b"GIF87a", b"GIF89a")):
+        return "image", "image/gif", ".gif"
+    if header.startswith(b"BM"):
+        return "image", "image/bmp", ".bmp"
+    if header.startswith((b"II*\x00", b"MM\x00*")):
+        return "image", "image/tiff", ".tiff"
+    return None
+
+
+def _temp_upload_path(upload_dir: str) -> str:
+    """Return a fresh temporary path in the upload directory."""
+    return os.path.join(upload_dir, f".upload-{uuid.uuid4().hex}.part")
+
+
+class UploadSink:
+    """
+    Write target of a file part streamed from a multipart request.
+
+    The first bytes written are sniffed for a supported type and the size limit is
+    checked on every write, so a bad upload fails while its request is still being
+    read. Accepted bytes are hashed and written to a temporary file in the upload
+    directory, which save_upload moves into place.
+    """
+
+    def __init__(self, filename: Optional[str], upload_dir: str = UPLOAD_DIR, max_bytes: int = MAX_UPLOAD_BYTES):
+        """
+        Open the temporary file.
+
+        Args:
+            filename: The client's file name, for messages
+            upload_dir: Directory to write into
+            max_bytes: Maximum allowed size
+        """
+        os.makedirs(upload_dir, exist_ok=True)
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.temp_path = _temp_upload_path(upload_dir)
+        self.media_type: Optional[Tuple[str, str, str]] = None
+        self.size = 0
+        self._header = b""
+        self._digest = hashlib.sha256()
+        self._file = open(self.temp_path, "wb")
+
+    def _sniff(self):
+        """Detect the type from the bytes seen so far, rejecting unsupported files."""
+        self.media_type = sniff_media_type(self._header)
+        if self.media_type is None:
+            logger.error(f"Unsupported file content for upload: {self.filename}")
+            raise HTTPException(status_code=415, detail=f"Unsupported file type: {self.filename}")
+
+    def write(self, data: bytes):
+        """
+        Append a chunk of the file.
+
+        Raises:
+            HTTPException: 415 for unsupported types, 413 for oversized files
+        """
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds the maximum upload size of {self.max_bytes} bytes")
+        if self.media_type is None:
+            self._header += data[:SNIFF_BYTES - len(self._header)]
+            if len(self._header) >= SNIFF_BYTES:
+                self._sniff()
+        self._digest.update(data)
+        self._file.write(data)
+
+    def finish(self) -> Tuple[Tuple[str, str, str], str, int]:
+        """
+        Close the file once the part is complete, removing it if it is rejected.
+
+        Returns:
+            Tuple of ((kind, MIME type, extension), SHA-256 hex digest, size in bytes)
+
+        Raises:
+            HTTPException: 415 for unsupported files shorter than the sniffed header
+        """
+        try:
+            if self.media_type is None:
+                self._sniff()
+        except BaseException:
+            self.close()
+            raise
+        finally:
+            self._file.close()
+        return self.media_type, self._digest.hexdigest(), self.size
+
+    def close(self):
+        """Close the file and remove it unless it was moved into place."""
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
+async def parse_upload_form(request: Request, upload_dir: str = UPLOAD_DIR, max_bytes: int = MAX_UPLOAD_BYTES) -> FormData:
+    """
+    Parse a multipart request from its body stream, writing file parts through UploadSinks.
+
+    Args:
+        request: The multipart/form-data request
+        upload_dir: Directory file parts are written to
+        max_bytes: Maximum size of each file
+
+    Returns:
+        The form, with each file part as an UploadFile whose file is its UploadSink
+
+    Raises:
+        HTTPException: 400 for malformed requests, 415 or 413 from the first bad file part
+    """
+    _, params = parse_options_header(request.headers.get("content-type"))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise HTTPException(status_code=400, detail="Missing boundary in multipart.")
+
+    items: List[Tuple[str, Any]] = []
+    sinks: List[UploadSink] = []
+    part: Dict[str, Any] = {}
+    # File data received in the current chunk, written off the event loop after parsing it
+    writes: List[Tuple[UploadSink, bytes]] = []
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers=[], header_name=b"", header_value=b"", data=bytearray(), upload=None)
+
+    def on_header_field(data: bytes, start: int, end: int):
+        part["header_name"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        part["header_value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"].append((part["header_name"].lower(), part["header_value"]))
+        part["header_name"], part["header_value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(dict(part["headers"]).get(b"content-disposition"))
+        if b"name" not in options:
+            raise HTTPException(status_code=400, detail='The Content-Disposition header field "name" must be provided.')
+        part["name"] = options[b"name"].decode("utf-8", errors="replace")
+        if b"filename" in options:
+            filename = options[b"filename"].decode("utf-8", errors="replace")
+            sink = UploadSink(filename, upload_dir, max_bytes)
+            sinks.append(sink)
+            part["upload"] = UploadFile(file=sink, filename=filename, headers=Headers(raw=part["headers"]))
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if part["upload"] is not None:
+            writes.append((part["upload"].file, data[start:end]))
+        elif len(part["data"]) + end - start > MAX_FIELD_BYTES:
+            raise HTTPException(status_code=400, detail=f"Form field {part['name']} exceeds {MAX_FIELD_BYTES} bytes")
+        else:
+            part["data"] += data[start:end]
+
+    def on_part_end():
+        if part["upload"] is not None:
+            items.append((part["name"], part["upload"]))
+        else:
+            items.append((part["name"], part["data"].decode("utf-8", errors="replace")))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for sink, data in writes:
+                await run_blocking(sink.write, data)
+            writes.clear()
+        parser.finalize()
+    except BaseException as e:
+        for sink in sinks:
+            sink.close()
+        if isinstance(e, FormParserError):
+            raise HTTPException(status_code=400, detail="Invalid multipart data.")
+        raise
+    return FormData(items)
+
+
+class StreamingUploadRequest(Request):
+    """
+    Request whose multipart form is parsed by parse_upload_form instead of being spooled first.
+
+    The request keeps its file parts' UploadSinks until close_uploads() removes any
+    that were not moved into place, e.g. because the request failed validation.
+    """
+
+    def __init__(self, scope: Scope, receive: Receive):
+        super().__init__(scope, receive)
+        self.upload_sinks: List[UploadSink] = []
+
+    async def form(self, **kwargs) -> FormData:
+        if self._form is None:
+            content_type, _ = parse_options_header(self.headers.get("content-type"))
+            if content_type != b"multipart/form-data":
+                return await super().form(**kwargs)
+            self._form = await parse_upload_form(self)
+            self.upload_sinks = [value.file for _, value in self._form.multi_items()
+                                 if isinstance(value, UploadFile) and isinstance(value.file, UploadSink)]
+        return self._form
+
+    async def close_uploads(self):
+        """Close the request's upload files, removing those not stored by save_upload."""
+        for sink in self.upload_sinks:
+            await run_blocking(sink.close)
+        self.upload_sinks = []
+
+
+class StreamingUploadRoute(APIRoute):
+    """API route that hands its endpoint a StreamingUploadRequest, streaming file uploads to disk."""
+
+    def get_route_handler(self) -> Callable:
+        route_handler = super().get_route_handler()
+
+        async def streaming_upload_route_handler(request: Request):
+            request = StreamingUploadRequest(request.scope, request.receive)
+            try:
+                return await route_handler(request)
+            finally:
+                await request.close_uploads()
+
+        return streaming_upload_route_handler
+
+
+def _stream_to_disk(source, first_chunk: bytes, upload_dir: str, max_bytes: int) -> Tuple[str, str, int]:
+    """
+    Copy an upload to a temporary file in chunks, hashing as it goes.
+
+    Args:
+        source: The file-like upload body, positioned after first_chunk
+        first_chunk: The bytes already read for type detection
+        upload_dir: Directory to write into
+        max_bytes: Maximum allowed size
+
+    Returns:
+        Tuple of (temporary path, SHA-256 hex digest, size in bytes)
+    """
+    digest = hashlib.sha256()
+    size = 0
+    temp_path = _temp_upload_path(upload_dir)
+
+    try:
+        with open(temp_path, "wb") as buffer:
+            chunk = first_chunk
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File exceeds the maximum upload size of {max_bytes} bytes")
+                digest.update(chunk)
+                buffer.write(chunk)
+                chunk = source.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+    return temp_path, digest.hexdigest(), size
+
+
+async def save_upload(file: UploadFile, upload_dir: str = UPLOAD_DIR, max_bytes: int = MAX_UPLOAD_BYTES) -> StoredUpload:
+    """
+    Validate and save an uploaded file under a content-addressed name.
+
+    Files parsed by parse_upload_form were already checked and written while the
+    request was read, and are only moved into place. Other uploads are checked from
+    their first chunk and then copied to disk in chunks, enforcing the size limit and
+    computing the SHA-256 as they go. Identical uploads share one stored file.
+
+    Args:
+        file: The uploaded file
+        upload_dir: Directory to store the file in
+        max_bytes: Maximum allowed size
+
+    Returns:
+        The stored upload
+
+    Raises:
+        HTTPException: 415 for unsupported types, 413 for oversized files
+    """
+    os.makedirs(upload_dir, exist_ok=True)
+
+    if isinstance(file.file, UploadSink):
+        # Already written to the upload directory while the request was parsed
+        media_type, sha256, size = await run_blocking(file.file.finish)
+        kind, mime_type, ext = media_type
+        temp_path = file.file.temp_path
+    else:
+        first_chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        media_type = sniff_media_type(first_chunk[:SNIFF_BYTES])
+        if media_type is None:
+            logger.error(f"Unsupported file content for upload: {file.filename}")
+            raise HTTPException(status_code=415, detail=f"Unsupported file type: {file.filename}")
+        kind, mime_type, ext = media_type
+        temp_path, sha256, size = await run_blocking(_stream_to_disk, file.file, first_chunk, upload_dir, max_bytes)
+
+    path = os.path.join(upload_dir, f"{sha256}{ext}")
+    if os.path.exists(path):
+        os.remove(temp_path)
+        logger.info(f"Upload {file.filename} matches stored file {path}")
+    else:
+        os.replace(temp_path, path)
+
+    logger.info(f"Stored {kind} upload {file.filename} ({mime_type}, {size} bytes) as {path}")
+    return StoredUpload(path=path, sha256=sha256, size=size, mime_type=mime_type, kind=kind, original_filename=file.filename)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that rejects oversized request bodies on upload paths before they are buffered.
+
+    Requests with a Content-Length over the limit get an immediate 413; chunked requests
+    are cut off as soon as the limit is crossed.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Tuple[str, ...] = ("/api/v1/analyze",), max_bytes: int = MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI application
+            paths: Path prefixes the limit applies to
+            max_bytes: Maximum request body size
+        """
+        self.app = app
+        self.paths = paths
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            logger.warning(f"Rejected request to {scope['path']} with Content-Length {int(content_length)}")
+            await self._reject(send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _BodyTooLarge(status_code=413, detail=f"Request body exceeds the maximum upload size of {self.max_bytes} bytes")
+            return message
+
+        async def tracking_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            logger.warning(f"Rejected request to {scope['path']} after {received} bytes")
+            if not response_started:
+                await self._reject(send)
+
+    async def _reject(self, send: Send):
+        """Send a 413 response."""
+        body = f'{{"detail": "Request body exceeds the maximum upload size of {self.max_bytes} bytes"}}'.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("ascii"))],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class _BodyTooLarge(HTTPException):
+    """Raised inside the ASGI receive channel when the body limit is crossed."""
@@ -0,0 +1,282 @@
+"""
+Website fetching for the Analyser Agent.
+This module fetches web pages over a shared, pooled async HTTP client with timeouts and
+a size limit, and keeps an on-disk cache that is revalidated with conditional requests.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .database import DB_FILE
+from .executor import run_blocking
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fetch configuration
+FETCH_CONNECT_TIMEOUT = float(os.getenv("WEB_FETCH_CONNECT_TIMEOUT", 5))
+FETCH_READ_TIMEOUT = float(os.getenv("WEB_FETCH_READ_TIMEOUT", 15))
+FETCH_MAX_BYTES = int(float(os.getenv("WEB_FETCH_MAX_MB", 5)) * 1024 * 1024)
+FETCH_MAX_CONNECTIONS = int(os.getenv("WEB_FETCH_MAX_CONNECTIONS", 100))
+FETCH_MAX_KEEPALIVE = int(os.getenv("WEB_FETCH_MAX_KEEPALIVE", 20))
+FETCH_USER_AGENT = os.getenv("WEB_FETCH_USER_AGENT", "AnalyserAgent/1.0 (+compliance review)")
+
+# HTTP cache, stored next to the analysis results database
+WEB_CACHE_ENABLED = os.getenv("WEB_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+WEB_CACHE_DIR = os.getenv("WEB_CACHE_DIR", os.path.join(os.path.dirname(DB_FILE), "web_cache"))
+
+
+class FetchError(Exception):
+    """Raised when a page cannot be fetched."""
+
+
+class ResponseTooLarge(FetchError):
+    """Raised when a response body exceeds the size limit."""
+
+
+@dataclass
+class FetchResult:
+    """A fetched page."""
+    url: str
+    final_url: str
+    status_code: int
+    content: bytes
+    encoding: str
+    content_type: str
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        """The body decoded with the response's charset."""
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+def normalize_fetch_url(url: str) -> str:
+    """Add an http:// prefix to URLs without a scheme."""
+    url = url.strip()
+    if not url.startswith(("http://", "https://")):
+        logger.debug(f"Added http:// prefix to URL: {url}")
+        url = "http://" + url
+    return url
+
+
+# Extracted text of pages already fetched for the current task (e.g. by the crawler), keyed by URL
+_prefetched_text: ContextVar[Optional[Dict[str, str]]] = ContextVar("prefetched_page_text", default=None)
+
+
+def provide_page_text(url: str, text: str):
+    """
+    Make a page's extracted text available to the current task and the tasks it starts,
+    so tools reading the page use it instead of downloading the page again.
+
+    Args:
+        url: The page URL
+        text: The page's extracted text
+    """
+    _prefetched_text.set({**(_prefetched_text.get() or {}), normalize_fetch_url(url): text})
+
+
+def prefetched_page_text(url: str) -> Optional[str]:
+    """Return the text provided for a URL in the current task, or None if it must be fetched."""
+    return (_prefetched_text.get() or {}).get(normalize_fetch_url(url))
+
+
+class HttpCache:
+    """On-disk cache of response bodies and their validators (ETag / Last-Modified)."""
+
+    def __init__(self, cache_dir: str = WEB_CACHE_DIR):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory the cached responses are stored in
+        """
+        self.cache_dir = cache_dir
+
+    def _paths(self, url: str):
+        """Return the metadata and body paths for a URL."""
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json"), os.path.join(self.cache_dir, f"{key}.body")
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Load a cached response.
+
+        Args:
+            url: The requested URL
+
+        Returns:
+            The metadata dict with the body under "content", or None if not cached
+        """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                meta["content"] = f.read()
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def store(self, url: str, meta: Dict[str, Any], content: bytes):
+        """
+        Store a response, replacing any previous entry atomically.
+
+        Args:
+            url: The requested URL
+            meta: Validators and response details
+            content: The response body
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        meta_path, body_path = self._paths(url)
+        for path, data, mode in ((body_path, content, "wb"), (meta_path, json.dumps(meta), "w")):
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, mode) as f:
+                f.write(data)
+            os.replace(temp_path, path)
+
+
+class WebFetcher:
+    """Async page fetcher sharing one connection pool and one HTTP cache across requests."""
+
+    def __init__(self, cache: Optional[HttpCache] = None, max_bytes: int = FETCH_MAX_BYTES):
+        """
+        Initialize the fetcher.
+
+        Args:
+            cache: HTTP cache to revalidate against, or None to disable caching
+            max_bytes: Maximum response body size
+        """
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.metrics = {"requests": 0, "not_modified": 0, "cache_stores": 0, "errors": 0, "bytes_downloaded": 0}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared client, creating it for the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(FETCH_READ_TIMEOUT, connect=FETCH_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=FETCH_MAX_CONNECTIONS, max_keepalive_connections=FETCH_MAX_KEEPALIVE),
+                headers={"User-Agent": FETCH_USER_AGENT},
+                follow_redirects=True,
+                max_redirects=5,
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def fetch(self, url: str) -> FetchResult:
+        """
+        Fetch a page, revalidating a cached copy with a conditional request when there is one.
+
+        Args:
+            url: The page URL
+
+        Returns:
+            The fetched page; from_cache is set when the server answered 304 Not Modified
+
+        Raises:
+            httpx.HTTPError: On network errors, timeouts and 4XX/5XX responses
+            ResponseTooLarge: If the body exceeds the size limit
+        """
+        url = normalize_fetch_url(url)
+        cached = await run_blocking(self.cache.load, url) if self.cache else None
+
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        self.metrics["requests"] += 1
+        logger.debug(f"Making HTTP request to: {url}")
+        try:
+            async with self._get_client().stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and cached:
+                    self.metrics["not_modified"] += 1
+                    logger.info(f"{url} not modified, using cached copy")
+                    return FetchResult(
+                        url=url,
+                        final_url=cached["final_url"],
+                        status_code=cached["status_code"],
+                        content=cached["content"],
+                        encoding=cached["encoding"],
+                        content_type=cached["content_type"],
+                        from_cache=True,
+                    )
+
+                response.raise_for_status()
+                content = await self._read_limited(response)
+        except Exception:
+            self.metrics["errors"] += 1
+            raise
+
+        result = FetchResult(
+            url=url,
+            final_url=str(response.url),
+            status_code=response.status_code,
+            content=content,
+            encoding=response.charset_encoding or "utf-8",
+            content_type=response.headers.get("content-type", ""),
+        )
+        logger.debug(f"Received response with status code: {response.status_code} ({len(content)} bytes)")
+
+        # Only responses with validators can be revalidated later
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        no_store = "no-store" in response.headers.get("cache-control", "").lower()
+        if self.cache and (etag or last_modified) and not no_store:
+            meta = {
+                "final_url": result.final_url,
+                "status_code": result.status_code,
+                "encoding": result.encoding,
+                "content_type": result.content_type,
+                "etag": etag,
+                "last_modified": last_modified,
+                "fetched_at": time.time(),
+            }
+            await run_blocking(self.cache.store, url, meta, content)
+            self.metrics["cache_stores"] += 1
+
+        return result
+
+    async def _read_limited(self, response: httpx.Response) -> bytes:
+        """Read a streamed body, stopping as soon as it exceeds the size limit."""
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > self.max_bytes:
+            raise ResponseTooLarge(f"{response.url} is {declared} bytes, over the {self.max_bytes} byte limit")
+
+        chunks, size = [], 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ResponseTooLarge(f"{response.url} exceeds the {self.max_bytes} byte limit")
+            chunks.append(chunk)
+        self.metrics["bytes_downloaded"] += size
+        return b"".join(chunks)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request, revalidation and download counts."""
+        return dict(self.metrics)
+
+    async def aclose(self):
+        """Close the shared client and its pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+web_fetcher = WebFetcher(cache=HttpCache() if WEB_CACHE_ENABLED else None)
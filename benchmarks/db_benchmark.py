@@ -0,0 +1,124 @@
+"""
+Benchmark for the Analyser Agent results database.
+Measures inserts and lookups per second through AnalysisDatabase, both called
+directly and from concurrent asyncio tasks as the API handlers do, and how long
+the event loop is blocked while the concurrent run is in progress.
+
+Usage:
+    python -m benchmarks.db_benchmark [--rows 2000] [--concurrency 32]
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+
+from agents.analyser_agent.database import AnalysisDatabase
+
+
+def _row(document_id: str):
+    """Build the keyword arguments for one analysis result."""
+    return {
+        "document_id": document_id,
+        "document_name": f"{document_id}.jpg",
+        "status": "Approved",
+        "score": 82.5,
+        "document_type": "image",
+        "file_url": f"/static/{document_id}.jpg",
+        "suggestions": ["Add a call to action", "Increase contrast"],
+        "conflicts": ["Logo is too small"],
+        "guidelines": ["Brand colours", "Legible text"],
+        "summary": "An Instagram post showing the product on a table. " * 5,
+    }
+
+
+def _rate(count: int, seconds: float) -> str:
+    """Format an operations-per-second figure."""
+    return f"{count / seconds:10.0f} ops/s  ({seconds:.2f}s)"
+
+
+async def _concurrent(db: AnalysisDatabase, ids, concurrency: int):
+    """Run inserts then lookups from concurrent tasks, using the async interface when available."""
+    store = getattr(db, "store_analysis_result_async", None)
+    get = getattr(db, "get_analysis_result_async", None)
+
+    async def insert(pending):
+        for document_id in pending:
+            if store:
+                await store(**_row(document_id))
+            else:
+                db.store_analysis_result(**_row(document_id))
+
+    async def lookup(pending):
+        for document_id in pending:
+            if get:
+                await get(document_id)
+            else:
+                db.get_analysis_result(document_id)
+
+    async def run(worker):
+        # A fixed number of tasks share one iterator, like concurrent requests
+        pending = iter(ids)
+        await asyncio.gather(*(worker(pending) for _ in range(concurrency)))
+
+    max_stall = 0.0
+    running = True
+
+    async def heartbeat():
+        # Track the longest time the event loop was unable to run other tasks
+        nonlocal max_stall
+        while running:
+            before = time.perf_counter()
+            await asyncio.sleep(0.001)
+            max_stall = max(max_stall, time.perf_counter() - before - 0.001)
+
+    monitor = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await run(insert)
+    insert_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await run(lookup)
+    lookup_seconds = time.perf_counter() - start
+
+    running = False
+    await monitor
+    return insert_seconds, lookup_seconds, max_stall
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark AnalysisDatabase inserts and lookups")
+    parser.add_argument("--rows", type=int, default=2000, help="Number of rows to insert and look up")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent tasks in the async run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = AnalysisDatabase(db_path=os.path.join(tmp, "bench.db"))
+
+        ids = [str(uuid.uuid4()) for _ in range(args.rows)]
+        start = time.perf_counter()
+        for document_id in ids:
+            db.store_analysis_result(**_row(document_id))
+        print(f"sequential inserts: {_rate(args.rows, time.perf_counter() - start)}")
+
+        start = time.perf_counter()
+        for document_id in ids:
+            db.get_analysis_result(document_id)
+        print(f"sequential lookups: {_rate(args.rows, time.perf_counter() - start)}")
+
+        ids = [str(uuid.uuid4()) for _ in range(args.rows)]
+        insert_seconds, lookup_seconds, max_stall = asyncio.run(_concurrent(db, ids, args.concurrency))
+        print(f"concurrent inserts: {_rate(args.rows, insert_seconds)}")
+        print(f"concurrent lookups: {_rate(args.rows, lookup_seconds)}")
+        print(f"longest event loop stall: {max_stall * 1000:.1f} ms")
+
+        if hasattr(db, "close"):
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
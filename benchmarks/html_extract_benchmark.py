@@ -0,0 +1,70 @@
+"""
+Benchmark for website text extraction in the Analyser Agent.
+Compares the original BeautifulSoup extraction used by get_website_data with
+html_extract.extract_text on a corpus of saved pages: parse time per page, and
+the size of the text sent to Gemini in characters and estimated tokens.
+
+Usage:
+    python -m benchmarks.html_extract_benchmark [--corpus benchmarks/html_corpus] [--repeat 5]
+"""
+
+import os
+import glob
+import time
+import argparse
+import statistics
+
+from bs4 import BeautifulSoup
+
+from agents.analyser_agent.html_extract import CHARS_PER_TOKEN, EXTRACT_MAX_TOKENS, extract_text
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "html_corpus")
+
+
+def legacy_extract_text(html: str) -> str:
+    """The extraction get_website_data used before html_extract."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.extract()
+    return soup.get_text()
+
+
+def _time(function, html: str, repeat: int):
+    """Return the median seconds per call and the output of one call."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = function(html)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare website text extraction speed and output size")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="Directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per page; the median is reported")
+    parser.add_argument("--max-tokens", type=int, default=EXTRACT_MAX_TOKENS, help="Token budget for the new extraction")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, "*.html")))
+    if not paths:
+        parser.error(f"No .html files in {args.corpus}")
+
+    print(f"{'page':<28}{'html KB':>9}{'old ms':>9}{'new ms':>9}{'old tokens':>12}{'new tokens':>12}")
+    totals = [0.0, 0.0, 0, 0]
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        old_seconds, old_text = _time(legacy_extract_text, html, args.repeat)
+        new_seconds, new_text = _time(lambda page: extract_text(page, args.max_tokens), html, args.repeat)
+        old_tokens = len(old_text) // CHARS_PER_TOKEN
+        new_tokens = len(new_text) // CHARS_PER_TOKEN
+        totals = [totals[0] + old_seconds, totals[1] + new_seconds, totals[2] + old_tokens, totals[3] + new_tokens]
+        print(f"{os.path.basename(path):<28}{len(html) / 1024:>9.0f}{old_seconds * 1000:>9.1f}{new_seconds * 1000:>9.1f}{old_tokens:>12}{new_tokens:>12}")
+
+    print(f"{'total':<28}{'':>9}{totals[0] * 1000:>9.1f}{totals[1] * 1000:>9.1f}{totals[2]:>12}{totals[3]:>12}")
+    print(f"parse speedup: {totals[0] / totals[1]:.1f}x, prompt size: {totals[3] / max(totals[2], 1):.0%} of before")
+
+
+if __name__ == "__main__":
+    main()
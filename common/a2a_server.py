@@ -5,18 +5,22 @@ This module provides a FastAPI server implementation for agent-to-agent communic
 
 import os
 import json
+import uuid
 import inspect
 import logging
 from typing import Dict, Any, Callable, Optional, List
 
 from fastapi import FastAPI, Body, HTTPException, Request, File, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Response headers that keep proxies from buffering or caching event streams
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
 class AgentRequest(BaseModel):
     """Standard A2A agent request format."""
     message: str = Field(..., description="The message to process")
@@ -54,21 +58,35 @@ def create_agent_server(
     @app.post("/run", response_model=AgentResponse)
     async def run(request: AgentRequest = Body(...)):
         """Standard A2A run endpoint for processing agent requests."""
+        # Generated here when missing, so the response names the session the task ran in
+        session_id = request.session_id or str(uuid.uuid4())
         try:
-            result = await task_manager.process_task(request.message, request.context, request.session_id)
+            result = await task_manager.process_task(request.message, request.context, session_id)
 
             return AgentResponse(
                 message=result.get("message", "Task completed"),
                 status="success",
                 data=result.get("data", {}),
-                session_id=request.session_id
+                session_id=session_id
             )
         except Exception as e:
             return AgentResponse(
                 message=f"Error processing request: {str(e)}",
                 status="error",
                 data={"error_type": type(e).__name__},
-                session_id=request.session_id
+                session_id=session_id
             )
+
+    # Streaming variant of the run endpoint, for task managers that can report progress
+    @app.post("/run/stream")
+    async def run_stream(request: AgentRequest = Body(...)):
+        """A2A run endpoint streaming progress as server-sent events, ending with the response."""
+        if not hasattr(task_manager, "stream_task"):
+            raise HTTPException(status_code=404, detail=f"Agent {name} does not support streaming")
+        return StreamingResponse(
+            task_manager.stream_task(request.message, request.context, request.session_id),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS,
+        )
         
     return app
\ No newline at end of file
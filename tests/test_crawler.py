@@ -0,0 +1,123 @@
+"""
+Tests for the website crawler, run against a local HTTP fixture server.
+"""
+
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agents.analyser_agent.crawler import Crawler
+from agents.analyser_agent.web_fetch import WebFetcher
+
+
+def page(title: str, *links: str) -> str:
+    """Build an HTML page with a heading, some text and links."""
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return f"<html><body><main><h1>{title}</h1><p>Content of {title}.</p>{anchors}</main></body></html>"
+
+
+class FixtureSite:
+    """A local HTTP server serving a fixed set of paths, recording every request."""
+
+    def __init__(self, pages: dict):
+        self.pages = pages
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site.requests.append(self.path)
+                body = site.pages.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                content_type = "text/plain" if self.path.endswith(".txt") else "text/html"
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class CrawlerTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.other = FixtureSite({"/": page("Elsewhere")})
+        self.site = FixtureSite({
+            "/robots.txt": "User-agent: *\nDisallow: /private\n",
+            "/": page("Home", "/a", "/b", "/private", "/copy", "/logo.png", f"{self.other.url}/"),
+            "/a": page("A", "/a/deep"),
+            "/a/deep": page("Deep", "/a/deeper"),
+            "/a/deeper": page("Deeper"),
+            "/b": page("B"),
+            "/private": page("Private"),
+            "/copy": page("Home", "/a", "/b", "/private", "/copy", "/logo.png", f"{self.other.url}/"),
+        })
+
+    def tearDown(self):
+        self.site.close()
+        self.other.close()
+
+    async def crawl(self, **options) -> dict:
+        options = {"fetcher": WebFetcher(cache=None), "delay": 0, "use_sitemap": False, **options}
+        crawler = Crawler(**options)
+        return {page.url.replace(self.site.url, ""): page async for page in crawler.crawl(f"{self.site.url}/")}
+
+    async def test_crawls_same_origin_pages_within_depth(self):
+        pages = await self.crawl(max_pages=20, max_depth=2)
+        self.assertEqual(set(pages), {"/", "/a", "/b", "/a/deep"})
+        self.assertEqual(pages["/a/deep"].depth, 2)
+        self.assertIn("Content of Deep.", pages["/a/deep"].text)
+        self.assertEqual(self.other.requests, [])
+
+    async def test_respects_robots_txt(self):
+        await self.crawl(max_pages=20, max_depth=1)
+        self.assertIn("/robots.txt", self.site.requests)
+        self.assertNotIn("/private", self.site.requests)
+
+        self.site.requests.clear()
+        pages = await self.crawl(max_pages=20, max_depth=1, respect_robots=False)
+        self.assertIn("/private", pages)
+
+    async def test_deduplicates_pages_by_content_hash(self):
+        pages = await self.crawl(max_pages=20, max_depth=1)
+        self.assertIn("/copy", self.site.requests)
+        self.assertNotIn("/copy", pages)
+        self.assertEqual(len({page.content_hash for page in pages.values()}), len(pages))
+
+    async def test_stops_at_the_page_budget(self):
+        pages = await self.crawl(max_pages=2, max_depth=2)
+        self.assertEqual(len(pages), 2)
+        self.assertIn("/", pages)
+        fetched = [path for path in self.site.requests if path != "/robots.txt"]
+        self.assertEqual(len(fetched), 2)
+
+    async def test_depth_zero_fetches_only_the_seed(self):
+        pages = await self.crawl(max_pages=20, max_depth=0)
+        self.assertEqual(list(pages), ["/"])
+
+    async def test_seeds_from_the_sitemap(self):
+        self.site.pages["/sitemap.xml"] = (
+            '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f"<url><loc>{self.site.url}/a/deeper</loc></url></urlset>"
+        )
+        pages = await self.crawl(max_pages=20, max_depth=1, use_sitemap=True)
+        self.assertEqual(pages["/a/deeper"].depth, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()